@@ -1,9 +1,22 @@
 # TSapp.py
 
+import contextlib
+
 import streamlit as st
-import pdfplumber
 import pandas as pd
-from TSutils import extract_specs, extract_nozzles, extract_manways
+import TSdiag
+from TScache import default_cache
+import TSestimate
+from TSlabor import COMPONENTS, labor_rows
+from TSmodel import TankResult
+from TSpdf import BACKEND_CHOICES, pages_to_text
+from TSpipeline import process_pdf
+from TSrules import timed_out
+from TSqueue import ExtractionQueue
+from TSsteel import COMPONENTS as STEEL_COMPONENTS, steel_rows
+from TSstore import default_store, result_hash
+from TSutils import locate_specs
+from TSviewer import show_raw_text
 
 st.set_page_config(page_title="Tank Spec Reader")
 
@@ -13,36 +26,65 @@ st.markdown(
     "Toss in your tank calculation PDF and I'll get those key details you need."
 )
 
-uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
 
-# --- Streamlit UI Output ---
-if uploaded_file:
-    st.success("PDF uploaded! Extracting text...")
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
 
-    with pdfplumber.open(uploaded_file) as pdf:
-        full_text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+def report_frames(report):
+    return (
+        pd.DataFrame(report["specs"].items(), columns=["Field", "Value"]),
+        pd.DataFrame(report["nozzles"]) if report["nozzles"] else None,
+        pd.DataFrame(report["manways"]) if report["manways"] else None,
+    )
 
-    specs = extract_specs(full_text)
 
+def export_name(specs):
     # --- Filename base from extracted specs ---
     quote_id = specs.get("Quotation No", "quote").replace(" ", "_").strip()
     project_id_raw = specs.get("Project ID", "").strip()
     project_id = project_id_raw.replace(" ", "_")
-    if project_id_raw.lower() in ["not found", "", "none"]:
-        filename_base = quote_id
+    if project_id_raw.lower() in ["not found", "timed out", "", "none"]:
+        return quote_id
+    return f"{quote_id}_{project_id}"
+
+
+def show_revision(revision, page_count):
+    st.subheader("🔁 Changes Since Previous Revision")
+    st.caption(
+        f"Reused {revision['reused_pages']} of {page_count} pages from the "
+        "previous revision of this Tag ID."
+    )
+    if revision["changes"]:
+        changes = pd.DataFrame(revision["changes"]).astype(str)
+        changes.columns = ["Table", "Item", "Field", "Old", "New"]
+        st.table(changes)
     else:
-        filename_base = f"{quote_id}_{project_id}"
+        st.info("No field changes.")
+
+
+def show_report(report):
+    # Spec, nozzle and manway tables with their downloads.
+    filename_base = export_name(report["specs"])
+    df, nozzle_df, manway_df = report_frames(report)
+    tank = TankResult.from_report(report)
+
+    revision = report.get("revision")
+    if revision is not None:
+        show_revision(revision, len(report["pages"]))
 
     # --- Display Spec Table ---
     st.subheader("📋 Extracted Key Specs")
-    df = pd.DataFrame(specs.items(), columns=["Field", "Value"])
     st.table(df)
+    if timeouts := timed_out(report["specs"]):
+        st.warning(
+            "Matching ran out of budget before finding: "
+            + ", ".join(timeouts)
+            + ". These read \"Timed out\", not \"Not found\"."
+        )
 
     # --- Nozzles Table ---
-    nozzles = extract_nozzles(full_text)
-    if nozzles:
+    if nozzle_df is not None:
         st.subheader("🛠️ Nozzles (Roof & Shell)")
-        nozzle_df = pd.DataFrame(nozzles)
         st.table(nozzle_df)
         csv_nozzles = nozzle_df.to_csv(index=False).encode("utf-8")
         st.download_button(
@@ -55,10 +97,8 @@ if uploaded_file:
         st.info("No nozzles found.")
 
     # --- Manway Table ---
-    manways = extract_manways(full_text)
-    if manways:
+    if manway_df is not None:
         st.subheader("🛠️ Manway Nozzles")
-        manway_df = pd.DataFrame(manways)
         st.table(manway_df)
         csv_manways = manway_df.to_csv(index=False).encode("utf-8")
         st.download_button(
@@ -70,37 +110,204 @@ if uploaded_file:
     else:
         st.info("No manway nozzles found.")
 
-    # --- Combined Export Function ---
-    def create_combined_csv(specs_df, nozzle_df=None, manway_df=None):
-        parts = []
-        parts.append("=== TANK SPECS ===")
-        parts.append(specs_df.to_csv(index=False))
+    # --- Labor Hours ---
+    st.subheader("⏱️ Labor Hours Estimate")
+    hours = labor_rows([tank])[0]
+    st.table(
+        pd.DataFrame(
+            [(name.replace("_", " ").title(), hours[name]) for name in COMPONENTS]
+            + [("Total", hours["total"])],
+            columns=["Item", "Hours"],
+        ).round(1)
+    )
+
+    # --- Steel Weight & Material Cost ---
+    st.subheader("🔩 Steel Weight & Material Cost")
+    steel = steel_rows([tank])[0]
+    st.table(
+        pd.DataFrame(
+            [
+                (name.replace("_", " ").title(), *steel[name])
+                for name in STEEL_COMPONENTS
+            ]
+            + [("Total", *steel["total"])],
+            columns=["Item", "Weight (lb)", "Material $"],
+        ).round(0)
+    )
+
+    # --- Estimate Sheet Export ---
+    if TSestimate.Workbook is None:
+        st.info("Install openpyxl to download the Estimate Sheet.")
+    elif TSestimate.is_calc_report(tank):
+        st.download_button(
+            label="⬇️ Download Estimate Sheet",
+            data=report_workbook(report, tank),
+            file_name=f"{filename_base}.xlsx",
+            mime=XLSX_MIME,
+        )
+
+
+def report_workbook(report, tank):
+    # One report's Estimate Sheet workbook, built once per extracted result
+    # rather than on every rerun (the bid package view reruns every second
+    # while files are running).
+    key = (report["key"], result_hash(report))
+    workbooks = st.session_state.setdefault("report.estimates", {})
+    if key not in workbooks:
+        workbooks[key] = TSestimate.estimate_workbook([tank])
+    return workbooks[key]
+
+
+def package_workbook(finished, tanks):
+    # The Estimate Sheet workbook, a sheet per tank; rebuilt when another
+    # tank finishes rather than on every refresh.
+    key = tuple(job.name for job in finished)
+    cached = st.session_state.get("package.estimates")
+    if cached is None or cached[0] != key:
+        cached = (key, TSestimate.estimate_workbook(tanks))
+        st.session_state["package.estimates"] = cached
+    return cached[1]
+
+
+def show_package(queue):
+    polling = bool(queue.pending())
+
+    # Refreshes itself once a second while files are running, so finished
+    # tanks can be opened while the rest are still going.
+    @st.fragment(run_every=1.0 if polling else None)
+    def package_status():
+        jobs = list(queue.jobs.values())
+        finished = queue.finished()
+        pending = queue.pending()
+        # One labor and one steel pass over every finished tank.
+        tanks = [TankResult.from_report(job.report, job.name) for job in finished]
+        totals = {
+            id(job): (hours["total"], steel["total"][1])
+            for job, hours, steel in zip(finished, labor_rows(tanks), steel_rows(tanks))
+        }
+        st.progress(
+            (len(jobs) - len(pending)) / len(jobs),
+            text=f"{len(finished)} of {len(jobs)} tanks extracted",
+        )
+        st.table(
+            pd.DataFrame(
+                [
+                    (
+                        job.name,
+                        job.state,
+                        (job.report or {"specs": {}})["specs"].get("Quotation No", ""),
+                        f"{job.seconds:.1f}" if job.seconds is not None else "",
+                        f"{totals[id(job)][0]:.1f}" if id(job) in totals else "",
+                        f"{totals[id(job)][1]:,.0f}" if id(job) in totals else "",
+                        job.error or "",
+                    )
+                    for job in jobs
+                ],
+                columns=[
+                    "File",
+                    "Status",
+                    "Quotation No",
+                    "Seconds",
+                    "Labor Hours",
+                    "Material $",
+                    "Error",
+                ],
+            )
+        )
+
+        if finished:
+            # --- Package Export ---
+            if TSestimate.Workbook is None:
+                st.info("Install openpyxl to download the Estimate Sheets.")
+            elif any(map(TSestimate.is_calc_report, tanks)):
+                st.download_button(
+                    label=f"⬇️ Download All Tanks ({len(finished)} of {len(jobs)})",
+                    data=package_workbook(finished, tanks),
+                    file_name="bid_package.xlsx",
+                    mime=XLSX_MIME,
+                )
+            names = [job.name for job in finished]
+            selected = st.selectbox("View tank", names, key="package.view")
+            show_report(finished[names.index(selected)].report)
 
-        if nozzle_df is not None and not nozzle_df.empty:
-            parts.append("\n=== NOZZLES (Roof & Shell) ===")
-            parts.append(nozzle_df.to_csv(index=False))
+        if polling and not pending:
+            # Everything is in: one full rerun turns the polling off.
+            st.rerun()
 
-        if manway_df is not None and not manway_df.empty:
-            parts.append("\n=== MANWAYS ===")
-            parts.append(manway_df.to_csv(index=False))
+    package_status()
 
-        return "\n".join(parts).encode("utf-8")
 
-    # --- Combined CSV Export ---
-    combined_csv = create_combined_csv(
-        df,
-        nozzle_df if "nozzle_df" in locals() else None,
-        manway_df if "manway_df" in locals() else None,
+# --- Streamlit UI Output ---
+backend = st.sidebar.selectbox("Text extraction backend", BACKEND_CHOICES)
+package_mode = st.sidebar.checkbox("Bid package (several PDFs)")
+show_diagnostics = st.sidebar.checkbox("Show diagnostics", disabled=package_mode)
+# A button, not a checkbox: it is True for the one rerun it triggers, so only
+# that run is profiled and later reruns go back to the cache.
+profile_run = st.sidebar.button(
+    "Re-extract under cProfile", disabled=not show_diagnostics or package_mode
+)
+
+if package_mode:
+    uploaded_files = st.file_uploader(
+        "Upload the package's PDF files", type=["pdf"], accept_multiple_files=True
     )
+    queue = st.session_state.get("package.queue")
+    if queue is None or queue.backend != backend:
+        queue = st.session_state["package.queue"] = ExtractionQueue(backend)
+    queue.keep_only({queue.submit(f.name, f.getvalue()) for f in uploaded_files})
+    if queue.jobs:
+        show_package(queue)
+    uploaded_file = None
+else:
+    uploaded_file = st.file_uploader("Upload a PDF file", type=["pdf"])
 
-    st.download_button(
-        label="⬇️ Download All Data",
-        data=combined_csv,
-        file_name=f"{filename_base}.csv",
-        mime="text/csv",
+if uploaded_file:
+    st.success("PDF uploaded! Extracting text...")
+
+    # Cached by file hash, so reruns and re-uploads skip the parse. A profiled
+    # run skips the cache so there is something to profile.
+    profiling = show_diagnostics and profile_run
+    capture = (
+        TSdiag.capture(uploaded_file.name, profile=profiling)
+        if show_diagnostics
+        else contextlib.nullcontext()
     )
+    with capture as diagnostics:
+        report = process_pdf(
+            uploaded_file.getvalue(),
+            cache=None if profiling else default_cache(),
+            backend=backend,
+        )
+    # Kept for cross-quote queries; a file already stored is not rewritten.
+    default_store().save(report, uploaded_file.name)
+    full_text = pages_to_text(report["pages"])
+    show_report(report)
+
+    # --- Diagnostics ---
+    if diagnostics is not None:
+        with st.expander("🩺 Diagnostics"):
+            st.caption(f"Total {diagnostics.seconds * 1000:.1f} ms")
+            st.table(
+                pd.DataFrame(
+                    [(k, v * 1000) for k, v in diagnostics.stages.items()],
+                    columns=["Stage", "ms"],
+                )
+            )
+            st.table(
+                pd.DataFrame(
+                    [(k, v * 1000) for k, v in diagnostics.slowest_fields(10)],
+                    columns=["Slowest fields", "ms"],
+                )
+            )
+            st.json(diagnostics.counts)
+            if diagnostics.profile:
+                st.code(diagnostics.profile)
 
     # --- Full Raw PDF Text Viewer ---
     st.markdown("---")
     st.subheader("🔍 Full Raw Text (for reference)")
-    st.text_area("PDF Text", full_text, height=400)
+    show_raw_text(
+        report["key"],
+        [page.text for page in report["pages"]],
+        locate_specs(full_text),
+    )
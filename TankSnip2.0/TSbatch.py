@@ -0,0 +1,318 @@
+# TSbatch.py
+#
+# Headless batch mode: extract every calc report in a directory or glob.
+#
+#   python TankSnip2.0/TSbatch.py "OTTO Checks" -o batch_out
+#   python TankSnip2.0/TSbatch.py "reports/**/*.pdf" -o batch_out --workers 8
+#   python TankSnip2.0/TSbatch.py "OTTO Checks" --diagnostics diagnostics.jsonl
+#   python TankSnip2.0/TSbatch.py "OTTO Checks" --estimates estimates
+
+import argparse
+import contextlib
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import TSdiag
+from TScache import default_cache
+import TSestimate
+import TSmodel
+from TSpdf import AUTO, BACKEND_CHOICES
+from TSpipeline import stream_pdf
+from TSrules import field_status, timed_out
+from TSstore import DEFAULT_DB_PATH, ResultStore
+
+NOZZLE_COLUMNS = [
+    "QTY",
+    "Size",
+    "SCH",
+    "Type",
+    "With Blind",
+    "Repad Required",
+    "Repad OD (in)",
+    "Repad Thickness (in)",
+]
+MANWAY_COLUMNS = [
+    "QTY",
+    "Size",
+    "Neck Thickness (in)",
+    "Type",
+    "Repad Required",
+    "Repad OD (in)",
+    "Repad Thickness (in)",
+]
+
+# Results are written to the store this many files per transaction.
+STORE_BATCH = 100
+
+
+def find_pdfs(inputs):
+    found = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            found.extend(p for p in path.rglob("*") if p.suffix.lower() == ".pdf")
+        elif path.is_file():
+            found.append(path)
+        else:
+            found.extend(Path(p) for p in glob.glob(item, recursive=True))
+    # Same file reached through two inputs is only processed once.
+    return sorted({p.resolve(): p for p in found}.values())
+
+
+def process_file(path, use_cache=True, diagnostics=False, backend=AUTO):
+    start = time.perf_counter()
+    cache = default_cache() if use_cache else None
+    capture = (
+        TSdiag.capture(Path(path).name, log=False)
+        if diagnostics
+        else contextlib.nullcontext()
+    )
+    # Files are already spread across processes; each one is streamed page by
+    # page so long reports don't multiply memory by the worker count.
+    with capture as recorded:
+        report = stream_pdf(Path(path).read_bytes(), cache=cache, backend=backend)
+    result = {
+        "file": str(path),
+        "key": report["key"],
+        "pages": report["pages"],
+        "seconds": time.perf_counter() - start,
+        "specs": report["specs"],
+        "nozzles": report["nozzles"],
+        "manways": report["manways"],
+    }
+    if recorded is not None:
+        result["diagnostics"] = recorded.to_dict()
+    return result
+
+
+class BatchWriter:
+    # Rows are written and flushed as each file finishes, so partial results
+    # survive an interrupted batch.
+
+    def __init__(self, out_dir, spec_format):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.spec_format = spec_format
+        self._files = []
+
+        self.specs = self._open(out_dir / f"specs.{spec_format}")
+        if spec_format == "csv":
+            self.spec_rows = csv.writer(self.specs)
+            self.spec_rows.writerow(
+                ["File", "Quotation No", "Field", "Value", "Status"]
+            )
+
+        nozzles = self._open(out_dir / "nozzles.csv")
+        self.nozzle_rows = csv.DictWriter(
+            nozzles, ["File", "Quotation No", *NOZZLE_COLUMNS]
+        )
+        self.nozzle_rows.writeheader()
+
+        manways = self._open(out_dir / "manways.csv")
+        self.manway_rows = csv.DictWriter(
+            manways, ["File", "Quotation No", *MANWAY_COLUMNS]
+        )
+        self.manway_rows.writeheader()
+
+    def _open(self, path):
+        handle = open(path, "w", newline="", encoding="utf-8")
+        self._files.append(handle)
+        return handle
+
+    def write(self, result):
+        name = Path(result["file"]).name
+        quote = result["specs"].get("Quotation No", "")
+
+        if self.spec_format == "csv":
+            for field, value in result["specs"].items():
+                self.spec_rows.writerow(
+                    [name, quote, field, value, field_status(value)]
+                )
+        else:
+            record = {
+                "file": name,
+                "pages": result["pages"],
+                "specs": result["specs"],
+                "timeouts": timed_out(result["specs"]),
+            }
+            self.specs.write(json.dumps(record) + "\n")
+
+        for row in result["nozzles"]:
+            self.nozzle_rows.writerow({"File": name, "Quotation No": quote, **row})
+        for row in result["manways"]:
+            self.manway_rows.writerow({"File": name, "Quotation No": quote, **row})
+
+        for handle in self._files:
+            handle.flush()
+
+    def close(self):
+        for handle in self._files:
+            handle.close()
+
+
+def run_batch(
+    pdfs,
+    out_dir,
+    workers,
+    spec_format="csv",
+    use_cache=True,
+    diagnostics=False,
+    backend=AUTO,
+    store_path=DEFAULT_DB_PATH,
+    parquet_path=None,
+    estimates_path=None,
+):
+    writer = BatchWriter(out_dir, spec_format)
+    tanks = [] if parquet_path else None
+    estimates = TSestimate.EstimateWriter(estimates_path) if estimates_path else None
+    store = ResultStore(store_path) if store_path else None
+    stored = []
+    failures = []
+    pages = 0
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(process_file, p, use_cache, diagnostics, backend): p
+                for p in pdfs
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                path = futures[future]
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    failures.append((path, f"{type(exc).__name__}: {exc}"))
+                    print(f"[{done}/{len(pdfs)}] FAILED {path.name}", file=sys.stderr)
+                    continue
+                writer.write(result)
+                if tanks is not None or estimates is not None:
+                    name = Path(result["file"]).name
+                    tank = TSmodel.TankResult.from_report(result, name)
+                    if tanks is not None:
+                        tanks.append(tank)
+                    if estimates is not None and not estimates.write(tank):
+                        print(
+                            f"  no estimate for {name}: no quotation number",
+                            file=sys.stderr,
+                        )
+                if store is not None:
+                    stored.append((result, Path(result["file"]).name))
+                    if len(stored) >= STORE_BATCH:
+                        store.save_many(stored)
+                        stored = []
+                if "diagnostics" in result:
+                    TSdiag.logger.info(json.dumps(result["diagnostics"]))
+                pages += result["pages"]
+                print(
+                    f"[{done}/{len(pdfs)}] {path.name}: {result['pages']} pages "
+                    f"in {result['seconds']:.2f}s",
+                    file=sys.stderr,
+                )
+    finally:
+        writer.close()
+        if estimates is not None:
+            estimates.close()
+        if store is not None:
+            store.save_many(stored)
+            store.close()
+        if tanks:
+            TSmodel.write_parquet(tanks, parquet_path)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "files": len(pdfs) - len(failures),
+        "pages": pages,
+        "seconds": elapsed,
+        "failures": failures,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract API-650 calc reports")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories or globs")
+    parser.add_argument("-o", "--out", type=Path, default=Path("tanksnip_batch"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB_PATH,
+        help=f"SQLite results store (default: {DEFAULT_DB_PATH})",
+    )
+    parser.add_argument("--no-store", action="store_true")
+    parser.add_argument(
+        "--parquet",
+        type=Path,
+        metavar="FILE",
+        help="also write one typed row per tank to FILE (needs pyarrow)",
+    )
+    parser.add_argument(
+        "--estimates",
+        type=Path,
+        metavar="PATH",
+        help="also fill the Estimate Sheet per tank: a folder gets a workbook "
+        "per quote, a .xlsx file a sheet per tank",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKEND_CHOICES,
+        default=AUTO,
+        help="text extraction backend (default: fastest that reads the report)",
+    )
+    parser.add_argument(
+        "--diagnostics",
+        type=Path,
+        metavar="FILE",
+        help="append per-file stage and field timings to FILE as JSON lines",
+    )
+    args = parser.parse_args(argv)
+
+    if args.diagnostics:
+        handler = logging.FileHandler(args.diagnostics, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        TSdiag.logger.addHandler(handler)
+        TSdiag.logger.setLevel(logging.INFO)
+
+    if args.parquet and TSmodel.pa is None:
+        parser.error("--parquet needs pyarrow: pip install pyarrow")
+    if args.estimates and TSestimate.Workbook is None:
+        parser.error("--estimates needs openpyxl: pip install openpyxl")
+
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        parser.error("no PDF files found")
+
+    summary = run_batch(
+        pdfs,
+        args.out,
+        args.workers,
+        args.format,
+        use_cache=not args.no_cache,
+        diagnostics=args.diagnostics is not None,
+        backend=args.backend,
+        store_path=None if args.no_store else args.db,
+        parquet_path=args.parquet,
+        estimates_path=args.estimates,
+    )
+
+    seconds = summary["seconds"] or 1e-9
+    print(
+        f"\n{summary['files']} files, {summary['pages']} pages in {seconds:.2f}s "
+        f"({summary['files'] / seconds:.2f} files/s, "
+        f"{summary['pages'] / seconds:.1f} pages/s)"
+    )
+    for path, error in summary["failures"]:
+        print(f"  FAILED {path}: {error}")
+    return 1 if summary["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "tanksnip"
+DEFAULT_MEMORY_ITEMS = 64
+DEFAULT_DISK_BYTES = 256 * 1024 * 1024
+# Eviction trims the directory to this share of max_bytes, so that a full
+# cache is not rescanned on every put.
+EVICT_TO = 0.9
+
+
+def file_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    # Two tiers: an in-memory LRU of live objects, and JSON files on disk that
+    # survive restarts. Disk entries are evicted least-recently-used first
+    # (by mtime, refreshed on every hit) once the directory outgrows max_bytes.
+    # The directory is only scanned when a running total of its size says so:
+    # at the first put, and whenever this process's writes take it past the
+    # limit (other processes' writes are counted at the next scan).
+
+    def __init__(
+        self,
+        directory=DEFAULT_CACHE_DIR,
+        memory_items=DEFAULT_MEMORY_ITEMS,
+        max_bytes=DEFAULT_DISK_BYTES,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+
+    def _path(self, key):
+        return self.directory / f"{key}.json"
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.directory is None:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp.write_text(json.dumps(value), encoding="utf-8")
+            size = tmp.stat().st_size
+            replaced = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += size - replaced
+            full = self._disk_bytes is None or self._disk_bytes > self.max_bytes
+        if full:
+            self._evict()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO if total > self.max_bytes else total
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk_bytes = None
+        if self.directory is not None:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+
+_default_cache = None
+
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
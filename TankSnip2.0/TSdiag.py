@@ -0,0 +1,137 @@
+import contextlib
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+
+logger = logging.getLogger("tanksnip.diagnostics")
+
+PROFILE_LINES = 40
+
+
+class Diagnostics:
+    # Timings and counters for one run. Stage and field times accumulate, so a
+    # stage entered once per page reports its total.
+
+    def __init__(self, label=""):
+        self.label = label
+        self.stages = {}
+        self.fields = {}
+        self.counts = {}
+        self.seconds = 0.0
+        self.profile = None
+
+    def add_stage(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_field(self, name, seconds):
+        self.fields[name] = self.fields.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def slowest_fields(self, limit=5):
+        return sorted(self.fields.items(), key=lambda item: -item[1])[:limit]
+
+    def to_dict(self):
+        return {
+            "label": self.label,
+            "seconds": round(self.seconds, 6),
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stages.items()},
+            "fields_ms": {k: round(v * 1000, 3) for k, v in self.fields.items()},
+            "counts": self.counts,
+        }
+
+
+# Per thread / per Streamlit session. With nothing captured, every hook below
+# is one ContextVar lookup and an early return.
+_active = contextvars.ContextVar("tanksnip_diagnostics", default=None)
+
+
+def active():
+    return _active.get()
+
+
+@contextlib.contextmanager
+def stage(name):
+    diagnostics = _active.get()
+    if diagnostics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        diagnostics.add_stage(name, time.perf_counter() - start)
+
+
+def record(name, seconds):
+    # For stages timed elsewhere, e.g. page extraction inside worker processes.
+    diagnostics = _active.get()
+    if diagnostics is not None:
+        diagnostics.add_stage(name, seconds)
+
+
+def count(name, n=1):
+    diagnostics = _active.get()
+    if diagnostics is not None:
+        diagnostics.count(name, n)
+
+
+class FieldClock:
+    # Attributes the time since the previous lap to the named field, so
+    # straight-line extraction code only needs one call after each field.
+
+    def __init__(self, diagnostics):
+        self._diagnostics = diagnostics
+        self._last = time.perf_counter()
+
+    def lap(self, field):
+        now = time.perf_counter()
+        self._diagnostics.add_field(field, now - self._last)
+        self._last = now
+
+
+class _NullClock:
+    def lap(self, field):
+        pass
+
+
+_NULL_CLOCK = _NullClock()
+
+
+def field_clock():
+    diagnostics = _active.get()
+    return _NULL_CLOCK if diagnostics is None else FieldClock(diagnostics)
+
+
+def _profile_text(profiler):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return out.getvalue()
+
+
+@contextlib.contextmanager
+def capture(label="", profile=False, log=True):
+    # Records everything the hooks see inside the block. profile=True also
+    # runs cProfile for just this block and keeps the top of its report.
+    diagnostics = Diagnostics(label)
+    token = _active.set(diagnostics)
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield diagnostics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            diagnostics.profile = _profile_text(profiler)
+        diagnostics.seconds = time.perf_counter() - start
+        _active.reset(token)
+        if log:
+            logger.info(json.dumps(diagnostics.to_dict()))
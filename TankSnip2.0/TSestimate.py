@@ -0,0 +1,575 @@
+# TSestimate.py
+#
+# Estimate Sheet export: each tank goes into its own copy of the ESTIMATE
+# sheet of Estimate Sheet V 2.0 - Kelly.xlsx, with the header, shell plates,
+# steel lines (TSsteel), nozzle and manway lines and labor hours (TSlabor)
+# filled in. The sheet's own formulas then total and mark it up.
+#
+#   python TankSnip2.0/TSestimate.py "OTTO Checks" -o estimates  # workbook per quote
+#   python TankSnip2.0/TSestimate.py "OTTO Checks" -o all.xlsx   # sheet per tank
+#
+# The template is read once into a cell map (values, formulas, styles,
+# merges, widths, validations); each tank is then streamed out row by row
+# through a write-only workbook, so memory stays flat with the tank count.
+# PDFs that are not calc reports (no quotation number) are skipped.
+
+import argparse
+import copy
+import dataclasses
+import io
+import math
+import re
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from TSlabor import band_lookup, estimate_labor, load_workbook
+from TSlabor import load_tables as load_labor_tables
+from TSmodel import TankResult
+from TSsteel import ESTIMATE_WORKBOOK, inches_text, material_index, steel_lines
+from TSsteel import load_tables as load_steel_tables
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle
+except ImportError:
+    Workbook = WriteOnlyCell = NamedStyle = None
+
+TEMPLATE_SHEET = "ESTIMATE"
+# Cells the template must still hold, so a reworked sheet fails loudly
+# instead of being filled in the wrong places.
+LABELS = {
+    "H2": "DIAMETER",
+    "H3": "OD OR ID",
+    "H4": "HEIGHT",
+    "H7": "WIDTH",
+    "A14": "QUOTATION NO",
+    "A15": "DESCRIPTION:",
+    "A16": "ITEM",
+    "F16": "LABOR HRS",
+    "C60": "Testing",
+    "C61": "Cleaning",
+    "C62": "Handling",
+    "A77": "NOTE : ",
+}
+QUOTE_CELL = (14, 2)
+DESCRIPTION_CELL = (15, 2)
+# Inches; the SIZE and REQUIRED area formulas read these.
+DIAMETER_CELL = (2, 9)
+OD_OR_ID_CELL = (3, 9)
+HEIGHT_CELL = (4, 9)
+# The sheet's material list: SA36, SA516, 304/L, 316/L, by TSsteel.MATERIALS.
+MATERIAL_CELL = (1, 11)
+MATERIAL_CHOICES = ("SA36", "SA516", "304/L", "316/L")
+# SHELL PLATES USED: width, length, qty in H:J (K is the area formula).
+SHELL_PLATE_ROWS = range(8, 12)
+SHELL_PLATE_COLUMN = 8
+# Item lines: ITEM, QTY, DESCRIPTION, MOC, MTRL $, LABOR HRS in A:F. Lines
+# past the last row are listed in the note.
+ITEM_ROWS = range(18, 56)
+LABOR_ROWS = {"testing": 60, "cleaning": 61, "handling": 62}
+LABOR_COLUMN = 6
+NOTE_CELL = (77, 1)
+
+Item = namedtuple(
+    "Item", "item qty description material cost hours", defaults=(None, None, None)
+)
+
+STEEL_ITEMS = {
+    "rim_angle": "RIM ANGLE",
+    "shell": "SHELL",
+    "bottom": "BOTTOM",
+    "anchor_chairs": "ANCHOR CHAIRS",
+}
+LUGS = "GROUND LUG, NP & LIFT LUG"
+# Each distinct template cell style becomes a hidden named style of this name
+# and number in every workbook, so a cell takes its style in one assignment.
+STYLE_NAME = "Estimate {}"
+SHEET_TITLE_RE = re.compile(r"[\[\]:*?/\\]")
+FILE_NAME_RE = re.compile(r'[<>:"/\\|?*]')
+
+
+def _require_openpyxl():
+    if Workbook is None:
+        raise RuntimeError("Writing estimates needs openpyxl: pip install openpyxl")
+
+
+class Template:
+    # The ESTIMATE sheet as a cell map: rows[row][column] = (value, style
+    # name), with the styles by name and the sheet settings every copy
+    # repeats.
+
+    def __init__(self, sheet):
+        for coordinate, label in LABELS.items():
+            if sheet[coordinate].value != label:
+                raise ValueError(
+                    f"{TEMPLATE_SHEET}!{coordinate} is {sheet[coordinate].value!r}, "
+                    f"expected {label!r}: the Estimate Sheet layout changed"
+                )
+        self.rows = {}
+        names = {}
+        for row in sheet.iter_rows():
+            for cell in row:
+                if cell.value is None and not cell.has_style:
+                    continue
+                name = None
+                if cell.has_style:
+                    style = (
+                        copy.copy(cell.font),
+                        copy.copy(cell.fill),
+                        copy.copy(cell.border),
+                        copy.copy(cell.alignment),
+                        cell.number_format,
+                        copy.copy(cell.protection),
+                    )
+                    name = names.setdefault(style, STYLE_NAME.format(len(names) + 1))
+                self.rows.setdefault(cell.row, {})[cell.column] = (cell.value, name)
+        self.styles = {name: style for style, name in names.items()}
+        self.max_row = sheet.max_row
+        self.widths = {
+            key: dimension.width
+            for key, dimension in sheet.column_dimensions.items()
+            if dimension.width
+        }
+        self.heights = {
+            key: dimension.height
+            for key, dimension in sheet.row_dimensions.items()
+            if dimension.height
+        }
+        self.merged = [str(merged) for merged in sheet.merged_cells.ranges]
+        self.validations = list(sheet.data_validations.dataValidation)
+        self.formatting = [
+            (str(formatting.sqref), rule)
+            for formatting in sheet.conditional_formatting
+            for rule in formatting.rules
+        ]
+        # 'ESTIMATE'!$A$13:$F$93 -> A13:F93, for sheets of any title.
+        self.print_area = (
+            re.sub(r"^.*!", "", sheet.print_area).replace("$", "")
+            if sheet.print_area
+            else None
+        )
+        self.freeze_panes = sheet.freeze_panes
+        self.page_setup = copy.copy(sheet.page_setup)
+        self.page_setup_properties = copy.copy(sheet.sheet_properties.pageSetUpPr)
+        self.print_options = copy.copy(sheet.print_options)
+        self.page_margins = copy.copy(sheet.page_margins)
+
+    @classmethod
+    def load(cls, path=ESTIMATE_WORKBOOK):
+        _require_openpyxl()
+        return cls(load_workbook(path, formulas=True)[TEMPLATE_SHEET])
+
+    def add_styles(self, workbook):
+        # Registers the template's styles with a new workbook, once.
+        for name, style in self.styles.items():
+            font, fill, border, alignment, number_format, protection = style
+            workbook.add_named_style(
+                NamedStyle(
+                    name,
+                    font=copy.copy(font),
+                    fill=copy.copy(fill),
+                    border=copy.copy(border),
+                    alignment=copy.copy(alignment),
+                    number_format=number_format,
+                    protection=copy.copy(protection),
+                    hidden=True,
+                )
+            )
+
+    def write(self, workbook, title, values):
+        # values: {row: {column: value}} over the template's cells, into a
+        # workbook add_styles() has been called on. The sheet is closed once
+        # written, so nothing of it stays in memory.
+        sheet = workbook.create_sheet(title)
+        for key, width in self.widths.items():
+            sheet.column_dimensions[key].width = width
+        for key, height in self.heights.items():
+            sheet.row_dimensions[key].height = height
+        for merged in self.merged:
+            sheet.merged_cells.add(merged)
+        for validation in self.validations:
+            sheet.data_validations.append(validation)
+        for sqref, rule in self.formatting:
+            sheet.conditional_formatting.add(sqref, rule)
+        if self.print_area:
+            sheet.print_area = self.print_area
+        sheet.freeze_panes = self.freeze_panes
+        sheet.page_setup = self.page_setup
+        sheet.sheet_properties.pageSetUpPr = self.page_setup_properties
+        sheet.print_options = self.print_options
+        sheet.page_margins = self.page_margins
+
+        for row in range(1, max(self.max_row, *values, 0) + 1):
+            cells = self.rows.get(row, {})
+            filled = values.get(row, {})
+            line = []
+            for column in range(1, max([*cells, *filled], default=0) + 1):
+                value, style = cells.get(column, (None, None))
+                value = filled.get(column, value)
+                if style is None:
+                    line.append(value)
+                    continue
+                cell = WriteOnlyCell(sheet, value)
+                cell.style = style
+                line.append(cell)
+            sheet.append(line)
+        sheet.close()
+
+
+_template = None
+
+
+def load_template():
+    global _template
+    if _template is None:
+        _template = Template.load()
+    return _template
+
+
+def _groups(parts):
+    # {key: [parts]} in order of size, for one line group per key.
+    groups = {}
+    for part in parts:
+        if part.size_in is not None:
+            groups.setdefault((part.size_in, part.type or ""), []).append(part)
+    return dict(sorted(groups.items()))
+
+
+def _plate_in(value, steel_tables):
+    # A repad or neck thickness as bought: the next listed plate thickness.
+    listed = steel_tables.plate_thickness_in
+    return float(listed[band_lookup(listed, value)])
+
+
+def _nozzle_items(group, hours, steel_tables):
+    size = f'{group[0].size_in:g}"'
+    qty = sum(nozzle.qty or 1 for nozzle in group)
+    items = []
+    repads = [nozzle for nozzle in group if nozzle.repad_required]
+    if repads:
+        repad = repads[0]
+        description = None
+        if repad.repad_thickness_in and repad.repad_od_in:
+            description = (
+                f"{inches_text(_plate_in(repad.repad_thickness_in, steel_tables))}"
+                f' X {repad.repad_od_in:g}" DIA'
+            )
+        items.append(Item("REPAD", sum(n.qty or 1 for n in repads), description))
+    items.append(Item("FLANGE", qty, f"{size} 150# {group[0].type or 'RFSO'}"))
+    schedules = sorted({nozzle.schedule for nozzle in group if nozzle.schedule})
+    pipe = f"{size} SCH {' / '.join(schedules)}" if schedules else None
+    items.append(Item("PIPE", qty, pipe))
+    blinds = sum(nozzle.with_blind or 0 for nozzle in group)
+    if blinds:
+        items.append(Item("BLIND FLANGE", blinds, f"{size} 150# BLIND"))
+    # The group's hours go on its first line, "-" on the rest, as estimated.
+    return [items[0]._replace(hours=hours)] + [
+        item._replace(hours="-") for item in items[1:]
+    ]
+
+
+def _manway_items(group, hours, material, steel_tables):
+    size = group[0].size_in
+    neck = group[0].neck_thickness_in
+    description = None
+    if neck:
+        description = (
+            f"{inches_text(_plate_in(neck, steel_tables))}"
+            f' X 12" X {math.ceil(math.pi * size)}"'
+        )
+    return [
+        Item(
+            f'{size:g}" MW NECK',
+            sum(manway.qty or 1 for manway in group),
+            description,
+            material,
+            None,
+            hours,
+        )
+    ]
+
+
+def _steel_items(lines, labels, labor):
+    # The first line of a component carries its label and hours, the rest "-".
+    items = []
+    for index, line in enumerate(lines):
+        first = index == 0 or lines[index - 1].component != line.component
+        items.append(
+            Item(
+                labels[line.component] if first else None,
+                line.qty,
+                line.description,
+                line.material,
+                line.cost,
+                float(labor[line.component]) if first else "-",
+            )
+        )
+    return items
+
+
+def estimate_items(results, lines, labor_tables, steel_tables):
+    # One list of Items per tank, in the Estimate Sheet's order: roof, rim
+    # angle, shell, bottom, lugs and chairs, then nozzles and manways by size.
+    # lines: each tank's steel_lines(). Also returns the tanks' labor hours.
+    nozzles = [_groups(result.nozzles) for result in results]
+    manways = [_groups(result.manways) for result in results]
+    # One labor pass over the tanks and, for the hours on each nozzle and
+    # manway line, a copy of the tank with only that group.
+    parts = [
+        dataclasses.replace(result, nozzles=group, manways=[])
+        for result, groups in zip(results, nozzles)
+        for group in groups.values()
+    ] + [
+        dataclasses.replace(result, nozzles=[], manways=group)
+        for result, groups in zip(results, manways)
+        for group in groups.values()
+    ]
+    hours = estimate_labor([*results, *parts], labor_tables)
+    # A copy has nozzles or manways, not both, so its hours are their sum.
+    part_hours = iter((hours["nozzles"] + hours["manways"])[len(results) :].tolist())
+    nozzle_hours = [[next(part_hours) for _ in groups] for groups in nozzles]
+    manway_hours = [[next(part_hours) for _ in groups] for groups in manways]
+
+    items = []
+    for index, (result, tank_lines) in enumerate(zip(results, lines)):
+        material = tank_lines[0].material if tank_lines else result.shell_material
+        roof = "CONE TOP" if "CON" in (result.roof_type or "").upper() else "FLAT TOP"
+        labels = {**STEEL_ITEMS, "roof": roof}
+        labor = {
+            name: hours[name][index] for name in ("roof", "rim_angle", "shell", "bottom")
+        }
+        # The lugs and nameplate line carries the fittings hours the chair
+        # line does not.
+        chairs = [line for line in tank_lines if line.component == "anchor_chairs"]
+        count = result.anchor_chair_quantity or result.anchors_quantity or 0
+        labor["anchor_chairs"] = labor_tables.anchor_chair_hours * count
+        lugs = float(hours["fittings"][index]) - (
+            labor["anchor_chairs"] if chairs else 0.0
+        )
+        tank = _steel_items(tank_lines[: len(tank_lines) - len(chairs)], labels, labor)
+        tank.append(Item(LUGS, 1, "Savannah Tank Standard", material, None, lugs))
+        tank.extend(_steel_items(chairs, labels, labor))
+        for group, group_hours in zip(nozzles[index].values(), nozzle_hours[index]):
+            tank.extend(_nozzle_items(group, group_hours, steel_tables))
+        for group, group_hours in zip(manways[index].values(), manway_hours[index]):
+            tank.extend(_manway_items(group, group_hours, material, steel_tables))
+        items.append(tank)
+    return items, hours
+
+
+def _number(value):
+    # NaN (unsized) leaves the cell blank; hours and dollars are rounded as
+    # the estimators enter them.
+    if not isinstance(value, float):
+        return value
+    return None if math.isnan(value) else round(value, 2)
+
+
+def estimate_values(results, labor_tables=None, steel_tables=None):
+    # One {row: {column: value}} per tank: what it writes over the template.
+    labor_tables = labor_tables or load_labor_tables()
+    steel_tables = steel_tables or load_steel_tables()
+    lines = [steel_lines(result, steel_tables) for result in results]
+    items, hours = estimate_items(results, lines, labor_tables, steel_tables)
+    values = []
+    for index, (result, tank) in enumerate(zip(results, items)):
+        cells = {}
+
+        def put(row, column, value):
+            cells.setdefault(row, {})[column] = _number(value)
+
+        quote = result.quotation_no or ""
+        put(*QUOTE_CELL, int(quote[1:]) if re.fullmatch(r"Q\d+", quote) else quote)
+        put(*DESCRIPTION_CELL, result.project_id)
+        if result.outside_diameter_ft:
+            diameter, od_or_id = result.outside_diameter_ft, "OD"
+        elif result.inside_diameter_ft:
+            diameter, od_or_id = result.inside_diameter_ft, "ID"
+        else:
+            diameter, od_or_id = result.tank_diameter_ft, None
+        if diameter:
+            put(*DIAMETER_CELL, round(diameter * 12, 3))
+            put(*OD_OR_ID_CELL, od_or_id)
+        if result.shell_height_ft:
+            put(*HEIGHT_CELL, round(result.shell_height_ft * 12, 3))
+        material = material_index(result.shell_material or "")
+        if material >= 0:
+            put(*MATERIAL_CELL, MATERIAL_CHOICES[material])
+
+        shell = [line for line in lines[index] if line.component == "shell"]
+        for row, line in zip(SHELL_PLATE_ROWS, shell):
+            put(row, SHELL_PLATE_COLUMN, line.width_in)
+            put(row, SHELL_PLATE_COLUMN + 1, line.length_in)
+            put(row, SHELL_PLATE_COLUMN + 2, line.qty)
+
+        for row, item in zip(ITEM_ROWS, tank):
+            for column, value in enumerate(item, start=1):
+                put(row, column, value)
+        left = tank[len(ITEM_ROWS) :]
+        if left:
+            put(
+                *NOTE_CELL,
+                f"{LABELS['A77']}{len(left)} more lines: "
+                + "; ".join(
+                    " ".join(str(v) for v in (i.item, i.qty, i.description) if v)
+                    for i in left
+                ),
+            )
+        for name, row in LABOR_ROWS.items():
+            put(row, LABOR_COLUMN, float(hours[name][index]))
+        values.append(cells)
+    return values
+
+
+def tank_name(result):
+    return result.quotation_no or Path(result.file_name).stem or "tank"
+
+
+def is_calc_report(result):
+    # Drawings, transcripts and other PDFs in a quote folder have no
+    # quotation number and get no estimate.
+    return bool(result.quotation_no)
+
+
+def sheet_title(name, used):
+    # Excel sheet titles: 31 characters, none of []:*?/\, unique per workbook.
+    base = SHEET_TITLE_RE.sub("-", name).strip("'")[:31] or "tank"
+    title, copy_no = base, 1
+    while title.lower() in used:
+        copy_no += 1
+        suffix = f" ({copy_no})"
+        title = base[: 31 - len(suffix)] + suffix
+    used.add(title.lower())
+    return title
+
+
+class EstimateBook:
+    # A write-only workbook of estimate sheets, one per add().
+
+    def __init__(self, template=None):
+        _require_openpyxl()
+        self.template = template or load_template()
+        self.workbook = Workbook(write_only=True)
+        self.template.add_styles(self.workbook)
+        self.titles = set()
+
+    def add(self, name, values):
+        title = sheet_title(name, self.titles)
+        self.template.write(self.workbook, title, values)
+
+    def save(self, target):
+        self.workbook.save(target)
+
+
+class EstimateWriter:
+    # Streams tanks into estimates as they finish; tanks that are not from a
+    # calc report are counted in skipped. A path ending in .xlsx is one
+    # workbook with a sheet per tank, saved on close(). Any other path is a
+    # folder of workbooks, one per quote: a quote's tanks can finish in any
+    # order, so only their value maps are kept and each workbook is written
+    # once, on close().
+
+    def __init__(self, path):
+        _require_openpyxl()
+        self.path = Path(path)
+        self.template = load_template()
+        self.book = None
+        if self.path.suffix.lower() == ".xlsx":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.book = EstimateBook(self.template)
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self.quotes = {}
+        self.written = 0
+        self.skipped = 0
+
+    def write(self, result, values=None):
+        # False when the tank is skipped.
+        if not is_calc_report(result):
+            self.skipped += 1
+            return False
+        if values is None:
+            values = estimate_values([result])[0]
+        name = tank_name(result)
+        if self.book is not None:
+            self.book.add(name, values)
+        else:
+            self.quotes.setdefault(name, []).append(values)
+        self.written += 1
+        return True
+
+    def close(self):
+        if self.book is not None:
+            self.book.save(self.path)
+            self.book = None
+        for name, sheets in self.quotes.items():
+            book = EstimateBook(self.template)
+            for values in sheets:
+                book.add(name, values)
+            file_name = FILE_NAME_RE.sub("-", name).strip(". ") or "tank"
+            book.save(self.path / f"{file_name}.xlsx")
+        self.quotes = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_estimates(results, path):
+    # results: TankResults. Writes them as EstimateWriter does.
+    results = [result for result in results if is_calc_report(result)]
+    with EstimateWriter(path) as writer:
+        for result, values in zip(results, estimate_values(results)):
+            writer.write(result, values)
+    return writer.written
+
+
+def estimate_workbook(results):
+    # One workbook, a sheet per calc report, as .xlsx bytes (for downloads).
+    results = [result for result in results if is_calc_report(result)]
+    book = EstimateBook()
+    for result, values in zip(results, estimate_values(results)):
+        book.add(tank_name(result), values)
+    buffer = io.BytesIO()
+    book.save(buffer)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Fill the Estimate Sheet for each calc report"
+    )
+    parser.add_argument("paths", nargs="+", help="PDFs, folders or globs")
+    parser.add_argument(
+        "-o",
+        "--out",
+        default="estimates",
+        help="a folder (a workbook per quote) or a .xlsx file (a sheet per tank)",
+    )
+    args = parser.parse_args(argv)
+
+    from TSbatch import find_pdfs
+    from TSpipeline import process_pdf
+
+    start = time.perf_counter()
+    with EstimateWriter(args.out) as writer:
+        for path in find_pdfs(args.paths):
+            result = TankResult.from_report(process_pdf(path.read_bytes()), path.name)
+            if writer.write(result):
+                print(f"{path.name}: {tank_name(result)}")
+            else:
+                print(f"{path.name}: skipped, no quotation number")
+    print(
+        f"{writer.written} estimates -> {args.out} "
+        f"({writer.skipped} skipped) in {time.perf_counter() - start:.1f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,527 @@
+# TSlabor.py
+#
+# Labor hours for extracted tanks, from the estimating workbooks shipped with
+# the repo: API_650_Labor_Hours.xlsx (shell rolling, top/bottom/rim angle,
+# nozzles, fittings), Manway options.xlsx (manway fittings) and Bottom
+# items.xlsx (testing, handling, cleaning).
+#
+#   python TankSnip2.0/TSlabor.py --build        # recompile labor_tables.json
+#   python TankSnip2.0/TSlabor.py --check        # is it current with the xlsx?
+#   python TankSnip2.0/TSlabor.py "OTTO Checks"  # hours for each report
+#
+# --build reads the workbooks once (openpyxl) into labor_tables.json, the
+# lookup tables as plain arrays; estimate_labor() only loads that file, and
+# prices a whole batch of tanks with array lookups.
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from TSmodel import TankResult
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+ROOT = Path(__file__).resolve().parent.parent
+LABOR_WORKBOOK = ROOT / "API_650_Labor_Hours.xlsx"
+MANWAY_WORKBOOK = ROOT / "Manway options.xlsx"
+BOTTOM_ITEMS_WORKBOOK = ROOT / "Bottom items.xlsx"
+SOURCES = (LABOR_WORKBOOK, MANWAY_WORKBOOK, BOTTOM_ITEMS_WORKBOOK)
+TABLES_FILE = Path(__file__).resolve().parent / "labor_tables.json"
+
+# Worksheet cells the tables are read from. Each sheet's rows run down from
+# the first row for as long as column B holds a diameter band.
+SHELL_SHEETS = {"carbon": "LABOR- SHELL ROLL, CS", "stainless": "LABOR- SHELL ROLL, SS"}
+SHELL_FIRST_ROW = 5
+# TOT column of each thickness block; the block's thickness is in row 3.
+SHELL_TOTAL_COLUMNS = ("J", "P", "V", "AB")
+TOP_BOTTOM_SHEET = "LABOR- API TOP_BTM_RIM ANGLE "
+TOP_BOTTOM_FIRST_ROW = 6
+TOP_BOTTOM_COLUMNS = {
+    "bottom": "H",
+    "sloped_bottom": "J",
+    "rim_angle": "O",
+    "flat_top": "V",
+    "cone_top": "W",
+}
+NOZZLE_SHEET = "LABOR- NOZZLE "
+# The adder in =IF(D3="Yes","3","0") (repad, blind).
+YES_RE = r'"Yes","([\d.]+)"'
+NOZZLE_ROWS = range(3, 17)
+TANK_SHEET = "TANK DESIGN, API"
+
+STAINLESS_RE = re.compile(r"A240|\b30[49]|\b316|\b2205|\bSS\b", re.IGNORECASE)
+# Shell courses assumed for a tank with only its height: 8 ft plates.
+DEFAULT_COURSE_WIDTH_IN = 96.0
+COMPONENTS = (
+    "shell",
+    "bottom",
+    "roof",
+    "rim_angle",
+    "nozzles",
+    "manways",
+    "fittings",
+    "testing",
+    "handling",
+    "cleaning",
+)
+
+
+def _require_openpyxl():
+    if openpyxl is None:
+        raise ImportError(
+            "Compiling the labor tables needs openpyxl: pip install openpyxl"
+        )
+
+
+def band_upper(text):
+    # Band label -> its upper bound: 'FROM 31" TO 36"' -> 36.
+    return float(re.findall(r"\d+", str(text))[-1])
+
+
+def _fraction(text):
+    # The last fraction written in text: '3/16" to 5/16"' -> 0.3125.
+    numerator, denominator = re.findall(r"(\d+)/(\d+)", text)[-1]
+    return int(numerator) / int(denominator)
+
+
+def _formula_number(formula, pattern):
+    # A constant out of a cell formula, e.g. the 4 in =IF(D3="Yes","4","0").
+    text = getattr(formula, "text", formula)
+    if isinstance(text, (int, float)):
+        return float(text)
+    found = re.search(pattern, str(text))
+    if found is None:
+        raise ValueError(f"no match for {pattern!r} in {text!r}")
+    return float(found.group(1))
+
+
+def band_rows(sheet, first):
+    rows = []
+    while sheet[f"B{first + len(rows)}"].value:
+        rows.append(first + len(rows))
+    return rows
+
+
+def _shell_tables(workbook):
+    upper = thickness = None
+    hours = []
+    for name in SHELL_SHEETS.values():
+        sheet = workbook[name]
+        rows = band_rows(sheet, SHELL_FIRST_ROW)
+        bands = [band_upper(sheet[f"B{row}"].value) for row in rows]
+        if upper is not None and bands != upper:
+            raise ValueError(f"{name}: diameter bands differ from the other sheet")
+        upper = bands
+        # A block's heading sits over its first column, four left of TOT.
+        headings = [
+            sheet.cell(3, sheet[f"{column}3"].column - 4).value
+            for column in SHELL_TOTAL_COLUMNS
+        ]
+        groups = [_fraction(heading) for heading in headings]
+        if thickness is not None and groups != thickness:
+            raise ValueError(f"{name}: thickness blocks differ from the other sheet")
+        thickness = groups
+        hours.append(
+            [[sheet[f"{c}{row}"].value for c in SHELL_TOTAL_COLUMNS] for row in rows]
+        )
+    return {
+        "shell_upper_in": upper,
+        "shell_thickness_in": thickness,
+        # [carbon, stainless][band][thickness block]
+        "shell_hours": hours,
+    }
+
+
+def _top_bottom_tables(workbook):
+    sheet = workbook[TOP_BOTTOM_SHEET]
+    rows = band_rows(sheet, TOP_BOTTOM_FIRST_ROW)
+    tables = {
+        "top_bottom_upper_in": [band_upper(sheet[f"B{row}"].value) for row in rows]
+    }
+    for name, column in TOP_BOTTOM_COLUMNS.items():
+        tables[name] = [sheet[f"{column}{row}"].value for row in rows]
+    return tables
+
+
+def _nozzle_tables(workbook):
+    # Hours per nozzle come from nested IFs on the tank wall thickness, one
+    # per size row: =IF(C3=0,"0",IF(C3="5/16","3",...,"3")). The last value
+    # is for any thickness not listed (3/16" and 1/4").
+    sheet = workbook[NOZZLE_SHEET]
+    sizes, hours, repads, blinds = [], [], [], []
+    walls = None
+    for row in NOZZLE_ROWS:
+        formula = sheet[f"K{row}"].value
+        pairs = re.findall(r'="([\d/]+)","([\d.]+)"', formula)
+        listed = [_fraction(wall) for wall, _ in pairs]
+        if walls is not None and listed != walls:
+            raise ValueError(f"{NOZZLE_SHEET}: row {row} lists other thicknesses")
+        walls = listed
+        default = _formula_number(formula, r',"([\d.]+)"\)+$')
+        sizes.append(band_upper(sheet[f"A{row}"].value))
+        hours.append([default] + [float(value) for _, value in pairs])
+        repads.append(_formula_number(sheet[f"L{row}"].value, YES_RE))
+        blinds.append(_formula_number(sheet[f"N{row}"].value, YES_RE))
+    return {
+        "nozzle_size_in": sizes,
+        # Upper bound of each hours column; thicknesses go in sixteenths, so
+        # the unlisted ones end a sixteenth below the first listed.
+        "nozzle_wall_in": [walls[0] - 1 / 16] + walls,
+        "nozzle_hours": hours,
+        "nozzle_repad_hours": repads,
+        "nozzle_blind_hours": blinds,
+    }
+
+
+def _tank_fittings(workbook):
+    # Per tank: ground lug & nameplate, lift lug (standard quantities); per
+    # anchor chair: the chair hours.
+    sheet = workbook[TANK_SHEET]
+    rows = {sheet[f"A{row}"].value: row for row in range(1, sheet.max_row + 1)}
+    per_tank = 0.0
+    for item in ("GROUND LUG & NP", "LIFT LUG"):
+        row = rows[item]
+        per_tank += sheet[f"B{row}"].value * _formula_number(
+            sheet[f"F{row}"].value, r"\*([\d.]+)$"
+        )
+    chair = _formula_number(sheet[f"F{rows['ANCHOR CHAIRS']}"].value, r"\*([\d.]+)$")
+    return {"fittings_per_tank": per_tank, "anchor_chair_hours": chair}
+
+
+def _manway_fittings(workbook):
+    # The first (API style) section of the ESTIMATE sheet: each manway size's
+    # labor lines, e.g. davit arm =B6*4 and bolting =B7*2. The neck is
+    # labored as a nozzle of the same size.
+    sheet = workbook["ESTIMATE"]
+    hours = {}
+    size = None
+    for row in range(3, sheet.max_row + 1):
+        item = sheet[f"A{row}"].value
+        if item and sheet[f"B{row}"].value is None:
+            break
+        neck = re.match(r'(\d+)" MW NECK', item or "")
+        if neck:
+            size = float(neck.group(1))
+            hours[size] = 0.0
+        labor = sheet[f"F{row}"].value
+        if size is not None and isinstance(labor, str) and labor.startswith("="):
+            hours[size] += _formula_number(labor, r"\*([\d.]+)$")
+    return {"manway_size_in": list(hours), "manway_fitting_hours": list(hours.values())}
+
+
+def _bottom_items(workbook):
+    # Tank size classes by diameter (in), then hours per class.
+    handling = workbook["Handling"]
+    small_below = _formula_number(handling["C4"].value, r"<(\d+)")
+    large_above = _formula_number(handling["E4"].value, r">(\d+)")
+    # Detail, test and load; the painted / ship loose / platform answers are
+    # not in the calc report.
+    handling_hours = [
+        sum(
+            _formula_number(handling[f"{column}{row}"].value, r'"YES",([\d.]+)')
+            for column in "GHK"
+        )
+        for row in (5, 6, 7)
+    ]
+    testing = workbook["Testing"]
+    testing_hours = [
+        _formula_number(testing[f"L{row}"].value, r'"HYDRO",([\d.]+)')
+        for row in (5, 6, 7)
+    ]
+    mill_scale = _formula_number(
+        workbook["Bottom list items"]["J5"].value, r"(\d+) hours per shell course"
+    )
+    # =IFS(B5<100, 8, AND(B5>100,B5<200.1), 12, B5>200, 0.465 * (B5^0.649))
+    cleaning = getattr(workbook["Cleaning"]["C5"].value, "text", "")
+    constants = re.sub(r"\$?[A-Z]+\$?\d+", "", cleaning)
+    numbers = [float(n) for n in re.findall(r"\d+\.?\d*", constants)]
+    if len(numbers) != 8:
+        raise ValueError(f"unexpected cleaning formula {cleaning!r}")
+    return {
+        "size_class_in": [small_below, large_above],
+        "handling_hours": handling_hours,
+        "testing_hours": testing_hours,
+        "mill_scale_hours": mill_scale,
+        # Surface area (sq ft) limits and hours, then a * area ** b above them.
+        "cleaning_steps": [[numbers[0], numbers[1]], [numbers[3], numbers[4]]],
+        "cleaning_power": [numbers[6], numbers[7]],
+    }
+
+
+def load_workbook(path, formulas):
+    with warnings.catch_warnings():
+        # Manway options.xlsx has a page header openpyxl cannot parse.
+        warnings.simplefilter("ignore", UserWarning)
+        return openpyxl.load_workbook(path, data_only=not formulas)
+
+
+def source_hashes():
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in SOURCES
+    }
+
+
+def compile_tables():
+    _require_openpyxl()
+    values = load_workbook(LABOR_WORKBOOK, formulas=False)
+    formulas = load_workbook(LABOR_WORKBOOK, formulas=True)
+    return {
+        "sources": source_hashes(),
+        **_shell_tables(values),
+        **_top_bottom_tables(values),
+        **_nozzle_tables(formulas),
+        **_tank_fittings(formulas),
+        **_manway_fittings(load_workbook(MANWAY_WORKBOOK, formulas=True)),
+        **_bottom_items(load_workbook(BOTTOM_ITEMS_WORKBOOK, formulas=True)),
+    }
+
+
+def build(path=TABLES_FILE):
+    # One table per line, so a change in a workbook reads as a small diff.
+    tables = compile_tables()
+    lines = [f"{json.dumps(key)}: {json.dumps(value)}" for key, value in tables.items()]
+    Path(path).write_text("{\n" + ",\n".join(lines) + "\n}\n", encoding="utf-8")
+    return tables
+
+
+class LaborTables:
+    # labor_tables.json as arrays, ready for lookups.
+
+    def __init__(self, tables):
+        self.sources = tables["sources"]
+        for name, value in tables.items():
+            if name != "sources":
+                setattr(self, name, np.asarray(value, dtype=float))
+
+    @classmethod
+    def load(cls, path=TABLES_FILE):
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+_tables = None
+
+
+def load_tables():
+    global _tables
+    if _tables is None:
+        _tables = LaborTables.load()
+    return _tables
+
+
+def stale_sources(tables=None):
+    # Names of the workbooks changed since labor_tables.json was built.
+    built = (tables or load_tables()).sources
+    return [
+        name for name, digest in source_hashes().items() if built.get(name) != digest
+    ]
+
+
+def band_lookup(upper, values):
+    # Index of the band each value falls in (bands are "up to" their upper
+    # bound); values past the last band take the last.
+    return np.minimum(np.searchsorted(upper, values), len(upper) - 1)
+
+
+def _course_thicknesses(result):
+    # Course 1 first; courses with no thickness read 0 (the thinnest block).
+    if result.shell_course_thickness_in:
+        return [t or 0.0 for t in result.shell_course_thickness_in]
+    courses = len(result.shell_widths_in) or result.shell_courses or 0
+    if not courses and result.shell_height_ft:
+        courses = math.ceil(result.shell_height_ft * 12 / DEFAULT_COURSE_WIDTH_IN)
+    return [0.0] * courses
+
+
+def _or_nan(value):
+    return np.nan if value is None else value
+
+
+def estimate_labor(results, tables=None):
+    # results: TankResults. {component: hours per tank}, plus "total". A tank
+    # without a diameter gets NaN for everything sized by diameter.
+    tables = tables or load_tables()
+    n = len(results)
+    diameter_in = 12 * np.array(
+        [_or_nan(r.outside_diameter_ft or r.tank_diameter_ft) for r in results],
+        dtype=float,
+    )
+    height_ft = np.array([_or_nan(r.shell_height_ft) for r in results], dtype=float)
+    stainless = np.array(
+        [bool(STAINLESS_RE.search(r.shell_material or "")) for r in results], dtype=bool
+    )
+    cone = np.array(["CON" in (r.roof_type or "").upper() for r in results], dtype=bool)
+    known = ~np.isnan(diameter_in)
+    # The bands are in whole inches, so 120.4" falls in the 115" to 120" one.
+    diameter = np.where(known, np.round(diameter_in), 0.0)
+
+    courses = [_course_thicknesses(r) for r in results]
+    thickness = np.zeros((n, max(map(len, courses), default=0) or 1))
+    present = np.zeros(thickness.shape, dtype=bool)
+    for row, values in enumerate(courses):
+        thickness[row, : len(values)] = values
+        present[row, : len(values)] = True
+    wall = thickness.max(axis=1)
+
+    hours = {}
+    band = band_lookup(tables.shell_upper_in, diameter)
+    block = band_lookup(tables.shell_thickness_in, thickness)
+    material = stainless.astype(int)[:, None]
+    per_course = tables.shell_hours[material, band[:, None], block]
+    hours["shell"] = np.where(present, per_course, 0.0).sum(axis=1)
+
+    band = band_lookup(tables.top_bottom_upper_in, diameter)
+    hours["bottom"] = tables.bottom[band]
+    hours["roof"] = np.where(cone, tables.cone_top[band], tables.flat_top[band])
+    hours["rim_angle"] = tables.rim_angle[band]
+
+    wall_column = band_lookup(tables.nozzle_wall_in, wall)
+    hours["nozzles"] = _nozzle_hours(
+        tables,
+        n,
+        wall_column,
+        [
+            (
+                tank,
+                nozzle.qty or 1,
+                nozzle.size_in,
+                nozzle.with_blind or 0,
+                nozzle.repad_required,
+            )
+            for tank, result in enumerate(results)
+            for nozzle in result.nozzles
+        ],
+    )
+    # A manway's neck is labored as a nozzle, then its davit and bolting.
+    manways = [
+        (tank, manway.qty or 1, manway.size_in, manway.repad_required)
+        for tank, result in enumerate(results)
+        for manway in result.manways
+        if manway.size_in is not None
+    ]
+    hours["manways"] = _nozzle_hours(
+        tables, n, wall_column, [(t, q, s, 0, r) for t, q, s, r in manways]
+    )
+    if manways:
+        tank, qty, size, _ = (np.array(column) for column in zip(*manways))
+        fitting = tables.manway_fitting_hours[band_lookup(tables.manway_size_in, size)]
+        hours["manways"] += np.bincount(
+            tank.astype(int), weights=qty * fitting, minlength=n
+        )
+
+    chairs = np.array(
+        [r.anchor_chair_quantity or r.anchors_quantity or 0 for r in results],
+        dtype=float,
+    )
+    hours["fittings"] = tables.fittings_per_tank + tables.anchor_chair_hours * chairs
+
+    small_below, large_above = tables.size_class_in
+    size_class = (diameter >= small_below).astype(int) + (diameter > large_above)
+    hours["testing"] = tables.testing_hours[size_class]
+    hours["handling"] = tables.handling_hours[size_class]
+
+    # Carbon steel gets mill scale cleaning by the course; stainless is
+    # cleaned by surface area (shell, top and bottom, sq ft).
+    diameter_ft = diameter / 12
+    area = np.pi * diameter_ft * height_ft + np.pi * diameter_ft**2 / 2
+    (small, small_hours), (medium, medium_hours) = tables.cleaning_steps
+    scale, power = tables.cleaning_power
+    by_area = np.select(
+        [area < small, area < medium],
+        [small_hours, medium_hours],
+        scale * np.power(area, power, where=area > 0, out=np.zeros(n)),
+    )
+    by_area[np.isnan(area)] = np.nan
+    hours["cleaning"] = np.where(
+        stainless, by_area, tables.mill_scale_hours * present.sum(axis=1)
+    )
+
+    sized = ("shell", "bottom", "roof", "rim_angle", "testing", "handling", "cleaning")
+    for name in sized:
+        hours[name] = np.where(known, hours[name], np.nan)
+    hours["total"] = sum(hours[name] for name in COMPONENTS)
+    return hours
+
+
+def _nozzle_hours(tables, n, wall_column, nozzles):
+    # nozzles: (tank, qty, size in, blinds, repad) rows; sizes between the
+    # listed ones take the next size up. Nozzles with no size are skipped.
+    nozzles = [row for row in nozzles if row[2] is not None]
+    if not nozzles:
+        return np.zeros(n)
+    tank, qty, size, blinds, repad = (np.array(column) for column in zip(*nozzles))
+    tank = tank.astype(int)
+    row = band_lookup(tables.nozzle_size_in, size.astype(float))
+    each = tables.nozzle_hours[row, wall_column[tank]]
+    each = each + repad.astype(bool) * tables.nozzle_repad_hours[row]
+    hours = qty * each + blinds * tables.nozzle_blind_hours[row]
+    return np.bincount(tank, weights=hours, minlength=n)
+
+
+def labor_rows(results, tables=None):
+    # One {component: hours} dict per tank, for tables and CSV.
+    hours = estimate_labor(results, tables)
+    return [
+        {name: float(values[index]) for name, values in hours.items()}
+        for index in range(len(results))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Labor hours from the calc reports")
+    parser.add_argument("pdfs", nargs="*", help="calc report PDFs or directories")
+    parser.add_argument(
+        "--build", action="store_true", help=f"recompile {TABLES_FILE.name}"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 if the workbooks changed"
+    )
+    args = parser.parse_args(argv)
+
+    if args.build:
+        start = time.perf_counter()
+        build()
+        print(f"wrote {TABLES_FILE} in {time.perf_counter() - start:.2f}s")
+    if args.check:
+        stale = stale_sources()
+        if stale:
+            print(f"out of date with {', '.join(stale)}; run --build")
+            return 1
+        print(f"{TABLES_FILE.name} is current")
+    if not args.pdfs:
+        return 0
+
+    from TSbatch import find_pdfs
+    from TSpipeline import process_pdf
+
+    paths = find_pdfs(args.pdfs)
+    results = [
+        TankResult.from_report(process_pdf(path.read_bytes()), path.name)
+        for path in paths
+    ]
+    start = time.perf_counter()
+    rows = labor_rows(results)
+    seconds = time.perf_counter() - start
+    columns = (*COMPONENTS, "total")
+    print(f"{'file':<34}" + "".join(f"{name[:9]:>10}" for name in columns))
+    for result, row in zip(results, rows):
+        print(
+            f"{result.file_name[:33]:<34}"
+            + "".join(f"{row[name]:>10.1f}" for name in columns)
+        )
+    print(f"estimated {len(rows)} tanks in {seconds * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import re
+import typing
+from dataclasses import dataclass, field, fields
+
+from TSrules import NOT_FOUND, TIMEOUT
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# A number and the unit written after it, longest unit names first so "inh2o"
+# is not read as "in".
+QUANTITY_RE = re.compile(
+    r"(-?\d+(?:\.\d+)?)\s*"
+    r"(inh2o|km/h|kpa|psi|psf|mph|mm|in|ft|[º°]?[FC]\b|m\b|\"|')?",
+    re.IGNORECASE,
+)
+SHELL_COURSE_RE = re.compile(r"^Shell Course (\d+) Thickness$")
+
+# Factors to the unit each typed field is stored in. A bare number is taken
+# to already be in that unit.
+UNITS = {
+    "in": {"in": 1.0, '"': 1.0, "mm": 1 / 25.4, "ft": 12.0},
+    "ft": {"ft": 1.0, "'": 1.0, "m": 3.28084, "in": 1 / 12},
+    "psi": {"psi": 1.0, "inh2o": 0.0361273, "kpa": 0.145038},
+    "psf": {"psf": 1.0, "kpa": 20.8854},
+    "mph": {"mph": 1.0, "km/h": 0.621371},
+    "F": {"f": 1.0, "c": None},
+}
+
+
+def quantity(value, unit=""):
+    # The first number in value whose unit converts to `unit`, as a float;
+    # None when missing. unit="" takes the first number as it is.
+    if value is None or value in (NOT_FOUND, TIMEOUT):
+        return None
+    for match in QUANTITY_RE.finditer(value):
+        number = float(match.group(1))
+        written = (match.group(2) or "").lower().lstrip("º°")
+        if not unit or not written:
+            return number
+        factor = UNITS[unit].get(written, 0)
+        if factor is None:
+            return number * 9 / 5 + 32
+        if factor:
+            return number * factor
+    return None
+
+
+def quantities(value, unit=""):
+    # "24, 36" -> [24.0, 36.0]; missing -> [].
+    if value is None or value in (NOT_FOUND, TIMEOUT):
+        return []
+    return [quantity(part, unit) for part in value.split(",") if part.strip()]
+
+
+def count(value):
+    number = quantity(value)
+    return None if number is None else int(number)
+
+
+def text(value):
+    return None if value in (None, "", NOT_FOUND, TIMEOUT) else value
+
+
+def _yes(value):
+    return value == "Yes"
+
+
+@dataclass(slots=True)
+class Nozzle:
+    qty: int
+    size_in: float | None
+    schedule: str | None
+    type: str | None
+    with_blind: int
+    repad_required: bool
+    repad_od_in: float | None
+    repad_thickness_in: float | None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            qty=row["QTY"],
+            size_in=quantity(row["Size"], "in"),
+            schedule=text(row["SCH"]),
+            type=text(row["Type"]),
+            with_blind=row["With Blind"],
+            repad_required=_yes(row["Repad Required"]),
+            repad_od_in=quantity(row["Repad OD (in)"], "in"),
+            repad_thickness_in=quantity(row["Repad Thickness (in)"], "in"),
+        )
+
+
+@dataclass(slots=True)
+class Manway:
+    qty: int
+    size_in: float | None
+    neck_thickness_in: float | None
+    type: str | None
+    repad_required: bool
+    repad_od_in: float | None
+    repad_thickness_in: float | None
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            qty=row["QTY"],
+            size_in=quantity(row["Size"], "in"),
+            neck_thickness_in=quantity(row["Neck Thickness (in)"], "in"),
+            type=text(row["Type"]),
+            repad_required=_yes(row["Repad Required"]),
+            repad_od_in=quantity(row["Repad OD (in)"], "in"),
+            repad_thickness_in=quantity(row["Repad Thickness (in)"], "in"),
+        )
+
+
+# attribute: (spec field, parser). Attribute names carry the unit the value
+# is normalized to.
+SPEC_FIELDS = {
+    "quotation_no": ("Quotation No", text),
+    "project_id": ("Project ID", text),
+    "design_standard": ("Design Standard", text),
+    "annexes": ("Annexes Used", text),
+    "internal_pressure_psi": ("Internal Pressure", lambda v: quantity(v, "psi")),
+    "external_pressure_psi": ("External Pressure", lambda v: quantity(v, "psi")),
+    "tank_diameter_ft": ("Tank Diameter", lambda v: quantity(v, "ft")),
+    "outside_diameter_ft": ("Outside Diameter", lambda v: quantity(v, "ft")),
+    "inside_diameter_ft": ("Inside Diameter", lambda v: quantity(v, "ft")),
+    "shell_height_ft": ("Shell Height", lambda v: quantity(v, "ft")),
+    "specific_gravity": ("Standard Gravity (SG)", quantity),
+    "liquid_level_ft": ("Liquid Level", lambda v: quantity(v, "ft")),
+    "design_temperature_f": ("Design Temperature", lambda v: quantity(v, "F")),
+    "mdmt_f": ("MDMT", lambda v: quantity(v, "F")),
+    "roof_live_load_psf": ("Roof Live Load", lambda v: quantity(v, "psf")),
+    "wind_speed_mph": ("Wind Speed", lambda v: quantity(v, "mph")),
+    "seismic_g": ("Seismic Design", quantities),
+    "shell_material": ("Shell Material", text),
+    "shell_widths_in": ("Shell - Size", lambda v: quantities(v, "in")),
+    "shell_courses": ("Shell - Quantity", count),
+    "roof_type": ("Roof Type", text),
+    "roof_material": ("Roof Material", text),
+    "roof_thickness_in": ("Roof Thickness", lambda v: quantity(v, "in")),
+    "bottom_material": ("Bottom Material", text),
+    "bottom_thickness_in": ("Bottom Thickness", lambda v: quantity(v, "in")),
+    "rim_angle_material": ("Rim Angle Material", text),
+    "rim_angle_size": ("Rim Angle Size", text),
+    "anchors_quantity": ("Anchors Quantity", count),
+    "anchors_size_in": ("Anchors Size", lambda v: quantity(v, "in")),
+    "anchors_material": ("Anchors Material", text),
+    "top_plate_thickness_in": (
+        "Top Plate Thickness (in)",
+        lambda v: quantity(v, "in"),
+    ),
+    "top_plate_size_in": ("Top Plate Size", lambda v: quantities(v, "in")),
+    "anchor_chair_quantity": ("Anchor Chair Quantity", count),
+    "vertical_plate_quantity": ("Vertical Plate Quantity", count),
+    "vertical_plate_size_in": ("Vertical Plate Size", lambda v: quantities(v, "in")),
+    "vertical_plate_thickness_in": (
+        "Vertical Plate Thickness",
+        lambda v: quantity(v, "in"),
+    ),
+}
+
+
+@dataclass(slots=True)
+class TankResult:
+    # Typed view of one report's specs/nozzles/manways dicts. Missing values
+    # are None (or an empty list), never "Not found".
+    file_hash: str = ""
+    file_name: str = ""
+    pages: int = 0
+    quotation_no: str | None = None
+    project_id: str | None = None
+    design_standard: str | None = None
+    annexes: str | None = None
+    internal_pressure_psi: float | None = None
+    external_pressure_psi: float | None = None
+    tank_diameter_ft: float | None = None
+    outside_diameter_ft: float | None = None
+    inside_diameter_ft: float | None = None
+    shell_height_ft: float | None = None
+    specific_gravity: float | None = None
+    liquid_level_ft: float | None = None
+    design_temperature_f: float | None = None
+    mdmt_f: float | None = None
+    roof_live_load_psf: float | None = None
+    wind_speed_mph: float | None = None
+    seismic_g: list = field(default_factory=list)
+    shell_material: str | None = None
+    # Course 1 first; a course listed without a thickness is None.
+    shell_course_thickness_in: list = field(default_factory=list)
+    shell_widths_in: list = field(default_factory=list)
+    shell_courses: int | None = None
+    roof_type: str | None = None
+    roof_material: str | None = None
+    roof_thickness_in: float | None = None
+    bottom_material: str | None = None
+    bottom_thickness_in: float | None = None
+    rim_angle_material: str | None = None
+    rim_angle_size: str | None = None
+    anchors_quantity: int | None = None
+    anchors_size_in: float | None = None
+    anchors_material: str | None = None
+    top_plate_thickness_in: float | None = None
+    top_plate_size_in: list = field(default_factory=list)
+    anchor_chair_quantity: int | None = None
+    vertical_plate_quantity: int | None = None
+    vertical_plate_size_in: list = field(default_factory=list)
+    vertical_plate_thickness_in: float | None = None
+    nozzles: list = field(default_factory=list)
+    manways: list = field(default_factory=list)
+
+    @classmethod
+    def from_report(cls, report, file_name=""):
+        # report as returned by process_pdf / stream_pdf (or TSbatch).
+        specs = report["specs"]
+        pages = report.get("pages", 0)
+        values = {
+            attribute: parse(specs.get(name))
+            for attribute, (name, parse) in SPEC_FIELDS.items()
+        }
+
+        courses = {}
+        for name, value in specs.items():
+            course = SHELL_COURSE_RE.match(name)
+            if course:
+                courses[int(course.group(1))] = quantity(value, "in")
+        thicknesses = [courses.get(n) for n in range(1, max(courses, default=0) + 1)]
+
+        return cls(
+            file_hash=report.get("key", ""),
+            file_name=file_name,
+            pages=pages if isinstance(pages, int) else len(pages),
+            shell_course_thickness_in=thicknesses,
+            nozzles=[Nozzle.from_row(row) for row in report.get("nozzles", ())],
+            manways=[Manway.from_row(row) for row in report.get("manways", ())],
+            **values,
+        )
+
+
+# Columns holding a list of records, and the record type of each.
+RECORD_LISTS = {"nozzles": Nozzle, "manways": Manway}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Arrow/Parquet export needs pyarrow: pip install pyarrow")
+
+
+def _arrow_type(attribute):
+    if attribute.name in RECORD_LISTS:
+        record = fields(RECORD_LISTS[attribute.name])
+        return pa.list_(pa.struct([(f.name, _arrow_type(f)) for f in record]))
+    # "float | None" -> float
+    kinds = [t for t in typing.get_args(attribute.type) if t is not type(None)]
+    kind = kinds[0] if kinds else attribute.type
+    return {
+        str: pa.string(),
+        int: pa.int32(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        list: pa.list_(pa.float64()),
+    }[kind]
+
+
+def arrow_schema():
+    _require_pyarrow()
+    return pa.schema([(f.name, _arrow_type(f)) for f in fields(TankResult)])
+
+
+def to_arrow(results):
+    # One row per tank; shell courses, widths and plate sizes are list<double>
+    # columns and nozzles/manways list<struct>, so per-tank arrays stay in one
+    # table.
+    _require_pyarrow()
+    schema = arrow_schema()
+    columns = {name: [] for name in schema.names}
+    for result in results:
+        for name, column in columns.items():
+            value = getattr(result, name)
+            if name in RECORD_LISTS:
+                value = [
+                    {f.name: getattr(item, f.name) for f in fields(item)}
+                    for item in value
+                ]
+            column.append(value)
+    return pa.table(columns, schema=schema)
+
+
+def write_parquet(results, path):
+    _require_pyarrow()
+    pq.write_table(to_arrow(results), path)
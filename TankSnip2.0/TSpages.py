@@ -0,0 +1,105 @@
+from bisect import bisect_right
+
+from TSrules import SPEC_RULES, Budget, MatchTimeout, fold_text
+from TSsections import MANWAY_BLOCKS, NOZZLE_BLOCKS, index_sections
+
+# Sections read by the spec rules, the nozzle table and the manway table.
+READ_SECTIONS = SPEC_RULES.sections | set(NOZZLE_BLOCKS) | set(MANWAY_BLOCKS)
+
+# Nozzle blind flags are looked for anywhere in the report.
+BLIND_KEYWORD = b"blind"
+
+
+class PageIndex:
+    # Which pages each extractor reads, worked out from a cheap text pass (the
+    # fast backend's output) joined exactly as pages_to_text joins pages.
+    # `hits` maps a keyword (field, section, table or "blind") to its pages;
+    # only the union of those needs layout extraction.
+
+    def __init__(self, page_texts):
+        self.pages = len(page_texts)
+        self.text = "\n".join(page_texts)
+        self.folded = fold_text(self.text)
+        self.page_starts = []
+        pos = 0
+        for page in page_texts:
+            self.page_starts.append(pos)
+            pos += len(page) + 1
+        self.hits = {}
+
+    def page_of(self, offset):
+        return bisect_right(self.page_starts, offset) - 1
+
+    def add(self, keyword, start, end=None):
+        # Every page the span [start, end] touches.
+        first = self.page_of(start)
+        last = first if end is None else self.page_of(max(start, end - 1))
+        self.hits.setdefault(keyword, set()).update(range(first, last + 1))
+
+    def needed(self):
+        return set().union(*self.hits.values()) if self.hits else set()
+
+
+def _add_fields(index, budget):
+    text, folded = index.text, index.folded
+    # Only the first match counts for a document-wide field, so only its page
+    # is read; earlier pages had no match in the fast text either.
+    for rule in SPEC_RULES.document:
+        with budget.field(rule.field):
+            match = rule.matcher.first(text, folded, budget=budget)
+        if match:
+            index.add(rule.field, match.start(), match.end())
+
+    for matcher, fields in SPEC_RULES.passes.items():
+        with budget.field(fields[0]):
+            for match in matcher.finditer(text, budget):
+                index.add(fields[0], match.start(), match.end())
+
+    for rule in SPEC_RULES.sectioned:
+        if not rule.fallback:
+            continue
+        # Used when the section is missing: the first match after the literal.
+        start = folded.find(rule.fallback)
+        if start == -1:
+            continue
+        with budget.field(rule.field):
+            match = rule.matcher.first(text, folded, start + len(rule.fallback), budget)
+        index.add(rule.field, start, match.end() if match else None)
+
+
+def _add_tables(index):
+    text = index.text
+    for rule in SPEC_RULES.tables:
+        reader = rule.matcher
+        start = text.find(reader.HEADING)
+        if start == -1:
+            continue
+        table = reader()
+        pos = end = text.rfind("\n", 0, start) + 1
+        while pos < len(text) and not table.done:
+            line_end = text.find("\n", pos)
+            if line_end == -1:
+                line_end = len(text)
+            table.feed(text[pos:line_end])
+            end, pos = line_end, line_end + 1
+        index.add(rule.field, start, end)
+
+
+def build_page_index(page_texts, budget=None):
+    index = PageIndex(page_texts)
+    try:
+        _add_fields(index, budget or Budget())
+    except MatchTimeout:
+        # Cannot tell which pages the timed-out field is on: read them all.
+        index.hits["timeout"] = set(range(index.pages))
+    _add_tables(index)
+
+    for section in index_sections(index.text):
+        if section.name in READ_SECTIONS:
+            index.add(section.name, section.start, section.end)
+
+    pos = index.folded.find(BLIND_KEYWORD)
+    while pos != -1:
+        index.add("blind", pos)
+        pos = index.folded.find(BLIND_KEYWORD, pos + 1)
+    return index
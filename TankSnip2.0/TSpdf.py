@@ -0,0 +1,355 @@
+import contextlib
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+from pdfminer.pdftypes import resolve1
+
+import TSdiag
+from TSpages import build_page_index
+from TSrules import NOT_FOUND
+from TSutils import extract_specs
+from TSwords import PageWords, Word, read_tables, table_pages, words_from_chars
+
+try:
+    # Installed with pdfplumber (0.10+), which renders pages with it.
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# One extracted page: 1-based page number, its text and the seconds
+# extract_text() took for it.
+PageText = namedtuple("PageText", "number text seconds")
+
+# Below this many pages, starting workers costs more than it saves.
+MIN_PARALLEL_PAGES = 8
+
+# "auto" reads the specs from the first PROBE_PAGES pages with pdfplumber and
+# with each fast backend in turn, and keeps the first fast backend that agrees
+# with pdfplumber on every field. Both read the fields the word tables hold
+# (shell widths and thicknesses) from the tables, as the pipeline does. The
+# probe has to reach the summary's shell table (pdfplumber finds every
+# PROBE_FIELDS field) for that to mean anything; otherwise, or on any
+# difference, it falls back to pdfplumber and keeps the probe's pages.
+AUTO = "auto"
+REFERENCE = "pdfplumber"
+FAST_BACKENDS = ("pdfium",)
+PROBE_FIELDS = ("Quotation No", "Tank Diameter", "Shell - Size")
+PROBE_PAGES = 5
+
+# "selective" builds a keyword page index from the fast backend's text and
+# runs pdfplumber only on the pages the extractors read; the other pages keep
+# the fast text.
+SELECTIVE = "selective"
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+class PlumberBackend:
+    # The reference: pdfplumber rebuilds lines from individual characters,
+    # which is accurate and slow.
+
+    def __init__(self, data):
+        self._pdf = pdfplumber.open(io.BytesIO(data))
+
+    def __len__(self):
+        return len(self._pdf.pages)
+
+    def page_text(self, index):
+        page = self._pdf.pages[index]
+        text = page.extract_text() or ""
+        # Drops the page's cached layout objects.
+        page.close()
+        return text
+
+    def page_words(self, index):
+        page = self._pdf.pages[index]
+        words = [
+            Word(word["text"], word["x0"], word["top"], word["x1"], word["bottom"])
+            for word in page.extract_words()
+        ]
+        page.close()
+        return words
+
+    def close(self):
+        self._pdf.close()
+
+
+class PdfiumBackend:
+    # PDFium's own text layer. Much faster, and the calc report generator
+    # writes text in reading order, so lines usually come out the same.
+
+    def __init__(self, data):
+        self._pdf = pdfium.PdfDocument(data)
+
+    def __len__(self):
+        return len(self._pdf)
+
+    def page_text(self, index):
+        page = self._pdf[index]
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_bounded()
+        finally:
+            textpage.close()
+            page.close()
+        return text.replace("\r\n", "\n").replace("\r", "\n")
+
+    def page_words(self, index):
+        # Loose boxes span the font's full height, so every character on a
+        # line gets the same top, as pdfplumber's do.
+        page = self._pdf[index]
+        textpage = page.get_textpage()
+        try:
+            height = page.get_height()
+            chars = []
+            for i in range(textpage.count_chars()):
+                left, bottom, right, top = textpage.get_charbox(i, loose=True)
+                char = chr(pdfium.raw.FPDFText_GetUnicode(textpage.raw, i))
+                # pdfium reports a hyphen at a line wrap as U+0002.
+                char = "-" if char == "\x02" else char
+                chars.append((char, left, height - top, right, height - bottom))
+        finally:
+            textpage.close()
+            page.close()
+        return words_from_chars(chars)
+
+    def close(self):
+        self._pdf.close()
+
+
+BACKENDS = {REFERENCE: PlumberBackend}
+if pdfium is not None:
+    BACKENDS["pdfium"] = PdfiumBackend
+
+
+def _fast_backend():
+    return next((name for name in FAST_BACKENDS if name in BACKENDS), None)
+
+
+BACKEND_CHOICES = [AUTO, *BACKENDS] + ([SELECTIVE] if _fast_backend() else [])
+
+
+def open_backend(data, backend):
+    return contextlib.closing(BACKENDS[backend](data))
+
+
+def probe_pages(data, backend):
+    with open_backend(data, backend) as doc:
+        return _read_pages(doc, range(min(len(doc), PROBE_PAGES)))
+
+
+def reference_probe(data):
+    # pdfplumber's probe pages and the word tables on them.
+    pages = probe_pages(data, REFERENCE)
+    return pages, read_page_tables(data, table_pages([page.text for page in pages]))
+
+
+def probe_matches(data, backend, reference=None):
+    # reference: reference_probe(data), when already at hand.
+    pages, tables = reference or reference_probe(data)
+    expected = extract_specs(pages_to_text(pages), tables=tables)
+    if any(expected.get(field, NOT_FOUND) == NOT_FOUND for field in PROBE_FIELDS):
+        return False
+    probe = probe_pages(data, backend)
+    return extract_specs(pages_to_text(probe), tables=tables) == expected
+
+
+def _select(data, backend):
+    # (concrete backend, pdfplumber's probe pages when "auto" read them and
+    # settled on pdfplumber, so they need not be extracted again).
+    if backend == SELECTIVE and _fast_backend() is None:
+        return REFERENCE, None
+    if backend != AUTO:
+        return backend, None
+    reference = None
+    for name in FAST_BACKENDS:
+        if name not in BACKENDS:
+            continue
+        if reference is None:
+            reference = reference_probe(data)
+        if probe_matches(data, name, reference):
+            return name, None
+        TSdiag.count(f"backend.{name}.rejected")
+    return REFERENCE, reference and reference[0]
+
+
+def select_backend(data, backend=AUTO):
+    return _select(data, backend)[0]
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def _get_pool(workers):
+    # Kept at module level so Streamlit reruns reuse warm worker processes.
+    # Locked because the bid package queue extracts several files at once.
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            _pool_workers = workers
+        return _pool
+
+
+def _read_pages(doc, indexes):
+    pages = []
+    for index in indexes:
+        start = time.perf_counter()
+        text = doc.page_text(index)
+        pages.append(PageText(index + 1, text, time.perf_counter() - start))
+    return pages
+
+
+def _extract_range(data, indexes, backend):
+    # Open documents do not pickle, so each worker opens its own copy.
+    with open_backend(data, backend) as doc:
+        return _read_pages(doc, indexes)
+
+
+def _chunks(indexes, workers):
+    # Two chunks per worker evens out pages that are slower than the rest.
+    size = max(1, -(-len(indexes) // (workers * 2)))
+    return [indexes[first : first + size] for first in range(0, len(indexes), size)]
+
+
+def _extract_parallel(data, indexes, backend, workers):
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_extract_range, data, chunk, backend)
+        for chunk in _chunks(indexes, workers)
+    ]
+    pages = []
+    for future in futures:
+        pages.extend(future.result())
+    return pages
+
+
+def _index_pages(data):
+    # The cheap pass for "selective": fast text for every page, and the pages
+    # whose layout text is worth extracting.
+    start = time.perf_counter()
+    with open_backend(data, _fast_backend()) as doc:
+        fast = _read_pages(doc, range(len(doc)))
+    needed = sorted(build_page_index([page.text for page in fast]).needed())
+    TSdiag.record("page_index", time.perf_counter() - start)
+    TSdiag.count("pages.skipped", len(fast) - len(needed))
+    return fast, needed
+
+
+def _extract_selective(data, workers, min_parallel_pages):
+    fast, needed = _index_pages(data)
+    if workers <= 1 or len(needed) < min_parallel_pages:
+        layout = _extract_range(data, needed, REFERENCE)
+    else:
+        layout = _extract_parallel(data, needed, REFERENCE, workers)
+
+    pages = list(fast)
+    for page in layout:
+        pages[page.number - 1] = page
+    if layout:
+        # What the skipped pages would have cost at the average layout rate.
+        per_page = sum(page.seconds for page in layout) / len(layout)
+        TSdiag.record("page_text_skipped_est", per_page * (len(fast) - len(layout)))
+    return pages
+
+
+def extract_pages(
+    data, workers=None, min_parallel_pages=MIN_PARALLEL_PAGES, backend=AUTO
+):
+    if workers is None:
+        workers = default_workers()
+    backend, probed = _select(data, backend)
+    TSdiag.count(f"backend.{backend}")
+    if backend == SELECTIVE:
+        return _extract_selective(data, workers, min_parallel_pages)
+
+    probed = probed or []
+    with open_backend(data, backend) as doc:
+        rest = range(len(probed), len(doc))
+        if workers <= 1 or len(rest) < min_parallel_pages:
+            return probed + _read_pages(doc, rest)
+    return probed + _extract_parallel(data, list(rest), backend, workers)
+
+
+def extract_page_subset(
+    data, indexes, backend, workers=None, min_parallel_pages=MIN_PARALLEL_PAGES
+):
+    # Text of just the pages at `indexes` (0-based), with a concrete backend
+    # as returned by select_backend.
+    if workers is None:
+        workers = default_workers()
+    indexes = list(indexes)
+    if workers <= 1 or len(indexes) < min_parallel_pages:
+        return _extract_range(data, indexes, backend)
+    return _extract_parallel(data, indexes, backend, workers)
+
+
+def _content_hash(page):
+    # The page's decompressed content streams: what it draws, not how a
+    # backend lays the text out. Pages of a reissued report that did not
+    # change hash the same even though the file around them did.
+    digest = hashlib.sha1()
+    for stream in page.page_obj.contents:
+        digest.update(resolve1(stream).get_data())
+    return digest.hexdigest()
+
+
+def page_hashes(data):
+    start = time.perf_counter()
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        hashes = [_content_hash(page) for page in pdf.pages]
+    TSdiag.record("page_hashes", time.perf_counter() - start)
+    return hashes
+
+
+def read_page_tables(data, indexes):
+    # Table-shaped sections read by word position (TSwords) from the pages
+    # that can hold a table (0-based indexes, see TSwords.table_pages).
+    # Geometry is the same whichever backend supplied the text, so the fast
+    # one is used for it when installed.
+    start = time.perf_counter()
+    pages = []
+    if indexes:
+        with open_backend(data, _fast_backend() or REFERENCE) as doc:
+            pages = [PageWords(index + 1, doc.page_words(index)) for index in indexes]
+    tables = read_tables(pages)
+    TSdiag.record("tables", time.perf_counter() - start)
+    TSdiag.count("pages.words", len(pages))
+    return tables
+
+
+def iter_pages(data, backend=AUTO):
+    # Yields page texts one at a time; backends drop each page as soon as its
+    # text is taken, so memory does not grow with the page count.
+    backend, probed = _select(data, backend)
+    TSdiag.count(f"backend.{backend}")
+    if backend == SELECTIVE:
+        fast, needed = _index_pages(data)
+        needed = set(needed)
+        with open_backend(data, REFERENCE) as doc:
+            for page in fast:
+                index = page.number - 1
+                yield doc.page_text(index) if index in needed else page.text
+        return
+
+    probed = probed or []
+    for page in probed:
+        yield page.text
+    with open_backend(data, backend) as doc:
+        for index in range(len(probed), len(doc)):
+            yield doc.page_text(index)
+
+
+def pages_to_text(pages):
+    return "\n".join(page.text for page in pages)
@@ -0,0 +1,192 @@
+import TSdiag
+from TScache import file_key
+from TSpdf import (
+    AUTO,
+    BACKENDS,
+    PageText,
+    extract_page_subset,
+    extract_pages,
+    iter_pages,
+    page_hashes,
+    pages_to_text,
+    read_page_tables,
+    select_backend,
+)
+from TSrevision import Change, diff_results, tag_id
+from TSsections import index_sections
+from TSstream import StreamingParser
+from TSutils import extract_manways, extract_nozzles, extract_specs, scan_nozzles
+from TSversion import PARSER_VERSION
+from TSwords import table_pages, with_next_pages
+
+
+def parse_text(text, tables=None):
+    # tables: TSwords tables for the same report, when its PDF is at hand.
+    TSdiag.count("chars", len(text))
+    with TSdiag.stage("sections"):
+        sections = index_sections(text)
+    TSdiag.count("sections", len(sections))
+
+    with TSdiag.stage("extract_specs"):
+        specs = extract_specs(text, sections, tables)
+    with TSdiag.stage("extract_nozzles"):
+        scan = scan_nozzles(text)
+        nozzles = extract_nozzles(text, tables, scan)
+    with TSdiag.stage("extract_manways"):
+        manways = extract_manways(text, scan)
+    return {"specs": specs, "nozzles": nozzles, "manways": manways}
+
+
+def _extract_revision(data, cache, key, workers, backend):
+    # Page text for a report that may be a revision of one seen before: pages
+    # whose content hash matches the last file extracted for the same Tag ID
+    # keep that file's text, and only the others are extracted. The first page
+    # is always extracted, since the Tag ID is read from it.
+    concrete = select_backend(data, backend)
+    if concrete not in BACKENDS:
+        return extract_pages(data, workers=workers, backend=concrete)
+
+    hashes = page_hashes(data)
+    first = extract_page_subset(data, [0], concrete, workers=1) if hashes else []
+    tag = tag_id(first[0].text) if first else None
+    if tag is None:
+        rest = extract_page_subset(data, range(1, len(hashes)), concrete, workers)
+        return first + rest
+
+    tag_key = f"revision.{backend}.{tag}"
+    latest = cache.get(tag_key)
+    known = {}
+    if latest and latest["key"] != key and latest["backend"] == concrete:
+        old_pages = cache.get(f"{latest['key']}.{backend}.pages")
+        if old_pages is not None:
+            known = dict(zip(latest["hashes"], old_pages))
+
+    changed = [i for i, digest in enumerate(hashes[1:], 1) if digest not in known]
+    fresh = {page.number: page for page in first}
+    for page in extract_page_subset(data, changed, concrete, workers):
+        fresh[page.number] = page
+    # Reused pages cost nothing this time round.
+    pages = [
+        fresh.get(number) or PageText(number, known[digest][1], 0.0)
+        for number, digest in enumerate(hashes, 1)
+    ]
+
+    reused = len(pages) - len(fresh)
+    TSdiag.count("pages.reused", reused)
+    if reused:
+        cache.put(
+            f"{key}.{backend}.revision",
+            {"previous": latest["key"], "reused_pages": reused},
+        )
+    cache.put(tag_key, {"key": key, "backend": concrete, "hashes": hashes})
+    return pages
+
+
+def load_pages(data, cache=None, key=None, workers=None, backend=AUTO):
+    # Page text, and everything parsed from it, depends on the backend asked
+    # for, so that is part of every cache key.
+    key = key or file_key(data)
+    pages_key = f"{key}.{backend}.pages"
+    cached = cache.get(pages_key) if cache is not None else None
+    if cached is not None:
+        TSdiag.count("cache_hits.pages")
+        return [PageText(*page) for page in cached]
+
+    with TSdiag.stage("extract_pages"):
+        if cache is not None:
+            pages = _extract_revision(data, cache, key, workers, backend)
+        else:
+            pages = extract_pages(data, workers=workers, backend=backend)
+    # Summed per-page time; exceeds extract_pages when workers run in parallel.
+    TSdiag.record("page_text", sum(page.seconds for page in pages))
+    if cache is not None:
+        cache.put(pages_key, [list(page) for page in pages])
+    return pages
+
+
+def load_tables(data, indexes, cache=None, key=None):
+    # indexes: the 0-based pages that can hold a table (TSwords.table_pages).
+    # Read from the PDF's geometry whatever backend gave the text, so cached
+    # per file rather than per backend, and shared by both entry points.
+    key = key or file_key(data)
+    tables_key = f"{key}.{PARSER_VERSION}.tables"
+    tables = cache.get(tables_key) if cache is not None else None
+    if tables is None:
+        tables = read_page_tables(data, indexes)
+        if cache is not None:
+            cache.put(tables_key, tables)
+    return tables
+
+
+def _revision_changes(cache, key, backend, results):
+    # What changed since the earlier revision load_pages reused pages from,
+    # or None when nothing was reused.
+    revision = cache.get(f"{key}.{backend}.revision")
+    if revision is None:
+        return None
+    previous = revision["previous"]
+    old = cache.get(f"{previous}.{backend}.{PARSER_VERSION}.results")
+    if old is None:
+        old_pages = cache.get(f"{previous}.{backend}.pages")
+        if old_pages is None:
+            return None
+        old_text = pages_to_text(PageText(*page) for page in old_pages)
+        old = parse_text(old_text, cache.get(f"{previous}.{PARSER_VERSION}.tables"))
+    with TSdiag.stage("revision_diff"):
+        changes = diff_results(old, results)
+    return {**revision, "changes": changes}
+
+
+def process_pdf(data, cache=None, workers=None, backend=AUTO):
+    key = file_key(data)
+    results_key = f"{key}.{backend}.{PARSER_VERSION}.results"
+    pages = load_pages(data, cache, key, workers, backend)
+    TSdiag.count("pages", len(pages))
+
+    results = cache.get(results_key) if cache is not None else None
+    if results is None:
+        indexes = table_pages([page.text for page in pages])
+        tables = load_tables(data, indexes, cache, key)
+        results = {**parse_text(pages_to_text(pages), tables), "tables": tables}
+        if cache is not None:
+            revision = _revision_changes(cache, key, backend, results)
+            if revision is not None:
+                results["revision"] = revision
+            cache.put(results_key, results)
+    else:
+        TSdiag.count("cache_hits.results")
+
+    report = {"key": key, "pages": pages, **results}
+    if "revision" in report:
+        # Lists once the results have been through the disk cache.
+        revision = report["revision"]
+        changes = [Change(*change) for change in revision["changes"]]
+        report["revision"] = {**revision, "changes": changes}
+    return report
+
+
+def stream_pdf(data, cache=None, backend=AUTO):
+    # Bounded-memory path for batch runs: pages are parsed as they come off
+    # the PDF and no page text is kept, so nothing but results is cached. The
+    # word tables are read afterwards from the pages that had a table header,
+    # so the results are process_pdf's.
+    key = file_key(data)
+    results_key = f"{key}.{backend}.{PARSER_VERSION}.stream"
+    results = cache.get(results_key) if cache is not None else None
+    if results is None:
+        parser = StreamingParser()
+        with TSdiag.stage("stream"):
+            for page_text in iter_pages(data, backend):
+                parser.feed(page_text)
+        indexes = with_next_pages(parser.header_pages, parser.pages)
+        tables = load_tables(data, indexes, cache, key)
+        with TSdiag.stage("stream_finish"):
+            results = {"pages": parser.pages, **parser.finish(tables)}
+        TSdiag.count("chars", parser.chars)
+        if cache is not None:
+            cache.put(results_key, results)
+    else:
+        TSdiag.count("cache_hits.results")
+    TSdiag.count("pages", results["pages"])
+
+    return {"key": key, **results}
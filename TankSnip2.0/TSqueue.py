@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from TScache import default_cache, file_key
+from TSpdf import AUTO
+from TSpipeline import process_pdf
+from TSstore import default_store
+
+# Files of a bid package processed at once. Threads only orchestrate: page
+# text comes from TSpdf's process pool, so a few are enough to keep it busy.
+QUEUE_WORKERS = 4
+
+_threads = None
+_threads_lock = threading.Lock()
+
+
+def _get_threads():
+    # Shared by every session, like TSpdf's process pool.
+    global _threads
+    with _threads_lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(
+                max_workers=QUEUE_WORKERS, thread_name_prefix="tanksnip-queue"
+            )
+        return _threads
+
+
+def _process(data, name, backend):
+    start = time.perf_counter()
+    report = process_pdf(data, cache=default_cache(), backend=backend)
+    default_store().save(report, name)
+    return report, time.perf_counter() - start
+
+
+class Job:
+    def __init__(self, name, future):
+        self.name = name
+        self.future = future
+
+    @property
+    def state(self):
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() else "done"
+
+    @property
+    def error(self):
+        if self.state != "failed":
+            return None
+        exc = self.future.exception()
+        return f"{type(exc).__name__}: {exc}"
+
+    @property
+    def report(self):
+        return self.future.result()[0] if self.state == "done" else None
+
+    @property
+    def seconds(self):
+        return self.future.result()[1] if self.state == "done" else None
+
+
+class ExtractionQueue:
+    # One per session: the files uploaded so far, in upload order, each
+    # extracted once however many reruns the page goes through.
+
+    def __init__(self, backend=AUTO):
+        self.backend = backend
+        self.jobs = {}
+
+    def submit(self, name, data):
+        key = file_key(data)
+        if key not in self.jobs:
+            future = _get_threads().submit(_process, data, name, self.backend)
+            self.jobs[key] = Job(name, future)
+        return key
+
+    def keep_only(self, keys):
+        # Files removed from the uploader leave the package (running jobs
+        # still finish and land in the cache).
+        for key in list(self.jobs):
+            if key not in keys:
+                del self.jobs[key]
+
+    def finished(self):
+        return [job for job in self.jobs.values() if job.state == "done"]
+
+    def pending(self):
+        return [job for job in self.jobs.values() if not job.future.done()]
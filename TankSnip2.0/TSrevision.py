@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+from TSrules import NOT_FOUND, SPEC_RULES, fold_text
+
+# Calc reports are reissued as revisions (...-V0.pdf, -V1.pdf) under the same
+# Tag ID, which is read off the first page to find the earlier revision.
+TAG_FIELD = "Quotation No"
+
+# Rows of the nozzle and manway tables are matched across revisions on these
+# columns; the remaining columns are compared.
+TABLE_KEYS = {
+    "nozzles": ("Size", "SCH", "Type"),
+    "manways": ("Size", "Type"),
+}
+
+# One changed value. `item` names the table row ("" for specs); a row only in
+# one revision shows as every column going from or to None.
+Change = namedtuple("Change", "table item field old new")
+
+
+def tag_id(text):
+    match = SPEC_RULES.by_field[TAG_FIELD].matcher.first(text, fold_text(text))
+    return match.group(1).strip() if match else None
+
+
+def _diff_specs(old, new):
+    changes = []
+    for field in dict.fromkeys([*old, *new]):
+        before, after = old.get(field, NOT_FOUND), new.get(field, NOT_FOUND)
+        if before != after:
+            changes.append(Change("specs", "", field, before, after))
+    return changes
+
+
+def _keyed(rows, columns):
+    # Repeated keys (two rows alike but for QTY, say) get "#2", "#3"...
+    keyed = {}
+    for row in rows:
+        item = " / ".join(str(row[column]) for column in columns)
+        label, n = item, 1
+        while label in keyed:
+            n += 1
+            label = f"{item} #{n}"
+        keyed[label] = row
+    return keyed
+
+
+def _diff_table(table, old, new):
+    columns = TABLE_KEYS[table]
+    before, after = _keyed(old, columns), _keyed(new, columns)
+    changes = []
+    for item in dict.fromkeys([*before, *after]):
+        old_row, new_row = before.get(item, {}), after.get(item, {})
+        for field in dict.fromkeys([*old_row, *new_row]):
+            if old_row.get(field) != new_row.get(field):
+                changes.append(
+                    Change(table, item, field, old_row.get(field), new_row.get(field))
+                )
+    return changes
+
+
+def diff_results(old, new):
+    # Field-level changes from one revision's parsed results to the next, in
+    # report order: specs, then nozzles, then manways.
+    changes = _diff_specs(old["specs"], new["specs"])
+    for table in TABLE_KEYS:
+        changes.extend(_diff_table(table, old[table], new[table]))
+    return changes
@@ -0,0 +1,545 @@
+import csv
+import re
+from collections import namedtuple
+from pathlib import Path
+
+import TSdiag
+from TSsections import find_section
+
+NOT_FOUND = "Not found"
+# A field whose share of the matching budget ran out before a match was found.
+# Outputs report it as its own status, since the value may well be there.
+TIMEOUT = "Timed out"
+
+# The calc-language -> estimate-language template doubles as the rule file:
+# every row with a Field is compiled once, at import, into SPEC_RULES.
+RULES_FILE = Path(__file__).resolve().parent.parent / "API_Tank_CSV_Template.csv"
+
+# Kinds of rule:
+#   first    group 1 of the first match (in Section, if given)
+#   each     one output field per match, named from Field with {n} replaced by
+#            group n; the value is the last group, skipped when it is empty
+#   max      the largest group 1 over all matches, as an integer
+#   table    the column read by the table reader named in Anchor
+#   derived  Derived with {Field} references filled in, or "N x {Field}"
+# Fields starting with "_" are worked out but not output.
+KINDS = ("first", "each", "max", "table", "derived")
+
+FieldRule = namedtuple("FieldRule", "field kind scope fallback matcher units derived")
+
+# Guarded matching. re cannot be interrupted, so each regex call is kept
+# small instead and the budget is charged before each call: a match is tried
+# over at most MAX_MATCH_SPAN characters from where it starts, and searches
+# without an anchor go SEARCH_CHUNK characters at a time. Values in a calc
+# report are a line or two long, so real reports match the same. The budget
+# counts the characters handed to the regex engine, not seconds, so a field
+# reads the same however busy the machine is. The largest OTTO Checks report
+# charges about 0.3M characters in all and 0.2M for its costliest field, so
+# the limits leave real reports two orders of magnitude of room.
+MAX_MATCH_SPAN = 1024
+SEARCH_CHUNK = 16384
+FIELD_CHARS = 16 * 2**20
+DOCUMENT_CHARS = 64 * 2**20
+
+DERIVED_PRODUCT_RE = re.compile(r"^(\d+)\s*x\s*\{([^}]+)\}$")
+DERIVED_REF_RE = re.compile(r"\{([^}]+)\}")
+GROUP_REF_RE = re.compile(r"\{(\d+)\}")
+
+
+def fold_text(text):
+    # One byte per character, so offsets line up with the original string.
+    return text.encode("latin-1", "replace").lower()
+
+
+class MatchTimeout(Exception):
+    pass
+
+
+class Budget:
+    # Matching work for one document, in characters: each field may use
+    # FIELD_CHARS, and all of them together DOCUMENT_CHARS. Once that is spent,
+    # every field still to be matched times out straight away.
+
+    def __init__(self, field_chars=FIELD_CHARS, document_chars=DOCUMENT_CHARS):
+        self.field_chars = field_chars
+        self.document_chars = document_chars
+        self.spent = 0
+        self.timeouts = []
+        self._field = ""
+        self._used = 0
+        self._limit = float("inf")
+
+    def field(self, name):
+        # Use as `with budget.field(name):`; MatchTimeout still propagates.
+        self._field = name
+        return self
+
+    def __enter__(self):
+        self._used = 0
+        self._limit = min(self.field_chars, self.document_chars - self.spent)
+
+    def __exit__(self, kind, value, traceback):
+        self.spent += self._used
+        self._limit = float("inf")
+        if kind is MatchTimeout:
+            self.timeouts.append(self._field)
+            TSdiag.count("timeouts")
+
+    def check(self, chars):
+        # Charges the characters the next regex call may scan.
+        self._used += chars
+        if self._used > self._limit:
+            raise MatchTimeout
+
+
+def field_status(value):
+    # For outputs with a status column next to each value.
+    if value == TIMEOUT:
+        return "timeout"
+    return "not found" if value == NOT_FOUND else "found"
+
+
+def timed_out(specs):
+    return [field for field, value in specs.items() if value == TIMEOUT]
+
+
+def _first_match(text, folded, rule, pos=0, budget=None):
+    anchor, pattern = rule
+    pos = folded.find(anchor, pos)
+    while pos != -1:
+        if budget is None:
+            match = pattern.match(text, pos)
+        else:
+            budget.check(min(MAX_MATCH_SPAN, len(text) - pos))
+            match = pattern.match(text, pos, pos + MAX_MATCH_SPAN)
+        if match:
+            return match
+        pos = folded.find(anchor, pos + 1)
+    return None
+
+
+def _guarded_search(regex, text, pos, budget):
+    # Same first match as regex.search(text, pos) for matches shorter than
+    # MAX_MATCH_SPAN; a match starting in the overlap is found again, with
+    # room to finish, in the next chunk.
+    while True:
+        end = pos + SEARCH_CHUNK
+        budget.check(min(end + MAX_MATCH_SPAN, len(text)) - pos)
+        match = regex.search(text, pos, end + MAX_MATCH_SPAN)
+        if match is not None and match.start() < end:
+            return match
+        if end >= len(text):
+            return None
+        pos = end
+
+
+def _guarded_finditer(regex, text, budget):
+    pos = 0
+    while pos < len(text):
+        end = pos + SEARCH_CHUNK
+        budget.check(min(end + MAX_MATCH_SPAN, len(text)) - pos)
+        next_pos = end
+        for match in regex.finditer(text, pos, end + MAX_MATCH_SPAN):
+            if match.start() >= end:
+                break
+            next_pos = max(end, match.end())
+            yield match
+        pos = next_pos
+
+
+class Matcher:
+    # Case-insensitive patterns lose the regex engine's literal-prefix scan, so
+    # a rule with an Anchor is matched case-insensitively and only tried where
+    # a bytes.find over the folded text finds its anchor; first-match results
+    # are the same as a plain re.search. Rules without an Anchor are
+    # case-sensitive and use re.search directly.
+
+    def __init__(self, pattern, anchor=""):
+        if anchor:
+            self.rule = (
+                anchor.lower().encode("latin-1"),
+                re.compile(pattern, re.IGNORECASE),
+            )
+            self.regex = self.rule[1]
+        else:
+            self.rule = None
+            self.regex = re.compile(pattern)
+
+    def first(self, text, folded, pos=0, budget=None):
+        # Unguarded without a budget; with one, may raise MatchTimeout.
+        if self.rule is not None:
+            return _first_match(text, folded, self.rule, pos, budget)
+        if budget is None:
+            return self.regex.search(text, pos)
+        return _guarded_search(self.regex, text, pos, budget)
+
+    def finditer(self, text, budget=None):
+        if budget is None:
+            return self.regex.finditer(text)
+        return _guarded_finditer(self.regex, text, budget)
+
+
+def _iter_lines(text, pos):
+    while pos < len(text):
+        end = text.find("\n", pos)
+        if end == -1:
+            end = len(text)
+        yield text[pos:end]
+        pos = end + 1
+
+
+SHELL_WIDTH_ROW_RE = re.compile(r"^\d+\s+(\d+)")
+
+
+class ShellWidthTable:
+    # Reads the "Shell Width" table one line at a time, so the same logic runs
+    # over the whole text or across page boundaries in the streaming parser.
+    HEADING = "Shell Width"
+
+    def __init__(self):
+        self.values = []
+        self.capturing = False
+        self.done = False
+
+    def feed(self, line):
+        if self.HEADING in line:
+            self.capturing = True
+            return
+        if not self.capturing:
+            return
+        if "Shell Weight" in line or "Weight CA" in line:
+            self.done = True
+            return
+        row = SHELL_WIDTH_ROW_RE.match(line.strip())
+        if row:
+            width = int(row.group(1))
+            if 30 <= width <= 120:
+                self.values.append(str(width))
+
+
+TABLE_READERS = {ShellWidthTable.HEADING: ShellWidthTable}
+
+
+def read_table(text, reader_class):
+    start = text.find(reader_class.HEADING)
+    if start == -1:
+        return []
+
+    table = reader_class()
+    for line in _iter_lines(text, text.rfind("\n", 0, start) + 1):
+        table.feed(line)
+        if table.done:
+            break
+    return table.values
+
+
+def _each_name(rule, groups):
+    return GROUP_REF_RE.sub(lambda ref: groups[int(ref.group(1)) - 1], rule.field)
+
+
+def _derived(expression):
+    product = DERIVED_PRODUCT_RE.match(expression)
+    if product:
+        return ("product", int(product.group(1)), product.group(2))
+    return ("format", DERIVED_REF_RE.findall(expression), expression)
+
+
+def _derive(derived, values):
+    kind, left, right = derived
+    refs = [right] if kind == "product" else left
+    missing = [values.get(ref, NOT_FOUND) for ref in refs]
+    if TIMEOUT in missing:
+        return TIMEOUT
+    if kind == "product":
+        try:
+            return str(left * int(values.get(right, NOT_FOUND)))
+        except ValueError:
+            return NOT_FOUND
+    if NOT_FOUND in missing:
+        return NOT_FOUND
+    return DERIVED_REF_RE.sub(lambda ref: values[ref.group(1)], right)
+
+
+def _list_matches(matcher, text, budget):
+    return list(matcher.finditer(text, budget))
+
+
+def _guarded(budget, field, search, *args):
+    # search(*args) within the field's share of the budget, or TIMEOUT.
+    try:
+        with budget.field(field):
+            return search(*args, budget=budget)
+    except MatchTimeout:
+        return TIMEOUT
+
+
+class FieldRules:
+    # Evaluation is split so the streaming parser can reuse it: scan_document
+    # and scan_sections return raw values (the group text, match groups for
+    # each/max, table cells), assemble turns raw values into the specs dict.
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.document = [r for r in rules if r.kind == "first" and not r.scope]
+        self.sectioned = [r for r in rules if r.kind == "first" and r.scope]
+        self.tables = [r for r in rules if r.kind == "table"]
+        self.derived = [r for r in rules if r.kind == "derived"]
+        self.by_field = {r.field: r for r in rules}
+        self.sections = frozenset(name for r in self.sectioned for name in r.scope)
+
+        # "each" and "max" rules over the same pattern share one pass.
+        self.passes = {}
+        for rule in rules:
+            if rule.kind in ("each", "max"):
+                self.passes.setdefault(rule.matcher, []).append(rule.field)
+
+    def match_first(self, rules, text, folded, budget):
+        raw = {}
+        clock = TSdiag.field_clock()
+        for rule in rules:
+            match = _guarded(budget, rule.field, rule.matcher.first, text, folded)
+            if match == TIMEOUT:
+                raw[rule.field] = TIMEOUT
+            elif match:
+                raw[rule.field] = match.group(1).strip()
+            clock.lap(rule.field)
+        return raw
+
+    def find_all(self, matcher, text, budget):
+        # Every match of one of the passes, or TIMEOUT.
+        return _guarded(budget, self.passes[matcher][0], _list_matches, matcher, text)
+
+    def scan_document(self, text, folded, budget, layout=None):
+        # layout: {field: raw value} read off the page geometry (TSwords), in
+        # place of the text pass or table reader for those fields.
+        layout = {f: v for f, v in (layout or {}).items() if f in self.by_field}
+        raw = self.match_first(self.document, text, folded, budget)
+
+        clock = TSdiag.field_clock()
+        for matcher, fields in self.passes.items():
+            if all(field in layout for field in fields):
+                continue
+            groups = self.find_all(matcher, text, budget)
+            if groups != TIMEOUT:
+                groups = [match.groups() for match in groups]
+            for field in fields:
+                raw[field] = groups
+            clock.lap(fields[0])
+
+        for rule in self.tables:
+            if rule.field not in layout:
+                raw[rule.field] = read_table(text, rule.matcher)
+                clock.lap(rule.field)
+        raw.update(layout)
+        return raw
+
+    def _scoped_match(self, rule, text, folded, sections, views, budget=None):
+        # Returns the match and the offset of the text it was made in.
+        if rule.scope not in views:
+            section = find_section(sections, *rule.scope)
+            views[rule.scope] = section and (
+                section.start,
+                text[section.start : section.end],
+                folded[section.start : section.end],
+            )
+        view = views[rule.scope]
+
+        if view is not None:
+            offset, view_text, view_folded = view
+            return rule.matcher.first(view_text, view_folded, budget=budget), offset
+        if rule.fallback:
+            # No such section: the first match after the fallback literal,
+            # like the old whole-text "Anchor.*?value" search.
+            start = folded.find(rule.fallback)
+            if start == -1:
+                return None, 0
+            start += len(rule.fallback)
+            return rule.matcher.first(text, folded, start, budget), 0
+        return rule.matcher.first(text, folded, budget=budget), 0
+
+    def scan_sections(self, text, folded, sections, budget):
+        raw = {}
+        views = {}
+        clock = TSdiag.field_clock()
+        for rule in self.sectioned:
+            found = _guarded(
+                budget,
+                rule.field,
+                self._scoped_match,
+                rule,
+                text,
+                folded,
+                sections,
+                views,
+            )
+            if found == TIMEOUT:
+                raw[rule.field] = TIMEOUT
+            elif found[0]:
+                raw[rule.field] = found[0].group(1).strip()
+            clock.lap(rule.field)
+        return raw
+
+    def assemble(self, raw):
+        values = {}
+        for rule in self.rules:
+            found = raw.get(rule.field)
+            if found == TIMEOUT:
+                values[rule.field] = TIMEOUT
+            elif rule.kind == "first":
+                values[rule.field] = (
+                    found + rule.units if found is not None else NOT_FOUND
+                )
+            elif rule.kind == "max":
+                numbers = [int(groups[0]) for groups in found or ()]
+                values[rule.field] = str(max(numbers)) if numbers else NOT_FOUND
+            elif rule.kind == "table":
+                values[rule.field] = ", ".join(found) if found else NOT_FOUND
+        # Derived fields may refer to rows below them, so they go last, in
+        # file order.
+        for rule in self.derived:
+            values[rule.field] = _derive(rule.derived, values)
+
+        specs = {}
+        for rule in self.rules:
+            if rule.field.startswith("_"):
+                continue
+            if rule.kind != "each":
+                specs[rule.field] = values[rule.field]
+                continue
+            if raw.get(rule.field) == TIMEOUT:
+                # No matches to name the fields from: "Shell Course ? Thickness".
+                specs[GROUP_REF_RE.sub("?", rule.field)] = TIMEOUT
+                continue
+            for groups in raw.get(rule.field) or ():
+                if groups[-1] is not None:
+                    specs[_each_name(rule, groups)] = groups[-1].strip() + rule.units
+        return specs
+
+    def extract(self, text, sections, folded=None, budget=None, layout=None):
+        if folded is None:
+            folded = fold_text(text)
+        if budget is None:
+            budget = Budget()
+        raw = self.scan_document(text, folded, budget, layout)
+        raw.update(self.scan_sections(text, folded, sections, budget))
+        return self.assemble(raw)
+
+    def locate(self, text, sections, folded=None, budget=None):
+        # Where each output field's value was read: {field: [(start, end)]}.
+        # Derived fields point at the fields they are built from and tables at
+        # their heading. Not used by extraction, so it keeps no timings; a
+        # field that times out has no spans.
+        if folded is None:
+            folded = fold_text(text)
+        if budget is None:
+            budget = Budget()
+        spans = {}
+
+        def add(field, match, offset=0, group=1):
+            # Values are stripped, so their spans are too.
+            value = match.group(group)
+            start = offset + match.start(group) + len(value) - len(value.lstrip())
+            end = offset + match.end(group) - len(value) + len(value.rstrip())
+            spans.setdefault(field, []).append((start, max(start, end)))
+
+        for rule in self.document:
+            match = _guarded(budget, rule.field, rule.matcher.first, text, folded)
+            if match and match != TIMEOUT:
+                add(rule.field, match)
+
+        for matcher, fields in self.passes.items():
+            matches = self.find_all(matcher, text, budget)
+            if matches == TIMEOUT:
+                continue
+            for rule in (self.by_field[field] for field in fields):
+                if rule.kind == "max" and matches:
+                    add(rule.field, max(matches, key=lambda m: int(m.group(1))))
+                elif rule.kind == "each":
+                    for match in matches:
+                        groups = match.groups()
+                        if groups[-1] is not None:
+                            add(_each_name(rule, groups), match, group=len(groups))
+
+        for rule in self.tables:
+            start = text.find(rule.matcher.HEADING)
+            if start != -1:
+                spans[rule.field] = [(start, start + len(rule.matcher.HEADING))]
+
+        views = {}
+        for rule in self.sectioned:
+            found = _guarded(
+                budget,
+                rule.field,
+                self._scoped_match,
+                rule,
+                text,
+                folded,
+                sections,
+                views,
+            )
+            if found != TIMEOUT and found[0]:
+                add(rule.field, found[0], found[1])
+
+        for rule in self.derived:
+            kind, left, right = rule.derived
+            refs = [right] if kind == "product" else left
+            found = [span for ref in refs for span in spans.get(ref, ())]
+            if found:
+                spans[rule.field] = found
+
+        return {
+            field: found for field, found in spans.items() if not field.startswith("_")
+        }
+
+
+def _cell(row, column):
+    # Short rows (trailing empty cells trimmed by a spreadsheet) read as None.
+    return row.get(column) or ""
+
+
+def compile_rule(row, matchers):
+    field = _cell(row, "Field").strip()
+    kind = _cell(row, "Kind").strip() or "first"
+    if kind not in KINDS:
+        raise ValueError(f"{field}: unknown rule kind {kind!r}")
+
+    scope = tuple(
+        name.strip() for name in _cell(row, "Section").split("|") if name.strip()
+    )
+    if scope and kind != "first":
+        raise ValueError(f"{field}: only 'first' rules can be scoped to a section")
+
+    anchor, pattern = _cell(row, "Anchor"), _cell(row, "Pattern")
+    if kind == "table":
+        if anchor not in TABLE_READERS:
+            raise ValueError(f"{field}: no table reader for {anchor!r}")
+        matcher = TABLE_READERS[anchor]
+    elif kind == "derived":
+        matcher = None
+    else:
+        # Rules that share a pattern share one Matcher, and with it one pass.
+        key = (pattern, anchor)
+        if key not in matchers:
+            matchers[key] = Matcher(pattern, anchor)
+        matcher = matchers[key]
+
+    units = _cell(row, "Units").strip()
+    return FieldRule(
+        field=field,
+        kind=kind,
+        scope=scope,
+        fallback=_cell(row, "Fallback").strip().lower().encode("latin-1"),
+        matcher=matcher,
+        units=f" {units}" if units else "",
+        derived=_derived(_cell(row, "Derived").strip()) if kind == "derived" else None,
+    )
+
+
+def load_rules(path=RULES_FILE):
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        rows = [row for row in csv.DictReader(handle) if _cell(row, "Field").strip()]
+    matchers = {}
+    return FieldRules([compile_rule(row, matchers) for row in rows])
+
+
+SPEC_RULES = load_rules()
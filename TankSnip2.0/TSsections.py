@@ -0,0 +1,131 @@
+import re
+from collections import namedtuple
+
+# A named span of the report text. `level` is 1 for report chapters, 2 for the
+# blocks under "Summary Results" and 3 for nozzle / manway blocks; `tag` is the
+# nozzle or manway id for level 3 and "" otherwise.
+Section = namedtuple("Section", "name level start end tag")
+
+CHAPTERS = [
+    "Project Design Data and Summary",
+    "Roof Design Details",
+    "Top Member Design",
+    "Agitator Bridge Design",
+    "Shell Design",
+    "Bottom Design",
+    "Wind Moment",
+    "Seismic Design",
+    "Anchor Bolt Design",
+    "Anchor Chair Design",
+    "Appurtenances Design",
+    "Normal and Emergency Venting",
+    "Capacities and Weights",
+    "Reactions on Foundation",
+    "Disclaimer and Special Notes",
+]
+
+SUMMARY_BLOCKS = [
+    "Summary Results",
+    "Shell",
+    "Roof",
+    "Bottom",
+    "Top Member",
+    "Anchors",
+    "Nameplate Information",
+]
+
+NOZZLE_BLOCKS = ("Roof Nozzle", "Shell Nozzle")
+MANWAY_BLOCKS = ("Roof Manway", "Shell Manway")
+
+
+def _alternation(names):
+    # The names as a prefix tree, "R(?:oof(?: Design Details|)|eactions ...)",
+    # so a line is tested against one branch per character instead of every
+    # name in turn. Longer names are still tried first: "Roof Design Details"
+    # wins over "Roof".
+    branches = {}
+    for name in names:
+        branches.setdefault(name[:1], []).append(name[1:])
+    parts = [
+        re.escape(first) + _alternation(rests)
+        for first, rests in branches.items()
+        if first
+    ]
+    if "" in branches:
+        parts.append("")
+    return parts[0] if len(parts) == 1 else "(?:" + "|".join(parts) + ")"
+
+
+# Every heading starts a line with a capital letter. The leading "\n" gives the
+# regex engine a literal prefix to skip ahead with and the lookahead rejects
+# most lines before any alternative is tried, so the index is one cheap sweep.
+# pdfium puts a chapter's "Back" link on the heading's own line.
+HEADING_RE = re.compile(
+    r"\n[ \t]*(?=[A-Z])(?:"
+    rf"(?P<heading>{_alternation(CHAPTERS + SUMMARY_BLOCKS)})"
+    r"(?:[ \t]+Back)?[ \t]*(?=\n|$)"
+    r"|(?P<block>(?:Roof|Shell) (?:Nozzle|Manway)):[ \t]*(?P<tag>[^\s]*)"
+    r")"
+)
+
+CHAPTER_NAMES = frozenset(CHAPTERS)
+
+
+def classify_heading(match, in_summary):
+    # Turns a HEADING_RE match over "\n" + text into (name, level, start, tag),
+    # or None when it is not a section boundary. `in_summary` tracks whether
+    # we are under "Summary Results" and is returned updated.
+    name = match.group("heading")
+    if name in CHAPTER_NAMES:
+        return (name, 1, match.start("heading") - 1, ""), False
+    if name == "Summary Results":
+        return None, True
+    if name:
+        # "Roof", "Bottom", ... are only headings inside the summary; the
+        # same words stand alone as table labels elsewhere in the report.
+        if in_summary:
+            return (name, 2, match.start("heading") - 1, ""), in_summary
+        return None, in_summary
+    block = match.group("block")
+    return (block, 3, match.start("block") - 1, match.group("tag")), in_summary
+
+
+def index_sections(text):
+    headings = []
+    in_summary = False
+
+    for match in HEADING_RE.finditer("\n" + text):
+        heading, in_summary = classify_heading(match, in_summary)
+        if heading:
+            headings.append(heading)
+
+    # Chapters run to the next chapter; everything else to the next heading.
+    sections = []
+    next_heading = next_chapter = len(text)
+    for name, level, start, tag in reversed(headings):
+        end = next_chapter if level == 1 else next_heading
+        sections.append(Section(name, level, start, end, tag))
+        next_heading = start
+        if level == 1:
+            next_chapter = start
+    sections.reverse()
+    return sections
+
+
+def find_section(sections, *names):
+    # The table of contents repeats every chapter title as an empty section,
+    # so the longest span for a name is the real one. Names are tried in order.
+    for name in names:
+        spans = [s for s in sections if s.name == name]
+        if spans:
+            return max(spans, key=lambda s: s.end - s.start)
+    return None
+
+
+def section_text(text, sections, *names):
+    section = find_section(sections, *names)
+    return text[section.start : section.end] if section else None
+
+
+def blocks(sections, names):
+    return [s for s in sections if s.name in names]
@@ -0,0 +1,332 @@
+# TSserver.py
+#
+# Local HTTP extraction service for tools that want the parser without the
+# Streamlit UI. Worker processes import the parser once at startup and stay
+# up, so a request pays for the extraction only.
+#
+#   python TankSnip2.0/TSserver.py --port 8650 --workers 4
+#   curl --data-binary @report.pdf "http://127.0.0.1:8650/extract?name=report.pdf"
+#
+# POST /extract         PDF bytes in the body -> one result as JSON
+# POST /extract/batch   {"files": [{"name": ..., "pdf": base64}, ...]}
+#                       -> {"results": [...]} in the same order
+# GET  /health          worker count and requests in flight
+#
+# Results carry key, pages, seconds, specs, timeouts (fields whose matching
+# budget ran out; their spec value reads "Timed out"), nozzles, manways and
+# tables; a file that fails to parse gets {"error": ...} instead (422 from
+# /extract).
+# Once PENDING_PER_WORKER files per worker are in flight, new requests get
+# 503 with Retry-After rather than queueing without bound.
+
+import argparse
+import base64
+import binascii
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from TScache import default_cache
+from TSpdf import AUTO, BACKEND_CHOICES, default_workers
+from TSpipeline import parse_text, process_pdf
+from TSrules import timed_out
+from TSstore import DEFAULT_DB_PATH, ResultStore
+
+logger = logging.getLogger("tanksnip.server")
+
+DEFAULT_PORT = 8650
+# Files in flight (queued or running) per worker before 503s.
+PENDING_PER_WORKER = 4
+# Request bodies larger than this are refused with 413.
+MAX_BODY_BYTES = 64 * 1024 * 1024
+# A file still running after this long is answered as timed out; its worker
+# still finishes it.
+REQUEST_SECONDS = 120.0
+RETRY_AFTER_SECONDS = 1
+
+
+_ready = None
+
+
+def _warm_worker(ready):
+    # Runs once in each worker process: a first parse touches whatever the
+    # imports left for first use, so no request does.
+    global _ready
+    _ready = ready
+    parse_text("Tag ID : warmup\n")
+
+
+def _worker_ready(_):
+    # Held until every worker has one, so each lands in a different process.
+    _ready.wait()
+    return os.getpid()
+
+
+def _extract(data, backend, use_cache):
+    # One file per task; page text is read in this process (workers=1)
+    # rather than fanning out again to TSpdf's own pool.
+    start = time.perf_counter()
+    report = process_pdf(
+        data, cache=default_cache() if use_cache else None, workers=1, backend=backend
+    )
+    result = {
+        "key": report["key"],
+        "pages": len(report["pages"]),
+        "seconds": time.perf_counter() - start,
+        "specs": report["specs"],
+        "timeouts": timed_out(report["specs"]),
+        "nozzles": report["nozzles"],
+        "manways": report["manways"],
+        "tables": report["tables"],
+    }
+    if "revision" in report:
+        result["revision"] = report["revision"]
+    return result
+
+
+class ExtractionService:
+    # The worker pool and the bound on work in flight, shared by the server's
+    # request threads.
+
+    def __init__(
+        self, workers=None, backend=AUTO, use_cache=True, store_path=DEFAULT_DB_PATH
+    ):
+        self.workers = workers or default_workers()
+        self.backend = backend
+        self.use_cache = use_cache
+        self.max_pending = self.workers * PENDING_PER_WORKER
+        self.store = ResultStore(store_path) if store_path else None
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = ProcessPoolExecutor(
+            self.workers,
+            initializer=_warm_worker,
+            initargs=(multiprocessing.Barrier(self.workers),),
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def warm(self):
+        # Workers may start on demand; one task each gets them all up and
+        # imported before the first request. Returns their pids.
+        return list(self._pool.map(_worker_ready, range(self.workers)))
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def reserve(self, count):
+        # All of a request's files get a slot or none do.
+        taken = 0
+        while taken < count and self._slots.acquire(blocking=False):
+            taken += 1
+        if taken < count:
+            for _ in range(taken):
+                self._slots.release()
+            return False
+        with self._lock:
+            self._pending += count
+        return True
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def submit(self, data, backend=None):
+        # Only after reserve(); the slot is given back when the file is done.
+        future = self._pool.submit(
+            _extract, data, backend or self.backend, self.use_cache
+        )
+        future.add_done_callback(self._release)
+        return future
+
+    def result(self, future, name):
+        try:
+            result = future.result(timeout=REQUEST_SECONDS)
+        except TimeoutError:
+            return {"name": name, "error": "timed out"}
+        except Exception as exc:
+            return {"name": name, "error": f"{type(exc).__name__}: {exc}"}
+        if self.store is not None:
+            self.store.save(result, name)
+        return {"name": name, **result}
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+        if self.store is not None:
+            self.store.close()
+
+
+class ExtractionHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a client can send many requests over one connection.
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+    def _send_json(self, status, body, headers=()):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _busy(self):
+        self._send_json(
+            503,
+            {"error": "busy", "pending": self.service.pending},
+            [("Retry-After", str(RETRY_AFTER_SECONDS))],
+        )
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            # The body is not read, so the connection cannot be reused.
+            self.close_connection = True
+            self._send_json(413, {"error": f"body over {MAX_BODY_BYTES} bytes"})
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(
+            200,
+            {
+                "workers": self.service.workers,
+                "pending": self.service.pending,
+                "max_pending": self.service.max_pending,
+            },
+        )
+
+    def do_POST(self):
+        # The body is read before anything is refused, so the connection
+        # stays usable for the next request.
+        body = self._read_body()
+        if body is None:
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        backend = query.get("backend", [None])[0]
+        if backend is not None and backend not in BACKEND_CHOICES:
+            self._send_json(400, {"error": f"unknown backend {backend!r}"})
+            return
+        if url.path == "/extract":
+            self._extract_one(body, query.get("name", [""])[0], backend)
+        elif url.path == "/extract/batch":
+            self._extract_batch(body, backend)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _extract_one(self, data, name, backend):
+        if not data.startswith(b"%PDF"):
+            self._send_json(400, {"error": "body is not a PDF"})
+            return
+        if not self.service.reserve(1):
+            self._busy()
+            return
+        result = self.service.result(self.service.submit(data, backend), name)
+        self._send_json(422 if "error" in result else 200, result)
+
+    def _extract_batch(self, body, backend):
+        try:
+            files = json.loads(body)["files"]
+            names = [item.get("name", "") for item in files]
+            pdfs = [base64.b64decode(item["pdf"], validate=True) for item in files]
+        except (ValueError, KeyError, TypeError, AttributeError, binascii.Error):
+            self._send_json(400, {"error": 'expected {"files": [{"name", "pdf"}]}'})
+            return
+        if not self.service.reserve(len(pdfs)):
+            self._busy()
+            return
+        # Every file goes to the pool before any result is waited on, so the
+        # batch runs across all the workers.
+        futures = [self.service.submit(data, backend) for data in pdfs]
+        results = [
+            self.service.result(future, name) for future, name in zip(futures, names)
+        ]
+        self._send_json(200, {"results": results})
+
+
+def serve(host, port, service):
+    server = ThreadingHTTPServer((host, port), ExtractionHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TankSnip extraction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="extraction processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKEND_CHOICES,
+        default=AUTO,
+        help="default text extraction backend; ?backend= overrides per request",
+    )
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument(
+        "--db",
+        type=Path,
+        default=DEFAULT_DB_PATH,
+        help=f"SQLite results store (default: {DEFAULT_DB_PATH})",
+    )
+    parser.add_argument("--no-store", action="store_true")
+    parser.add_argument("--quiet", action="store_true", help="no per-request log")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s"
+    )
+    service = ExtractionService(
+        args.workers,
+        args.backend,
+        use_cache=not args.no_cache,
+        store_path=None if args.no_store else args.db,
+    )
+    start = time.perf_counter()
+    pids = service.warm()
+    server = serve(args.host, args.port, service)
+    print(
+        f"{len(pids)} workers ready in {time.perf_counter() - start:.2f}s, "
+        f"serving on http://{args.host}:{server.server_port}",
+        flush=True,
+    )
+    # Stopped with SIGTERM as with Ctrl-C, so the workers are shut down too.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,695 @@
+# TSsteel.py
+#
+# Steel weight and material cost for extracted tanks: shell, roof, bottom,
+# rim angle and anchor chairs, priced the way the Estimate Sheet prices a
+# plate line, qty x width x length x lbs/sq ft / 144 x $/lb. Weights are for
+# the steel as bought (whole plates, 20' angle sticks), like the sheet's "MF:"
+# lines, not the net steel in the tank.
+#
+#   python TankSnip2.0/TSsteel.py --build        # recompile steel_tables.json
+#   python TankSnip2.0/TSsteel.py --check        # is it current with the xlsx?
+#   python TankSnip2.0/TSsteel.py "OTTO Checks"  # steel for each report
+#
+# --build reads OTTO Checks/Pricing.xlsx ($/lb by material and thickness,
+# angle by the stick), the Plate Weight sheet of the Estimate Sheet (lbs/sq
+# ft), Flat Bottom & Cone Top Reference.xlsx (the plates for a top or bottom
+# by diameter) and the shell rolling sheets of API_650_Labor_Hours.xlsx
+# (plates per course and their length) into steel_tables.json.
+
+import argparse
+import hashlib
+import json
+import math
+import re
+import sys
+import time
+from collections import namedtuple
+from fractions import Fraction
+from pathlib import Path
+
+import numpy as np
+
+from TSlabor import (
+    DEFAULT_COURSE_WIDTH_IN,
+    LABOR_WORKBOOK,
+    ROOT,
+    SHELL_FIRST_ROW,
+    SHELL_SHEETS,
+    STAINLESS_RE,
+    band_lookup,
+    band_rows,
+    band_upper,
+    load_workbook,
+)
+from TSmodel import TankResult
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+PRICING_WORKBOOK = ROOT / "OTTO Checks" / "Pricing.xlsx"
+ESTIMATE_WORKBOOK = ROOT / "Estimate Sheet V 2.0 - Kelly.xlsx"
+LAYOUT_WORKBOOK = ROOT / "Flat Bottom & Cone Top Reference.xlsx"
+SOURCES = (PRICING_WORKBOOK, ESTIMATE_WORKBOOK, LAYOUT_WORKBOOK, LABOR_WORKBOOK)
+TABLES_FILE = Path(__file__).resolve().parent / "steel_tables.json"
+
+# The Estimate Sheet's plate materials, and how a calc report names them.
+MATERIALS = ("SA36", "SA516-70", "SA240-304/304L", "SA240-316/316L")
+MATERIAL_RES = (
+    (3, re.compile(r"316", re.IGNORECASE)),
+    (2, re.compile(r"A240|\b30[49]|\bSS\b", re.IGNORECASE)),
+    (1, re.compile(r"516", re.IGNORECASE)),
+    (0, re.compile(r"A36\b|A283|A285|\bCS\b|carbon", re.IGNORECASE)),
+)
+
+# Pricing.xlsx, sheet Plate: (thickness column, $/lb column, first row) of
+# each material's plate block, 48" or 60" plate. SA516-70 is only priced 96"
+# wide. Rows run down for as long as the first column holds a thickness.
+PRICE_SHEET = "Plate"
+PLATE_PRICES = {
+    "SA36": ("A", "C", 31),
+    "SA516-70": ("A", "C", 5),
+    "SA240-304/304L": ("G", "I", 4),
+    "SA240-316/316L": ("M", "O", 4),
+}
+# (size column, item column, price column, first row) of the angle blocks,
+# priced by the 20' stick. SA516-70 tanks get SA36 angle.
+ANGLE_PRICES = {
+    "SA36": ("A", "B", "C", 54),
+    "SA240-304/304L": ("G", "H", "I", 21),
+    "SA240-316/316L": ("M", "N", "O", 21),
+}
+ANGLE_STICK_FT = 20.0
+PLATE_WEIGHT_SHEET = "Plate Weight"
+PLATE_WEIGHT_FIRST_ROW = 3
+LAYOUT_SHEET = "Sheet1"
+# Tank diameter in A, the plates in B (stainless) and F (carbon).
+LAYOUT_FIRST_ROW = 5
+LAYOUT_COLUMNS = ("F", "B")
+# Plate widths the mill sells; a shell course is cut from the next one up.
+PLATE_WIDTHS_IN = (48.0, 60.0, 72.0, 96.0, 120.0)
+
+THICKNESS_RE = re.compile(r'(?:(\d+)-)?(\d+)(?:/(\d+))?"?')
+PLATES_RE = re.compile(r'(?:\((\d+)\)\s*)?(\d+)"\s*x\s*(\d+)"', re.IGNORECASE)
+ANGLE_RE = re.compile(r'([\d/]+)"\s*X\s*([\d.]+)"\s*X\s*([\d.]+)"', re.IGNORECASE)
+RIM_ANGLE_RE = re.compile(
+    r"L\s*([\d.]+)\s*x\s*([\d.]+)\s*x\s*([\d/.]+)", re.IGNORECASE
+)
+
+COMPONENTS = ("shell", "roof", "bottom", "rim_angle", "anchor_chairs")
+
+Steel = namedtuple("Steel", "weight_lb cost")
+# One Estimate Sheet line: qty is what the sheet shows (None on a
+# continuation line), description e.g. '1/4" X 60" X 144"'; width and
+# length are the plate's (None for angle).
+SteelLine = namedtuple(
+    "SteelLine", "component qty description material weight_lb cost width_in length_in"
+)
+
+
+def _require_openpyxl():
+    if openpyxl is None:
+        raise ImportError(
+            "Compiling the steel tables needs openpyxl: pip install openpyxl"
+        )
+
+
+def thickness(value):
+    # Plate thickness in inches from a cell or a description: 0.25, '1/4"',
+    # '1"', '1-1/4"'; None when it is not one.
+    if isinstance(value, (int, float)):
+        return float(value)
+    found = THICKNESS_RE.fullmatch(str(value or "").strip())
+    if found is None:
+        return None
+    whole, numerator, denominator = found.groups()
+    if denominator is None:
+        return float(numerator)
+    return int(whole or 0) + int(numerator) / int(denominator)
+
+
+def _plate_weights(workbook):
+    sheet = workbook[PLATE_WEIGHT_SHEET]
+    row = PLATE_WEIGHT_FIRST_ROW
+    sizes, carbon, stainless = [], [], []
+    while thickness(sheet[f"A{row}"].value) is not None:
+        sizes.append(thickness(sheet[f"A{row}"].value))
+        stainless.append(sheet[f"B{row}"].value)
+        carbon.append(sheet[f"C{row}"].value)
+        row += 1
+    # [carbon, stainless][thickness], like the labor tables.
+    return {"plate_thickness_in": sizes, "plate_lb_per_sqft": [carbon, stainless]}
+
+
+def _plate_prices(workbook, sizes):
+    # $/lb on the Plate Weight thicknesses. A thickness with no price takes
+    # the nearest priced one of the same material (the thicker on a tie);
+    # past either end of a block's listed thicknesses it stays None.
+    sheet = workbook[PRICE_SHEET]
+    prices = []
+    for material in MATERIALS:
+        size_column, price_column, row = PLATE_PRICES[material]
+        listed, priced = [], {}
+        while thickness(sheet[f"{size_column}{row}"].value) is not None:
+            size = thickness(sheet[f"{size_column}{row}"].value)
+            listed.append(size)
+            price = sheet[f"{price_column}{row}"].value
+            if isinstance(price, (int, float)):
+                priced[size] = float(price)
+            row += 1
+        if not priced:
+            raise ValueError(f"{PRICE_SHEET}: no plate prices for {material}")
+        prices.append(
+            [
+                priced[min(priced, key=lambda p: (abs(p - size), -p))]
+                if listed[0] <= size <= listed[-1]
+                else None
+                for size in sizes
+            ]
+        )
+    return {"materials": list(MATERIALS), "plate_price_per_lb": prices}
+
+
+def _angle_prices(workbook):
+    sheet = workbook[PRICE_SHEET]
+    by_material = {}
+    for material, columns in ANGLE_PRICES.items():
+        size_column, item_column, price_column, row = columns
+        by_material[material] = {}
+        while sheet[f"{size_column}{row}"].value:
+            size = ANGLE_RE.match(str(sheet[f"{size_column}{row}"].value))
+            price = sheet[f"{price_column}{row}"].value
+            is_angle = "ANGLE" in str(sheet[f"{item_column}{row}"].value).upper()
+            if size and is_angle and isinstance(price, (int, float)):
+                key = (thickness(size.group(1) + '"'), float(size.group(2)))
+                by_material[material][key] = float(price)
+            row += 1
+    by_material["SA516-70"] = by_material["SA36"]
+    sizes = sorted({key for prices in by_material.values() for key in prices})
+    return {
+        # [thickness, leg] of equal leg angle, then $ per stick by material.
+        "angle_size_in": [list(size) for size in sizes],
+        "angle_price": [
+            [by_material[material].get(size) for size in sizes]
+            for material in MATERIALS
+        ],
+        "angle_stick_ft": ANGLE_STICK_FT,
+    }
+
+
+def _plates(text):
+    # '(1) 60" x 144" and (1) 48" x 240"' -> [[1, 60, 144], [1, 48, 240]].
+    return [
+        [int(qty or 1), int(width), int(length)]
+        for qty, width, length in PLATES_RE.findall(str(text or ""))
+    ]
+
+
+def _layouts(workbook):
+    sheet = workbook[LAYOUT_SHEET]
+    upper, plates = [], [[] for _ in LAYOUT_COLUMNS]
+    for row in range(LAYOUT_FIRST_ROW, sheet.max_row + 1):
+        label = sheet[f"A{row}"].value
+        if not label:
+            continue
+        feet = int(re.search(r"\d+", label).group())
+        # "Less Than 6'" ends an inch short of 6'.
+        upper.append(feet * 12 - ("less" in label.lower()))
+        for column, kind in zip(LAYOUT_COLUMNS, plates):
+            kind.append(_plates(sheet[f"{column}{row}"].value))
+    # Bands are "up to" their diameter, so a 17' tank gets the 18' plates.
+    # [carbon, stainless][band] -> [qty, width, length] of each plate.
+    return {"top_bottom_upper_in": upper, "top_bottom_plates": plates}
+
+
+def _shell_plates(workbook):
+    # Each course is rolled from this many plates of this length, by
+    # diameter band; [carbon, stainless][band].
+    counts, lengths = [], []
+    for name in SHELL_SHEETS.values():
+        sheet = workbook[name]
+        rows = band_rows(sheet, SHELL_FIRST_ROW)
+        counts.append([sheet[f"C{row}"].value for row in rows])
+        lengths.append([band_upper(sheet[f"D{row}"].value) for row in rows])
+        upper = [band_upper(sheet[f"B{row}"].value) for row in rows]
+    return {
+        "shell_upper_in": upper,
+        "shell_plates_per_course": counts,
+        "shell_plate_length_in": lengths,
+    }
+
+
+def source_hashes():
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest() for path in SOURCES
+    }
+
+
+def compile_tables():
+    _require_openpyxl()
+    weights = _plate_weights(load_workbook(ESTIMATE_WORKBOOK, formulas=False))
+    pricing = load_workbook(PRICING_WORKBOOK, formulas=False)
+    return {
+        "sources": source_hashes(),
+        **weights,
+        **_plate_prices(pricing, weights["plate_thickness_in"]),
+        **_angle_prices(pricing),
+        **_layouts(load_workbook(LAYOUT_WORKBOOK, formulas=False)),
+        **_shell_plates(load_workbook(LABOR_WORKBOOK, formulas=False)),
+    }
+
+
+def build(path=TABLES_FILE):
+    # One table per line, so a change in a workbook reads as a small diff.
+    tables = compile_tables()
+    lines = [f"{json.dumps(key)}: {json.dumps(value)}" for key, value in tables.items()]
+    Path(path).write_text("{\n" + ",\n".join(lines) + "\n}\n", encoding="utf-8")
+    return tables
+
+
+class SteelTables:
+    # steel_tables.json as arrays; a missing price reads NaN.
+
+    def __init__(self, tables):
+        self.sources = tables["sources"]
+        self.materials = tables["materials"]
+        self.top_bottom_plates = tables["top_bottom_plates"]
+        for name, value in tables.items():
+            if name not in ("sources", "materials", "top_bottom_plates"):
+                setattr(self, name, np.array(value, dtype=float))
+        self.top_bottom_area_in2 = np.array(
+            [
+                [sum(q * width * length for q, width, length in band) for band in kind]
+                for kind in self.top_bottom_plates
+            ],
+            dtype=float,
+        )
+        # One more row (and angle column) of NaN, for index -1: a material
+        # or angle Pricing.xlsx does not have.
+        self.plate_price_per_lb = np.vstack(
+            [self.plate_price_per_lb, np.full(len(self.plate_thickness_in), np.nan)]
+        )
+        self.angle_price = np.pad(
+            self.angle_price, ((0, 1), (0, 1)), constant_values=np.nan
+        )
+        self.angle_index = {
+            tuple(size): index for index, size in enumerate(self.angle_size_in)
+        }
+
+    @classmethod
+    def load(cls, path=TABLES_FILE):
+        return cls(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+_tables = None
+
+
+def load_tables():
+    global _tables
+    if _tables is None:
+        _tables = SteelTables.load()
+    return _tables
+
+
+def stale_sources(tables=None):
+    # Names of the workbooks changed since steel_tables.json was built.
+    built = (tables or load_tables()).sources
+    return [
+        name for name, digest in source_hashes().items() if built.get(name) != digest
+    ]
+
+
+def material_index(text):
+    # Index into MATERIALS, -1 when the material is none of them.
+    for index, pattern in MATERIAL_RES:
+        if pattern.search(text or ""):
+            return index
+    return -1
+
+
+def _or_nan(value):
+    return np.nan if value is None else value
+
+
+def _materials(texts):
+    # (stainless 0/1 for the weight table, MATERIALS index for the price).
+    kind = np.array([bool(STAINLESS_RE.search(t or "")) for t in texts], dtype=int)
+    return kind, np.array([material_index(t) for t in texts], dtype=int)
+
+
+def _plate(tables, area_in2, plate_in, kind, material):
+    # Weight and cost of plate of a given area (sq in) and thickness; the
+    # thickness is bought at the next one listed. NaN thickness, NaN steel.
+    known = ~np.isnan(plate_in)
+    column = band_lookup(tables.plate_thickness_in, np.where(known, plate_in, 0.0))
+    weight = area_in2 * tables.plate_lb_per_sqft[kind, column] / 144
+    weight = np.where(known, weight, np.nan)
+    return weight, weight * tables.plate_price_per_lb[material, column]
+
+
+def plate_weight(qty, width_in, length_in, plate_in, material, tables=None):
+    # One Estimate Sheet plate line, qty x width x length x lbs/sq ft / 144.
+    tables = tables or load_tables()
+    kind, _ = _materials([material])
+    area = np.array([qty * width_in * length_in], dtype=float)
+    weight, _ = _plate(tables, area, np.array([plate_in], dtype=float), kind, 0)
+    return float(weight[0])
+
+
+def _angle_lb_per_ft(tables, angle_in, leg_in, kind):
+    # Equal leg angle weighs what plate of its cross section does: a 1"
+    # plate's lbs/sq ft is lbs per sq in of section per foot, times 12 / 144.
+    inch = band_lookup(tables.plate_thickness_in, 1.0)
+    section_in2 = (2 * leg_in - angle_in) * angle_in
+    return section_in2 * tables.plate_lb_per_sqft[kind, inch] / 12
+
+
+def angle_weight(length_ft, angle_in, leg_in, material, tables=None):
+    # Equal leg angle, e.g. 40 ft of L3x3x3/8: angle_weight(40, 0.375, 3, "A36").
+    tables = tables or load_tables()
+    kind, _ = _materials([material])
+    per_ft = _angle_lb_per_ft(tables, np.array([angle_in]), np.array([leg_in]), kind)
+    return float(length_ft * per_ft[0])
+
+
+def _rim_angle(text):
+    # 'L3x3x3/8' -> (thickness, leg); unequal or unreadable -> (NaN, NaN).
+    found = RIM_ANGLE_RE.search(text or "")
+    if found is None or float(found.group(1)) != float(found.group(2)):
+        return np.nan, np.nan
+    return thickness(found.group(3)), float(found.group(1))
+
+
+def _plate_size(sizes):
+    return sizes[0] * sizes[1] if len(sizes) >= 2 and None not in sizes[:2] else np.nan
+
+
+def estimate_steel(results, tables=None):
+    # results: TankResults. Steel(weight_lb, cost), each {component: array per
+    # tank} plus "total". Steel that cannot be sized (no diameter or
+    # thickness, past the plate tables, no price) is NaN.
+    tables = tables or load_tables()
+    n = len(results)
+    diameter_in = 12 * np.array(
+        [_or_nan(r.outside_diameter_ft or r.tank_diameter_ft) for r in results],
+        dtype=float,
+    )
+    known = ~np.isnan(diameter_in)
+    # The bands are in whole inches, so 120.4" falls in the 115" to 120" one.
+    diameter = np.where(known, np.round(diameter_in), 0.0)
+    weight, cost = {}, {}
+
+    # Shell: each course is its plates' length times the mill width it is
+    # cut from.
+    kind, material = _materials([r.shell_material for r in results])
+    courses = max((len(r.shell_course_thickness_in) for r in results), default=0)
+    plate_in = np.full((n, courses or 1), np.nan)
+    width_in = np.full(plate_in.shape, np.nan)
+    for row, result in enumerate(results):
+        widths = result.shell_widths_in
+        for course, value in enumerate(result.shell_course_thickness_in):
+            plate_in[row, course] = _or_nan(value)
+            width_in[row, course] = (
+                widths[course] if course < len(widths) else None
+            ) or DEFAULT_COURSE_WIDTH_IN
+    present = ~np.isnan(width_in)
+    mill_width = np.array(PLATE_WIDTHS_IN)[
+        band_lookup(PLATE_WIDTHS_IN, np.where(present, width_in, 0.0))
+    ]
+    band = band_lookup(tables.shell_upper_in, diameter)
+    plates = tables.shell_plates_per_course[kind, band]
+    length = plates * tables.shell_plate_length_in[kind, band]
+    course_weight, course_cost = _plate(
+        tables,
+        length[:, None] * mill_width,
+        plate_in,
+        kind[:, None],
+        material[:, None],
+    )
+    shell_sized = known & (diameter <= tables.shell_upper_in[-1]) & present.any(axis=1)
+    for totals, values in ((weight, course_weight), (cost, course_cost)):
+        summed = np.where(present, values, 0.0).sum(axis=1)
+        # A course with no thickness leaves the shell unknown.
+        summed[(np.isnan(values) & present).any(axis=1)] = np.nan
+        totals["shell"] = np.where(shell_sized, summed, np.nan)
+
+    # Roof and bottom: the reference plates for the diameter; a cone (2 on
+    # 12) and a flat top take the same plates.
+    band = band_lookup(tables.top_bottom_upper_in, diameter)
+    sized = known & (diameter <= tables.top_bottom_upper_in[-1])
+    for name in ("roof", "bottom"):
+        kind, material = _materials(
+            [getattr(r, f"{name}_material") or r.shell_material for r in results]
+        )
+        plate_in = np.array(
+            [_or_nan(getattr(r, f"{name}_thickness_in")) for r in results],
+            dtype=float,
+        )
+        area = tables.top_bottom_area_in2[kind, band]
+        weight[name], cost[name] = (
+            np.where(sized, values, np.nan)
+            for values in _plate(tables, area, plate_in, kind, material)
+        )
+
+    # Rim angle: enough 20' sticks to go round the tank.
+    kind, material = _materials(
+        [r.rim_angle_material or r.shell_material for r in results]
+    )
+    angles = [_rim_angle(r.rim_angle_size) for r in results]
+    angle_in = np.array([size for size, _ in angles], dtype=float)
+    leg_in = np.array([leg for _, leg in angles], dtype=float)
+    sticks = np.where(
+        known, np.ceil(np.pi * diameter / (tables.angle_stick_ft * 12)), np.nan
+    )
+    per_ft = _angle_lb_per_ft(tables, angle_in, leg_in, kind)
+    weight["rim_angle"] = sticks * tables.angle_stick_ft * per_ft
+    angle = np.array([tables.angle_index.get(a, -1) for a in angles], dtype=int)
+    cost["rim_angle"] = sticks * tables.angle_price[material, angle]
+
+    # Anchor chairs: a top plate each and their vertical plates (two per
+    # chair when the report does not say), in the shell's material.
+    kind, material = _materials([r.shell_material for r in results])
+    chairs = np.array([r.anchor_chair_quantity or 0 for r in results], dtype=float)
+    verticals = np.array([r.vertical_plate_quantity or 0 for r in results], dtype=float)
+    verticals = np.where(verticals > 0, verticals, 2 * chairs)
+    chair_weight, chair_cost = np.zeros(n), np.zeros(n)
+    for plate, qty in (("top_plate", chairs), ("vertical_plate", verticals)):
+        sizes = [getattr(r, f"{plate}_size_in") for r in results]
+        plate_in = np.array(
+            [_or_nan(getattr(r, f"{plate}_thickness_in")) for r in results],
+            dtype=float,
+        )
+        area = qty * np.array([_plate_size(size) for size in sizes])
+        plate_weight, plate_cost = _plate(tables, area, plate_in, kind, material)
+        chair_weight += plate_weight
+        chair_cost += plate_cost
+    weight["anchor_chairs"] = np.where(chairs > 0, chair_weight, 0.0)
+    cost["anchor_chairs"] = np.where(chairs > 0, chair_cost, 0.0)
+
+    for totals in (weight, cost):
+        totals["total"] = sum(totals[name] for name in COMPONENTS)
+    return Steel(weight, cost)
+
+
+def inches_text(value):
+    # 0.25 -> '1/4"', 1.25 -> '1-1/4"', 96.0 -> '96"'.
+    whole, part = divmod(Fraction(value).limit_denominator(64), 1)
+    if not part:
+        return f'{whole}"'
+    return f'{whole}-{part}"' if whole else f'{part}"'
+
+
+def _material_name(text):
+    index = material_index(text)
+    return MATERIALS[index] if index >= 0 else text
+
+
+def steel_lines(result, tables=None):
+    # One tank's steel as Estimate Sheet lines, one per plate size: the plates
+    # and prices estimate_steel() totals. What it cannot size is left out.
+    tables = tables or load_tables()
+    feet = result.outside_diameter_ft or result.tank_diameter_ft
+    diameter = round(12 * feet) if feet else None
+    lines = []
+
+    def plate(component, qty, plates, plate_in, width, length, text, prefix=""):
+        kind, material = _materials([text])
+        weight, cost = _plate(
+            tables,
+            np.array([plates * width * length], dtype=float),
+            np.array([plate_in], dtype=float),
+            kind,
+            material,
+        )
+        lines.append(
+            SteelLine(
+                component,
+                qty,
+                f'{prefix}{inches_text(plate_in)} X {width:g}" X {length:g}"',
+                _material_name(text),
+                float(weight[0]),
+                float(cost[0]),
+                width,
+                length,
+            )
+        )
+
+    def layout(component, plate_in, text):
+        sized = diameter is not None and diameter <= tables.top_bottom_upper_in[-1]
+        if not sized or plate_in is None:
+            return
+        kind, _ = _materials([text])
+        band = band_lookup(tables.top_bottom_upper_in, diameter)
+        for qty, width, length in tables.top_bottom_plates[kind[0]][band]:
+            plate(component, qty, qty, plate_in, width, length, text)
+
+    layout(
+        "roof", result.roof_thickness_in, result.roof_material or result.shell_material
+    )
+
+    text = result.rim_angle_material or result.shell_material
+    angle_in, leg_in = _rim_angle(result.rim_angle_size)
+    if diameter is not None and not np.isnan(leg_in):
+        circumference_ft = np.pi * diameter / 12
+        sticks = math.ceil(circumference_ft / tables.angle_stick_ft)
+        kind, material = _materials([text])
+        angle = tables.angle_index.get((angle_in, leg_in), -1)
+        lines.append(
+            SteelLine(
+                "rim_angle",
+                1,
+                f'{inches_text(angle_in)} X {leg_in:g}" X {leg_in:g}" '
+                f"x {math.ceil(circumference_ft)}'   "
+                f"MF: ({sticks}) {tables.angle_stick_ft:g}' ANGLE",
+                _material_name(text),
+                angle_weight(
+                    sticks * tables.angle_stick_ft, angle_in, leg_in, text, tables
+                ),
+                float(sticks * tables.angle_price[material[0], angle]),
+                None,
+                None,
+            )
+        )
+
+    # Courses of the same mill width and thickness share a line.
+    text = result.shell_material
+    courses = result.shell_course_thickness_in
+    if diameter is not None and diameter <= tables.shell_upper_in[-1] and courses:
+        if None not in courses:
+            kind, _ = _materials([text])
+            band = band_lookup(tables.shell_upper_in, diameter)
+            per_course = int(tables.shell_plates_per_course[kind[0], band])
+            length = float(tables.shell_plate_length_in[kind[0], band])
+            widths = result.shell_widths_in
+            groups = {}
+            for course, plate_in in enumerate(courses):
+                width = (
+                    widths[course] if course < len(widths) else None
+                ) or DEFAULT_COURSE_WIDTH_IN
+                mill = PLATE_WIDTHS_IN[band_lookup(PLATE_WIDTHS_IN, width)]
+                groups[mill, plate_in] = groups.get((mill, plate_in), 0) + per_course
+            for (width, plate_in), plates in groups.items():
+                plate("shell", plates, plates, plate_in, width, length, text)
+
+    layout(
+        "bottom",
+        result.bottom_thickness_in,
+        result.bottom_material or result.shell_material,
+    )
+
+    # Chairs: the chair row counts them and shows the top plate, the next row
+    # the vertical plates per chair.
+    chairs = result.anchor_chair_quantity or 0
+    top, vertical = result.top_plate_size_in, result.vertical_plate_size_in
+    if chairs and result.top_plate_thickness_in is not None and len(top) >= 2:
+        plate(
+            "anchor_chairs",
+            chairs,
+            chairs,
+            result.top_plate_thickness_in,
+            top[0],
+            top[1],
+            text,
+            "(1) ",
+        )
+    if chairs and result.vertical_plate_thickness_in is not None and len(vertical) >= 2:
+        verticals = result.vertical_plate_quantity or 2 * chairs
+        plate(
+            "anchor_chairs",
+            None,
+            verticals,
+            result.vertical_plate_thickness_in,
+            vertical[0],
+            vertical[1],
+            text,
+            f"({verticals / chairs:g}) ",
+        )
+    return lines
+
+
+def steel_rows(results, tables=None):
+    # One {component: (weight lb, cost)} dict per tank, for tables and CSV.
+    steel = estimate_steel(results, tables)
+    return [
+        {
+            name: (float(steel.weight_lb[name][index]), float(steel.cost[name][index]))
+            for name in (*COMPONENTS, "total")
+        }
+        for index in range(len(results))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Steel weight and material cost")
+    parser.add_argument("pdfs", nargs="*", help="calc report PDFs or directories")
+    parser.add_argument(
+        "--build", action="store_true", help=f"recompile {TABLES_FILE.name}"
+    )
+    parser.add_argument(
+        "--check", action="store_true", help="exit 1 if the workbooks changed"
+    )
+    args = parser.parse_args(argv)
+
+    if args.build:
+        start = time.perf_counter()
+        build()
+        print(f"wrote {TABLES_FILE} in {time.perf_counter() - start:.2f}s")
+    if args.check:
+        stale = stale_sources()
+        if stale:
+            print(f"out of date with {', '.join(stale)}; run --build")
+            return 1
+        print(f"{TABLES_FILE.name} is current")
+    if not args.pdfs:
+        return 0
+
+    from TSbatch import find_pdfs
+    from TSpipeline import process_pdf
+
+    paths = find_pdfs(args.pdfs)
+    results = [
+        TankResult.from_report(process_pdf(path.read_bytes()), path.name)
+        for path in paths
+    ]
+    start = time.perf_counter()
+    rows = steel_rows(results)
+    seconds = time.perf_counter() - start
+    columns = (*COMPONENTS, "total")
+    print(
+        f"{'file':<34}"
+        + "".join(f"{name[:9] + ' $':>12}" for name in columns)
+        + f"{'total lb':>10}"
+    )
+    for result, row in zip(results, rows):
+        print(
+            f"{result.file_name[:33]:<34}"
+            + "".join(f"{row[name][1]:>12,.0f}" for name in columns)
+            + f"{row['total'][0]:>10,.0f}"
+        )
+    print(f"priced {len(rows)} tanks in {seconds * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+# TSstore.py
+#
+# Every extraction, from the apps or a batch run, saved to one SQLite file so
+# questions across quotes are a query instead of opening CSVs.
+#
+#   python TankSnip2.0/TSstore.py "SELECT quotation_no, tank_diameter_ft
+#       FROM reports WHERE tank_diameter_ft > 30 AND shell_material = 'A36'"
+
+import argparse
+import csv
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from TSmodel import TankResult, quantity, text
+from TSversion import PARSER_VERSION
+
+DEFAULT_DB_PATH = Path.home() / ".tanksnip" / "results.sqlite3"
+
+# TankResult attributes copied onto each reports row as typed columns, so
+# the usual filters need no join. Every spec field is also kept, as text and
+# as its first number, in spec_values.
+REPORT_COLUMNS = {
+    "quotation_no": "TEXT",
+    "project_id": "TEXT",
+    "design_standard": "TEXT",
+    "tank_diameter_ft": "REAL",
+    "shell_height_ft": "REAL",
+    "liquid_level_ft": "REAL",
+    "specific_gravity": "REAL",
+    "design_temperature_f": "REAL",
+    "wind_speed_mph": "REAL",
+    "shell_material": "TEXT",
+    "shell_courses": "INTEGER",
+    "roof_type": "TEXT",
+    "roof_material": "TEXT",
+    "bottom_material": "TEXT",
+    "anchors_quantity": "INTEGER",
+}
+INDEXED_COLUMNS = (
+    "quotation_no",
+    "tank_diameter_ft",
+    "shell_height_ft",
+    "shell_material",
+    "design_standard",
+)
+
+_FIELD_COLUMNS = ",\n    ".join(
+    f"{column} {kind}" for column, kind in REPORT_COLUMNS.items()
+)
+_FIELD_INDEXES = "\n".join(
+    f"CREATE INDEX IF NOT EXISTS reports_{column} ON reports({column});"
+    for column in INDEXED_COLUMNS
+)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    file_name TEXT,
+    pages INTEGER,
+    parser_version TEXT,
+    result_hash TEXT,
+    extracted_at REAL,
+    {_FIELD_COLUMNS}
+);
+CREATE TABLE IF NOT EXISTS spec_values (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    field TEXT NOT NULL,
+    value TEXT,
+    number REAL,
+    PRIMARY KEY (report_id, field)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS shell_courses (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    course INTEGER NOT NULL,
+    thickness_in REAL,
+    PRIMARY KEY (report_id, course)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS nozzles (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    qty INTEGER,
+    size_in REAL,
+    schedule TEXT,
+    type TEXT,
+    with_blind INTEGER,
+    repad_required INTEGER,
+    repad_od_in REAL,
+    repad_thickness_in REAL
+);
+CREATE TABLE IF NOT EXISTS manways (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    qty INTEGER,
+    size_in REAL,
+    neck_thickness_in REAL,
+    type TEXT,
+    repad_required INTEGER,
+    repad_od_in REAL,
+    repad_thickness_in REAL
+);
+{_FIELD_INDEXES}
+CREATE INDEX IF NOT EXISTS spec_values_field ON spec_values(field, number);
+CREATE INDEX IF NOT EXISTS nozzles_report ON nozzles(report_id);
+CREATE INDEX IF NOT EXISTS nozzles_size ON nozzles(size_in);
+CREATE INDEX IF NOT EXISTS manways_report ON manways(report_id);
+"""
+
+
+# Columns added to reports since the first schema; older files get them when
+# opened.
+ADDED_COLUMNS = {"result_hash": "TEXT"}
+
+
+def result_hash(report):
+    # What a row is built from, so a new extraction of the same file can be
+    # told apart from a repeat whatever backend or path produced it.
+    content = {part: report[part] for part in ("specs", "nozzles", "manways")}
+    encoded = json.dumps(content, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultStore:
+    # One connection shared by the Streamlit session threads, guarded by a lock
+    # like ResultCache. Writes go through save_many, one transaction per call.
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        info = self._db.execute("PRAGMA table_info(reports)")
+        existing = {row["name"] for row in info}
+        for column, kind in ADDED_COLUMNS.items():
+            if existing and column not in existing:
+                self._db.execute(f"ALTER TABLE reports ADD COLUMN {column} {kind}")
+        self._db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def save(self, report, file_name=""):
+        return self.save_many([(report, file_name)])
+
+    def save_many(self, items):
+        # items: (report, file_name) pairs, report as returned by process_pdf
+        # or stream_pdf. A file keeps one row, from its latest extraction: a
+        # repeat of the stored result by the same parser version is left
+        # alone, anything else replaces it. Returns the number written.
+        written = 0
+        with self._lock, self._db:
+            for report, file_name in items:
+                digest = result_hash(report)
+                row = self._db.execute(
+                    "SELECT id, parser_version, result_hash FROM reports "
+                    "WHERE file_hash = ?",
+                    (report["key"],),
+                ).fetchone()
+                if row is not None:
+                    if (row["parser_version"], row["result_hash"]) == (
+                        PARSER_VERSION,
+                        digest,
+                    ):
+                        continue
+                    self._db.execute("DELETE FROM reports WHERE id = ?", (row["id"],))
+                self._insert(report, file_name, digest)
+                written += 1
+        return written
+
+    def _insert(self, report, file_name, digest):
+        result = TankResult.from_report(report, file_name)
+        columns = list(REPORT_COLUMNS)
+        cursor = self._db.execute(
+            f"INSERT INTO reports (file_hash, file_name, pages, parser_version, "
+            f"result_hash, extracted_at, {', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * (len(columns) + 6))})",
+            (
+                result.file_hash,
+                file_name,
+                result.pages,
+                PARSER_VERSION,
+                digest,
+                time.time(),
+                *(getattr(result, column) for column in columns),
+            ),
+        )
+        report_id = cursor.lastrowid
+
+        self._db.executemany(
+            "INSERT INTO spec_values VALUES (?, ?, ?, ?)",
+            [
+                (report_id, field, text(value), quantity(value))
+                for field, value in report["specs"].items()
+            ],
+        )
+        self._db.executemany(
+            "INSERT INTO shell_courses VALUES (?, ?, ?)",
+            [
+                (report_id, course, thickness)
+                for course, thickness in enumerate(result.shell_course_thickness_in, 1)
+                if thickness is not None
+            ],
+        )
+        self._db.executemany(
+            "INSERT INTO nozzles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    report_id,
+                    nozzle.qty,
+                    nozzle.size_in,
+                    nozzle.schedule,
+                    nozzle.type,
+                    nozzle.with_blind,
+                    nozzle.repad_required,
+                    nozzle.repad_od_in,
+                    nozzle.repad_thickness_in,
+                )
+                for nozzle in result.nozzles
+            ],
+        )
+        self._db.executemany(
+            "INSERT INTO manways VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    report_id,
+                    manway.qty,
+                    manway.size_in,
+                    manway.neck_thickness_in,
+                    manway.type,
+                    manway.repad_required,
+                    manway.repad_od_in,
+                    manway.repad_thickness_in,
+                )
+                for manway in result.manways
+            ],
+        )
+
+    def query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    # The package queue can ask for it from several threads at once.
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ResultStore()
+        return _default_store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the TankSnip results store")
+    parser.add_argument("sql", help="SQL to run; rows are printed as CSV")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.db)
+    start = time.perf_counter()
+    rows = store.query(args.sql)
+    elapsed = time.perf_counter() - start
+    if rows:
+        writer = csv.DictWriter(sys.stdout, list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"{len(rows)} rows in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+from TSrules import SPEC_RULES, TIMEOUT, Budget, fold_text
+from TSsections import HEADING_RE, Section, classify_heading
+from TSutils import NozzleScanner, group_nozzles
+from TSwords import has_table_header, layout_values, schedule_blind_flags
+
+# Sections the spec rules are scoped to. Their text is kept until the report
+# ends; everything else is dropped as soon as its page has been scanned.
+KEPT_SECTIONS = SPEC_RULES.sections
+
+# Whole-text fields are searched over the previous page's last lines plus the
+# new page, so a value that wraps onto the next page is still found.
+CARRY_LINES = 2
+
+
+class StreamingParser:
+    # Consumes a report one page at a time and produces the same
+    # specs/nozzles/manways as TSutils, holding only the sections it needs.
+    # One difference: when a report has neither the summary block nor the
+    # chapter for a scoped field, the fallback searches the kept sections
+    # rather than the whole document.
+
+    def __init__(self):
+        self._pending = list(SPEC_RULES.document)
+        self._raw = {
+            field: [] for fields in SPEC_RULES.passes.values() for field in fields
+        }
+        self._tables = {rule.field: rule.matcher() for rule in SPEC_RULES.tables}
+        self._nozzle_scan = NozzleScanner()
+        self._kept = {}
+        self._open = {1: None, 2: None, 3: None}
+        self._in_summary = False
+        self._carry = None
+        # One budget for the whole report, however many pages it comes in.
+        self._budget = Budget()
+        # 0-based pages whose text has a TSwords table header.
+        self.header_pages = []
+        self.pages = 0
+        self.chars = 0
+
+    def feed(self, page_text):
+        if has_table_header(page_text):
+            self.header_pages.append(self.pages)
+        self.pages += 1
+        self.chars += len(page_text)
+        if self._carry is None:
+            window, carry_len = page_text, 0
+        else:
+            window = f"{self._carry}\n{page_text}"
+            carry_len = len(self._carry) + 1
+        self._scan_document_fields(window, carry_len)
+        self._nozzle_scan.feed(window, skip=carry_len)
+
+        tables = [table for table in self._tables.values() if not table.done]
+        for line in page_text.split("\n"):
+            for table in tables:
+                if not table.done:
+                    table.feed(line)
+
+        self._route_sections(page_text)
+
+        cut = len(page_text)
+        for _ in range(CARRY_LINES):
+            cut = page_text.rfind("\n", 0, cut)
+            if cut == -1:
+                break
+        self._carry = page_text[cut + 1 :]
+
+    def _scan_document_fields(self, window, carry_len):
+        if self._pending:
+            found = SPEC_RULES.match_first(
+                self._pending, window, fold_text(window), self._budget
+            )
+            self._raw.update(found)
+            # A field that timed out here may still be found on a later page.
+            self._pending = [
+                rule
+                for rule in self._pending
+                if found.get(rule.field, TIMEOUT) == TIMEOUT
+            ]
+
+        for matcher, fields in SPEC_RULES.passes.items():
+            if self._raw[fields[0]] == TIMEOUT:
+                continue
+            matches = SPEC_RULES.find_all(matcher, window, self._budget)
+            if matches == TIMEOUT:
+                for field in fields:
+                    self._raw[field] = TIMEOUT
+                continue
+            for match in matches:
+                # Matches inside the carried lines were counted with the last
+                # page.
+                if match.end() <= carry_len:
+                    continue
+                for field in fields:
+                    self._raw[field].append(match.groups())
+
+    def _route_sections(self, page_text):
+        # Pages are joined with "\n" in the full text; keep that separator so
+        # section text matches what index_sections would slice out.
+        text = page_text if self.pages == 1 else "\n" + page_text
+        offset = 0 if self.pages == 1 else 1
+
+        pos = 0
+        for match in HEADING_RE.finditer("\n" + page_text):
+            heading, self._in_summary = classify_heading(match, self._in_summary)
+            if not heading:
+                continue
+            name, level, start, tag = heading
+            self._append(text[pos : start + offset])
+            pos = start + offset
+
+            for open_level in (3, 2, 1) if level == 1 else (3, 2):
+                self._close(open_level)
+            kept = name in KEPT_SECTIONS
+            self._open[level] = (name, level, tag, [] if kept else None)
+
+        self._append(text[pos:])
+
+    def _append(self, chunk):
+        if not chunk:
+            return
+        for section in self._open.values():
+            if section and section[3] is not None:
+                section[3].append(chunk)
+
+    def _close(self, level):
+        section = self._open[level]
+        self._open[level] = None
+        if section is None or section[3] is None:
+            return
+
+        name, level, tag, parts = section
+        text = "".join(parts)
+        if len(text) > len(self._kept.get(name, (0, ""))[1]):
+            # The table of contents repeats chapter titles as empty sections;
+            # like find_section, keep the longest span for each name.
+            self._kept[name] = (level, text)
+
+    def finish(self, tables=None):
+        # tables: TSwords tables read from the header_pages, as process_pdf
+        # passes them to the full-text parser.
+        for level in (3, 2, 1):
+            self._close(level)
+        self._nozzle_scan.finish()
+
+        raw = dict(self._raw)
+        for field, table in self._tables.items():
+            raw[field] = table.values
+
+        parts, sections, start = [], [], 0
+        for name, (level, text) in self._kept.items():
+            parts.append(text)
+            sections.append(Section(name, level, start, start + len(text), ""))
+            start += len(text)
+        kept_text = "".join(parts)
+        raw.update(
+            SPEC_RULES.scan_sections(
+                kept_text, fold_text(kept_text), sections, self._budget
+            )
+        )
+        if tables:
+            layout = layout_values(tables)
+            raw.update((f, v) for f, v in layout.items() if f in SPEC_RULES.by_field)
+        blind_flags = schedule_blind_flags(tables) if tables else {}
+
+        return {
+            "specs": SPEC_RULES.assemble(raw),
+            "nozzles": group_nozzles(
+                self._nozzle_scan.entries, blind_flags or self._nozzle_scan.flags
+            ),
+            "manways": self._nozzle_scan.manways,
+        }
+
+
+def parse_pages(pages):
+    parser = StreamingParser()
+    for page_text in pages:
+        parser.feed(page_text)
+    return parser.finish()
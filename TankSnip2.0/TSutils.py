@@ -1,187 +1,158 @@
 import re
-from collections import defaultdict
-import pandas as pd
-
-
-def extract_specs(text):
-    specs = {}
-
-    ordered_fields = [
-        ("Quotation No", r"Tag ID\s*[:=]?\s*([\w-]+)"),
-        ("Project ID", r"Project\s*=\s*([^\n]+)"),
-        ("Design Standard", r"Design Basis\s*[:=]?\s*([^\n]+)"),
-        ("Annexes Used", r"Annexes Used\s*[:=]?\s*([^\n]+)"),
-        ("Internal Pressure", r"Design Internal Pressure\s*[:=]?\s*([^\n]+)"),
-        ("External Pressure", r"Design External Pressure\s*[:=]?\s*([^\n]+)"),
-        ("Tank Diameter", r"D of Tank\s*=\s*([\d.]+)"),
-        ("Outside Diameter", r"OD of Tank\s*[:=]?\s*([\d.]+)"),
-        ("Inside Diameter", r"ID of Tank\s*[:=]?\s*([\d.]+)"),
-        ("Shell Height", r"Shell Height\s*=\s*([\d.]+)"),
-        ("Standard Gravity (SG)", r"S\.G of Contents\s*[:=]?\s*([\d.]+)"),
-        ("Liquid Level", r"Max Design Liq\. Level\s*[:=]?\s*([\d.]+)"),
-        ("Design Temperature", r"Design Temperature\s*[:=]?\s*([^\n]+)"),
-        ("MDMT", r"\bMDMT\s*[:=]?\s*([^\n]+)"),
-        ("Roof Live Load", r"Roof Live Load\s*[:=]?\s*([^\n]+)"),
-        ("Wind Speed", r"Design Wind Speed.*?=\s*([\d.]+\s*mph)"),
-    ]
-
-    for field, pattern in ordered_fields:
-        match = re.search(pattern, text, re.IGNORECASE)
-        specs[field] = match.group(1).strip() if match else "Not found"
-
-    shell_matches = re.findall(
-        r"Shell\s*\((\d+)\)\s*[A-Z0-9\-]+\s*:\s*([\d.]+)\s*in", text
-    )
-    for course_num, thickness in shell_matches:
-        specs[f"Shell Course {course_num} Thickness"] = f"{thickness} in"
-
-    match_ss = re.search(r"Ss\s*\(g\)\s*=\s*([\d.]+)", text)
-    match_s1 = re.search(r"S1\s*\(g\)\s*=\s*([\d.]+)", text)
-    specs["Seismic Design"] = (
-        f"{match_ss.group(1)}, {match_s1.group(1)}"
-        if match_ss and match_s1
-        else "Not found"
-    )
-
-    shell_widths = []
-    capture = False
-    for line in text.splitlines():
-        if "Shell Width" in line:
-            capture = True
-            continue
-        if capture:
-            if "Shell Weight" in line or "Weight CA" in line:
-                break
-            line = line.strip()
-            if re.match(r"^\d+\s+\d+", line):
-                try:
-                    width = int(re.findall(r"^\d+\s+(\d+)", line)[0])
-                    if 30 <= width <= 120:
-                        shell_widths.append(str(width))
-                except:
-                    continue
-
-    specs["Shell - Size"] = ", ".join(shell_widths) if shell_widths else "Not found"
-
-    shell_course_numbers = re.findall(r"Shell\s*\((\d+)\)", text)
-    specs["Shell - Quantity"] = (
-        str(max(map(int, shell_course_numbers)))
-        if shell_course_numbers
-        else "Not found"
-    )
-
-    match = re.search(r"Roof\s*Type\s*[:=]\s*(.+)", text, re.IGNORECASE)
-    specs["Roof Type"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(r"Plates Material\s*=\s*(.+)", text)
-    specs["Roof Material"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(
-        r"Roof.*?\bt\.actual\s*=\s*([\d.]+)\s*in", text, re.IGNORECASE | re.DOTALL
-    )
-    specs["Roof Thickness"] = match.group(1) + " in" if match else "Not found"
-
-    match = re.search(r"Bottom Material\s*[:=]?\s*(.+)", text)
-    specs["Bottom Material"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(
-        r"Bottom.*?\bt\.actual\s*=\s*([\d.]+)\s*in", text, re.IGNORECASE | re.DOTALL
-    )
-    specs["Bottom Thickness"] = match.group(1) + " in" if match else "Not found"
-
-    match = re.search(
-        r"Top Member.*?Material\s*=\s*([^\n]+)", text, re.IGNORECASE | re.DOTALL
-    )
-    specs["Rim Angle Material"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(
-        r"Top Member.*?Size\s*=\s*([^\n]+)", text, re.IGNORECASE | re.DOTALL
-    )
-    specs["Rim Angle Size"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(
-        r"Anchors.*?Quantity\s*=\s*(\d+)", text, re.IGNORECASE | re.DOTALL
-    )
-    specs["Anchors Quantity"] = match.group(1) if match else "Not found"
-
-    match = re.search(r"Size\s*=\s*([\d.]+\s*in)", text, re.IGNORECASE)
-    specs["Anchors Size"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(r"Material\s*=\s*([A-Z0-9\-]+)", text, re.IGNORECASE)
-    specs["Anchors Material"] = match.group(1).strip() if match else "Not found"
-
-    match = re.search(r"c\s*=\s*([\d.]+)\s*in", text)
-    specs["Top Plate Thickness (in)"] = match.group(1) if match else "Not found"
-
-    a = re.search(r"a\s*=\s*([\d.]+)\s*in", text)
-    b = re.search(r"b\s*=\s*([\d.]+)\s*in", text)
-    specs["Top Plate Size"] = f"{a.group(1)}, {b.group(1)}" if a and b else "Not found"
-
-    specs["Anchor Chair Quantity"] = specs.get("Anchors Quantity", "Not found")
 
-    try:
-        quantity = int(specs["Anchors Quantity"])
-        specs["Vertical Plate Quantity"] = str(quantity * 2)
-    except:
-        specs["Vertical Plate Quantity"] = "Not found"
-
-    h = re.search(r"h\s*=\s*([\d.]+)\s*in", text)
-    specs["Vertical Plate Size"] = (
-        f"{b.group(1)}, {h.group(1)}" if b and h else "Not found"
-    )
-
-    match = re.search(r"j\s*=\s*([\d.]+)\s*in", text)
-    specs["Vertical Plate Thickness"] = match.group(1) if match else "Not found"
-
-    return specs
-
-
-def get_nozzle_blind_flags(text):
-    lines = text.splitlines()
-    blind_map = {}
-    current_block = []
-
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue
-
-        current_block.append(stripped)
-
-        nozzle_label_match = re.match(r"^(\d{4})\s+NOZZLE$", stripped.upper())
-        if nozzle_label_match:
-            nozzle_number = nozzle_label_match.group(1)
-            nozzle_id = f"Nozzle-{nozzle_number}"
-            block_text = " ".join(current_block).upper()
-            has_blind = "W/ BLIND" in block_text
-            print(f"[BLIND DETECT] {nozzle_id}: {'Yes' if has_blind else 'No'}")
-            blind_map[nozzle_id] = "Yes" if has_blind else "No"
-            current_block = []
-
-    return blind_map
-
-
-def extract_nozzles(text):
-    blind_flags = get_nozzle_blind_flags(text)
-
-    nozzle_blocks = re.findall(
-        r"(Roof|Shell) Nozzle: (Nozzle-(\d+))\s+(.*?)(?=(Roof|Shell) Nozzle:|Roof Manway:|$)",
-        text,
-        re.DOTALL,
+import TSdiag
+from TSrules import SPEC_RULES
+from TSsections import HEADING_RE, NOZZLE_BLOCKS, classify_heading, index_sections
+from TSwords import layout_values, schedule_blind_flags
+
+
+# Everything the nozzle and manway tables read, as one alternation so a single
+# sweep over "\n" + text finds it all in order:
+# - section headings, since nozzle and manway blocks run to the next one;
+# - from the schedule: the location after a size ('2" ROOF'), "W/ BLIND"
+#   within a line or as "W/" ending a line and "BLIND" starting the next
+#   non-blank one, and the labels. pdfplumber ends each row with a label line
+#   ("0001 NOZZLE"); pdfium starts it with one ("Nozzle0001 RN01A A8" ROOF",
+#   with the cell's wrap hyphen as "\x02");
+# - inside a block: the description, repad and neck values.
+# The lookahead on each token's first characters lets most positions fail
+# before any alternative is tried.
+NOZZLE_TOKEN_RE = re.compile(
+    r'(?=\n|"|[Ww]/|N[Oe]|t_|Re|MA)(?:'
+    + "|".join(
+        [
+            rf"(?P<heading_line>{HEADING_RE.pattern})",
+            r'(?P<location>"[^\S\n]+(?P<where>ROOF|SHELL)\b)',
+            r"(?P<blind>(?i:W/(?: |[^\S\n]*\n\s*)BLIND))",
+            r"(?P<label>\n[^\S\n]*(?P<number>\d{4})[^\S\n]+(?i:NOZZLE)[^\S\n]*"
+            r"(?=\n|$))",
+            r"(?P<row>\n[^\S\n]*Nozzle\x02?(?P<row_number>\d{4})(?=[^\S\n]))",
+            r"(?P<description>NOZZLE Description\s*:\s*(?P<size>\d+) in "
+            r"SCH (?P<sch>\d+)\S* TYPE (?P<type>\w+))",
+            r"(?P<t_rpr>t_rpr\s*=\s*(?P<t_rpr_in>[\d.]+)\s*in)",
+            r"(?P<repad_od>Repad Size \(OD\) Must be = (?P<repad_od_in>\d+\.?\d*) in)",
+            r"(?P<repad>Reinforcement Pad is required)",
+            r"(?P<manway_size>MANWAY Description\s*:\s*(?P<manway_in>\d+))",
+            r"(?P<neck>Neck Thickness\s*(?P<neck_in>[\d.]+))",
+        ]
     )
-
+    + ")"
+)
+MANWAY = "Roof Manway"
+
+
+def extract_specs(text, sections=None, tables=None):
+    if sections is None:
+        sections = index_sections(text)
+    layout = layout_values(tables) if tables else None
+    return SPEC_RULES.extract(text, sections, layout=layout)
+
+
+def locate_specs(text, sections=None):
+    if sections is None:
+        sections = index_sections(text)
+    return SPEC_RULES.locate(text, sections)
+
+
+class NozzleScanner:
+    # One sweep over the report for the nozzle and manway tables. Feed it the
+    # whole text, or the pages in order, each with the previous page's last
+    # lines in front and skip= their length so a value that wraps onto the
+    # next page is still found. Blind flags are keyed by (location, label),
+    # like TSwords' schedule, since roof and shell nozzles share numbers; a
+    # row without a location word is a shell row. A row that starts with its
+    # label takes what follows until the next row or heading. Nozzle blocks
+    # are keyed by their tag as printed ("Nozzle-0001", "N5", "SUCTION"), the
+    # schedule's LABEL; the text flags only know numbered labels.
+
+    def __init__(self):
+        self.flags = {}
+        self.entries = []
+        self.manways = []
+        self._location = "SHELL"
+        self._has_blind = False
+        self._row = None
+        self._in_summary = False
+        self._block = None
+        self._values = None
+
+    def feed(self, text, skip=0):
+        for match in NOZZLE_TOKEN_RE.finditer("\n" + text):
+            # Tokens inside the skipped lines were taken with the last feed.
+            if match.end() - 1 <= skip:
+                continue
+            token = match.lastgroup
+            if token == "heading_line":
+                heading, self._in_summary = classify_heading(match, self._in_summary)
+                if heading:
+                    self._end_row()
+                    self._open(heading)
+            elif token == "location":
+                self._location = match.group("where")
+            elif token == "blind":
+                self._has_blind = True
+            elif token == "label":
+                self._end_row()
+                self._flag(match.group("number"))
+            elif token == "row":
+                self._end_row()
+                self._row = match.group("row_number")
+            elif self._values is not None and token not in self._values:
+                # The first of each value in a block counts.
+                self._values[token] = match
+
+    def _flag(self, number):
+        label = (self._location, f"Nozzle-{number}")
+        self.flags[label] = "Yes" if self._has_blind else "No"
+        self._location = "SHELL"
+        self._has_blind = False
+
+    def _end_row(self):
+        if self._row is not None:
+            self._flag(self._row)
+            self._row = None
+
+    def _open(self, heading):
+        self.finish()
+        name, _, _, tag = heading
+        if name in NOZZLE_BLOCKS:
+            self._block = (name.split()[0].upper(), tag)
+        elif name == MANWAY and not self.manways:
+            self._block = MANWAY
+        else:
+            return
+        self._values = {}
+
+    def finish(self):
+        # Closes the open row and block; call once the last text has been fed.
+        self._end_row()
+        block, values = self._block, self._values
+        self._block = self._values = None
+        if block == MANWAY:
+            self.manways = manway_rows(values)
+        elif block is not None and "description" in values:
+            self.entries.append(nozzle_entry(block, values))
+
+
+def _repad(values):
+    t_rpr = values.get("t_rpr")
+    t_rpr_val = float(t_rpr.group("t_rpr_in")) if t_rpr else 0
+    return "repad" in values and t_rpr_val > 0, t_rpr_val
+
+
+def nozzle_entry(nozzle_id, values):
+    repad_required, t_rpr_val = _repad(values)
+    repad_od = ""
+    if repad_required and "repad_od" in values:
+        repad_od = values["repad_od"].group("repad_od_in")
+    key = values["description"].group("size", "sch", "type")
+    return nozzle_id, key, repad_required, repad_od, t_rpr_val
+
+
+def group_nozzles(entries, blind_flags):
     grouped_data = {}
 
-    for _, nozzle_id, _, block, *_ in nozzle_blocks:
-        size_match = re.search(
-            r"NOZZLE Description\s*:\s*(\d+) in SCH (\d+)[\S]* TYPE (\w+)", block
-        )
-        if not size_match:
-            continue
-
-        size, sch, typ = size_match.groups()
-        key = (size, sch, typ)
-
+    for nozzle_id, key, repad_required, repad_od, t_rpr_val in entries:
         if key not in grouped_data:
             grouped_data[key] = {
                 "QTY": 0,
@@ -195,19 +166,9 @@ def extract_nozzles(text):
         if blind_flags.get(nozzle_id, "No") == "Yes":
             grouped_data[key]["Blind Count"] += 1
 
-        has_repad_text = "Reinforcement Pad is required" in block
-        t_rpr_match = re.search(r"t_rpr\s*=\s*([\d.]+)\s*in", block)
-        t_rpr_val = float(t_rpr_match.group(1)) if t_rpr_match else 0
-        repad_required = has_repad_text and t_rpr_val > 0
-
         if repad_required:
-            repad_od_match = re.search(
-                r"Repad Size \(OD\) Must be = (\d+\.?\d*) in", block
-            )
             grouped_data[key]["Repad Required"] = "Yes"
-            grouped_data[key]["Repad OD"] = (
-                repad_od_match.group(1) if repad_od_match else ""
-            )
+            grouped_data[key]["Repad OD"] = repad_od
             grouped_data[key]["Repad Thickness"] = f"{t_rpr_val:.4f}"
 
     result = []
@@ -228,33 +189,62 @@ def extract_nozzles(text):
     return result
 
 
-def extract_manways(text):
-    manway_match = re.search(r"(Roof Manway:.*?)(?=\n\s*\n|$)", text, re.DOTALL)
-    if not manway_match:
-        return []
+def scan_nozzles(text):
+    scanner = NozzleScanner()
+    scanner.feed(text)
+    scanner.finish()
+    TSdiag.count("nozzle_blocks", len(scanner.entries))
+    return scanner
 
-    block = manway_match.group(1)
-    size_match = re.search(r"MANWAY Description\s*:\s*(\d+)", block)
-    neck_match = re.search(r"Neck Thickness\s*([\d.]+)", block)
 
-    size = size_match.group(1) if size_match else "Unknown"
-    neck_thk = neck_match.group(1) if neck_match else "Unknown"
+def extract_nozzles(text, tables=None, scan=None):
+    if scan is None:
+        scan = scan_nozzles(text)
+    with TSdiag.stage("blind_flags"):
+        # The schedule's REMARKS column when the word tables are at hand; the
+        # text flags are the fallback.
+        blind_flags = schedule_blind_flags(tables) if tables else {}
+    with TSdiag.stage("nozzle_grouping"):
+        return group_nozzles(scan.entries, blind_flags or scan.flags)
 
-    has_repad_text = "Reinforcement Pad is required" in block
-    t_rpr_match = re.search(r"t_rpr\s*=\s*([\d.]+)\s*in", block)
-    t_rpr_val = float(t_rpr_match.group(1)) if t_rpr_match else 0
-    repad_required = has_repad_text and t_rpr_val > 0
 
-    repad_od_match = re.search(r"Repad Size \(OD\) Must be = (\d+\.?\d*) in", block)
+def manway_rows(values):
+    size = values.get("manway_size")
+    neck = values.get("neck")
+    repad_required, t_rpr_val = _repad(values)
+    repad_od = values.get("repad_od")
 
     return [
         {
             "QTY": 1,
-            "Size": f'{size}"',
-            "Neck Thickness (in)": neck_thk,
+            "Size": f'{size.group("manway_in") if size else "Unknown"}"',
+            "Neck Thickness (in)": neck.group("neck_in") if neck else "Unknown",
             "Type": "",
             "Repad Required": "Yes" if repad_required else "No",
-            "Repad OD (in)": repad_od_match.group(1) if repad_od_match else "",
+            "Repad OD (in)": repad_od.group("repad_od_in") if repad_od else "",
             "Repad Thickness (in)": f"{t_rpr_val:.4f}" if repad_required else "",
         }
     ]
+
+
+def extract_manways(text, scan=None):
+    # The first roof manway block.
+    if scan is None:
+        scan = scan_nozzles(text)
+    return scan.manways
+
+
+def create_combined_csv(specs_df, nozzle_df=None, manway_df=None):
+    parts = []
+    parts.append("=== TANK SPECS ===")
+    parts.append(specs_df.to_csv(index=False))
+
+    if nozzle_df is not None and not nozzle_df.empty:
+        parts.append("\n=== NOZZLES (Roof & Shell) ===")
+        parts.append(nozzle_df.to_csv(index=False))
+
+    if manway_df is not None and not manway_df.empty:
+        parts.append("\n=== MANWAYS ===")
+        parts.append(manway_df.to_csv(index=False))
+
+    return "\n".join(parts).encode("utf-8")
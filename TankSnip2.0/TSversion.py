@@ -0,0 +1,25 @@
+import hashlib
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+# The extractor modules whose code decides what a parse returns, and the rule
+# file TSrules compiles (TSrules.RULES_FILE). They are hashed as files rather
+# than imported, so the results store can tag rows without loading the PDF
+# and parsing stack or compiling the rules.
+PARSER_MODULES = ("TSutils", "TSrules", "TSsections", "TSstream", "TSwords")
+PARSER_FILES = (
+    *(HERE / f"{module}.py" for module in PARSER_MODULES),
+    HERE.parent / "API_Tank_CSV_Template.csv",
+)
+
+
+def _parser_version():
+    # Parsed results are only valid for the extractor code that produced them;
+    # page text depends on the PDF alone and is cached separately.
+    digest = hashlib.sha256()
+    for path in PARSER_FILES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+PARSER_VERSION = _parser_version()
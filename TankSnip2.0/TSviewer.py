@@ -0,0 +1,164 @@
+import html
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+import streamlit as st
+
+from TSrules import fold_text
+
+# Search stops counting here; the viewer only ever steps through hits.
+MAX_HITS = 1000
+
+FIELD_MARK = '<mark style="background:#ffe066">'
+HIT_MARK = '<mark style="background:#9ad0ff">'
+CURRENT_HIT_MARK = '<mark style="background:#ff9f43">'
+
+INDEX_KEY = "raw_text.index"
+PAGE_KEY = "raw_text.page"
+HIT_KEY = "raw_text.hit"
+QUERY_KEY = "raw_text.query"
+FIELD_KEY = "raw_text.field"
+NO_FIELD = "(none)"
+
+Hit = namedtuple("Hit", "page line start end")
+
+
+class TextIndex:
+    # Page and line offsets into the full text, which is the pages joined with
+    # "\n" exactly as pages_to_text builds it, so extraction spans line up.
+    # Built once per document and kept in the session; every rerun after that
+    # renders a single page.
+
+    def __init__(self, page_texts):
+        self.pages = list(page_texts)
+        self.text = "\n".join(self.pages)
+        self.folded = fold_text(self.text)
+
+        self.page_starts = []
+        pos = 0
+        for page in self.pages:
+            self.page_starts.append(pos)
+            pos += len(page) + 1
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", self.text)]
+        self.page_lines = [
+            bisect_right(self.line_starts, start) - 1 for start in self.page_starts
+        ]
+
+    def locate(self, offset):
+        # (page, line within that page), both 0-based.
+        page = bisect_right(self.page_starts, offset) - 1
+        line = bisect_right(self.line_starts, offset) - 1
+        return page, line - self.page_lines[page]
+
+    def search(self, query, limit=MAX_HITS):
+        needle = fold_text(query)
+        hits = []
+        pos = self.folded.find(needle) if needle else -1
+        while pos != -1 and len(hits) < limit:
+            page, line = self.locate(pos)
+            hits.append(Hit(page, line, pos, pos + len(needle)))
+            pos = self.folded.find(needle, pos + 1)
+        return hits
+
+    def page_html(self, page, marks):
+        # marks: (start, end, opening tag) in full-text offsets. Overlaps are
+        # clipped, earlier marks win.
+        start = self.page_starts[page]
+        end = start + len(self.pages[page])
+        parts, pos = [], start
+        for mark_start, mark_end, tag in sorted(marks):
+            mark_start, mark_end = max(mark_start, pos), min(mark_end, end)
+            if mark_start >= mark_end:
+                continue
+            parts.append(html.escape(self.text[pos:mark_start]))
+            parts.append(f"{tag}{html.escape(self.text[mark_start:mark_end])}</mark>")
+            pos = mark_end
+        parts.append(html.escape(self.text[pos:end]))
+        return "".join(parts)
+
+
+def _show_page(page):
+    st.session_state[PAGE_KEY] = page + 1
+
+
+def _step_hit(hits, step):
+    state = st.session_state
+    state[HIT_KEY] = (state.get(HIT_KEY, -1) + step) % len(hits)
+    _show_page(hits[state[HIT_KEY]].page)
+
+
+def _show_field(index, field_spans):
+    spans = field_spans.get(st.session_state[FIELD_KEY])
+    if spans:
+        _show_page(index.locate(spans[0][0])[0])
+
+
+def _new_query():
+    st.session_state[HIT_KEY] = -1
+
+
+def show_raw_text(doc_key, page_texts, field_spans=None):
+    # field_spans: {field: [(start, end)]} over the full text, as returned by
+    # TSutils.locate_specs.
+    field_spans = field_spans or {}
+    state = st.session_state
+    if state.get(INDEX_KEY, (None,))[0] != doc_key:
+        state[INDEX_KEY] = (doc_key, TextIndex(page_texts))
+        state[PAGE_KEY] = 1
+        state[HIT_KEY] = -1
+        state[FIELD_KEY] = NO_FIELD
+    index = state[INDEX_KEY][1]
+
+    search_col, field_col = st.columns(2)
+    query = search_col.text_input("Search", key=QUERY_KEY, on_change=_new_query)
+    field = field_col.selectbox(
+        "Highlight field",
+        [NO_FIELD, *field_spans],
+        key=FIELD_KEY,
+        on_change=_show_field,
+        args=(index, field_spans),
+    )
+
+    hits = index.search(query) if query else []
+    current = state.get(HIT_KEY, -1)
+    if query:
+        prev_col, next_col, info_col = st.columns([1, 1, 4])
+        for column, label, step in ((prev_col, "◀ Prev", -1), (next_col, "Next ▶", 1)):
+            column.button(
+                label, disabled=not hits, on_click=_step_hit, args=(hits, step)
+            )
+        found = f"{len(hits)}{'+' if len(hits) == MAX_HITS else ''}"
+        if not hits:
+            info_col.caption("No matches")
+        elif 0 <= current < len(hits):
+            hit = hits[current]
+            info_col.caption(
+                f"Match {current + 1} of {found}: "
+                f"page {hit.page + 1}, line {hit.line + 1}"
+            )
+        else:
+            info_col.caption(f"{found} matches")
+
+    page = (
+        st.number_input(
+            f"Page (of {len(index.pages)})",
+            min_value=1,
+            max_value=max(len(index.pages), 1),
+            step=1,
+            key=PAGE_KEY,
+        )
+        - 1
+    )
+    if not index.pages:
+        return
+
+    marks = [(start, end, FIELD_MARK) for start, end in field_spans.get(field, ())]
+    for number, hit in enumerate(hits):
+        if hit.page == page:
+            tag = CURRENT_HIT_MARK if number == current else HIT_MARK
+            marks.append((hit.start, hit.end, tag))
+    st.markdown(
+        f'<pre style="white-space:pre-wrap">{index.page_html(page, marks)}</pre>',
+        unsafe_allow_html=True,
+    )
@@ -0,0 +1,312 @@
+import re
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from statistics import median
+
+# A positioned word, in points from the page's top-left corner.
+Word = namedtuple("Word", "text x0 top x1 bottom")
+Column = namedtuple("Column", "name x0 x1")
+# A table is found by the words of its header line (all on one line) and its
+# rows by the key column: a row is wherever that column holds a matching word.
+TableSpec = namedtuple("TableSpec", "header key pattern")
+
+# Words whose tops are this close share a line.
+LINE_TOLERANCE = 3
+# Characters further apart than this along a line start a new word.
+WORD_GAP = 3
+# Header words closer than this along a line are one cell ("Min Yield").
+CELL_GAP = 5
+# Header lines stacked closer than this belong to the same header.
+HEADER_GAP = 12
+# A vertical gap this tall ends a table.
+TABLE_GAP = 30
+# Row spacing assumed for a table with a single row.
+DEFAULT_ROW_PITCH = 28
+
+# Spec fields (API_Tank_CSV_Template.csv) read from the tables below.
+SHELL_WIDTH_FIELD = "Shell - Size"
+SHELL_THICKNESS_FIELD = "Shell Course {1} Thickness"
+
+TABLES = {
+    # Summary Results: course, width, material, CA, JE, stresses, weight.
+    "shell_courses": TableSpec(("Shell", "Width"), "Shell #", re.compile(r"\d+")),
+    # Its "(continued)" half: weight again, minimum and actual thicknesses.
+    "shell_thickness": TableSpec(("Shell", "t-Actual"), "Shell #", re.compile(r"\d+")),
+    # Appurtenances Plan View / Elevation View schedules. Cells are centred
+    # and wrap over several lines around the MARK, e.g. "Nozzle-" / "0002".
+    "nozzle_schedule": TableSpec(
+        ("LABEL", "MARK", "DESCRIPTION", "REMARKS"),
+        "MARK",
+        re.compile(r"[A-Z]{2}\d{2}[A-Z]"),
+    ),
+}
+
+
+def words_from_chars(chars):
+    # (char, x0, top, x1, bottom) in reading order -> Words, split on
+    # whitespace, on gaps wider than WORD_GAP and on line changes.
+    words = []
+    text, box = [], None
+    for char, x0, top, x1, bottom in chars:
+        if text and (
+            char.isspace()
+            or x0 - box[2] > WORD_GAP
+            or abs(top - box[1]) > LINE_TOLERANCE
+        ):
+            words.append(Word("".join(text), *box))
+            text, box = [], None
+        if char.isspace():
+            continue
+        if box is None:
+            box = [x0, top, x1, bottom]
+        else:
+            box = [box[0], min(box[1], top), max(box[2], x1), max(box[3], bottom)]
+        text.append(char)
+    if text:
+        words.append(Word("".join(text), *box))
+    return words
+
+
+class PageWords:
+    # One page's words grouped into lines, top to bottom: the spatial index
+    # the table readers crop from instead of re-reading the page's text.
+
+    def __init__(self, number, words):
+        self.number = number
+        self.lines = []
+        for word in sorted(words, key=lambda word: (word.top, word.x0)):
+            if self.lines and word.top - self.lines[-1][0].top <= LINE_TOLERANCE:
+                self.lines[-1].append(word)
+            else:
+                self.lines.append([word])
+        for line in self.lines:
+            line.sort(key=lambda word: word.x0)
+        self.tops = [line[0].top for line in self.lines]
+
+    def find_line(self, texts, start=0):
+        # First line from `start` holding every one of texts as a word.
+        for index in range(start, len(self.lines)):
+            if set(texts) <= {word.text for word in self.lines[index]}:
+                return index
+        return None
+
+    def crop(self, x0, top, x1, bottom):
+        # Words whose centre lies inside the box.
+        first = bisect_left(self.tops, top - LINE_TOLERANCE)
+        last = bisect_right(self.tops, bottom)
+        return [
+            word
+            for line in self.lines[first:last]
+            for word in line
+            if x0 <= (word.x0 + word.x1) / 2 <= x1
+            and top <= (word.top + word.bottom) / 2 <= bottom
+        ]
+
+
+def _cells(line):
+    # Runs of header words closer than CELL_GAP, as [x0, x1, [words]].
+    cells = []
+    for word in line:
+        if cells and word.x0 - cells[-1][1] <= CELL_GAP:
+            cells[-1][1] = word.x1
+            cells[-1][2].append(word)
+        else:
+            cells.append([word.x0, word.x1, [word]])
+    return cells
+
+
+def _is_header(line):
+    # A table's header words, or its key column's ("Shell #" over a table of
+    # its own, like the Status one after the shell thicknesses).
+    texts = {word.text for word in line}
+    return any(
+        set(spec.header) <= texts or set(spec.key.split()) <= texts
+        for spec in TABLES.values()
+    )
+
+
+def _header_lines(page, anchor):
+    first = last = anchor
+    while first > 0 and page.tops[first] - page.tops[first - 1] <= HEADER_GAP:
+        first -= 1
+    while (
+        last + 1 < len(page.lines)
+        and page.tops[last + 1] - page.tops[last] <= HEADER_GAP
+    ):
+        last += 1
+    return first, last
+
+
+def _columns(lines):
+    # Header cells stacked over one another ("Width" over "(in)") overlap
+    # horizontally and are merged into one column, named top to bottom.
+    cells = sorted(
+        (cell for line in lines for cell in _cells(line)), key=lambda cell: cell[0]
+    )
+    merged = []
+    for x0, x1, words in cells:
+        if merged and x0 <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], x1)
+            merged[-1][2].extend(words)
+        else:
+            merged.append([x0, x1, list(words)])
+    return [
+        Column(" ".join(word.text for word in _reading_order(words)), x0, x1)
+        for x0, x1, words in merged
+    ]
+
+
+def _column_of(columns, word):
+    # Nearest column centre: works for left-aligned and centred cells alike.
+    centre = (word.x0 + word.x1) / 2
+    return min(columns, key=lambda column: abs((column.x0 + column.x1) / 2 - centre))
+
+
+def _reading_order(words):
+    # Line by line, left to right; tops within a line differ a little by font.
+    lines = []
+    for word in sorted(words, key=lambda word: word.top):
+        if lines and word.top - lines[-1][0].top <= LINE_TOLERANCE:
+            lines[-1].append(word)
+        else:
+            lines.append([word])
+    return [word for line in lines for word in sorted(line, key=lambda w: w.x0)]
+
+
+def _join(words):
+    # Wrapped cells: "A240-" + "304" -> "A240-304", "3\"" + "ROOF" -> "3\" ROOF".
+    text = ""
+    for word in _reading_order(words):
+        text += word.text if not text or text.endswith("-") else " " + word.text
+    return text
+
+
+def _read_rows(page, columns, spec, first, continued=False):
+    # Rows from line `first` down to the first TABLE_GAP or the next table's
+    # header; a row takes the words nearer its key word than any other row's.
+    # Returns the rows and the line after the table, which is the page's last
+    # (its footer) when the table runs on to the next page.
+    key = next(column for column in columns if column.name == spec.key)
+    last = first
+    while (
+        last + 1 < len(page.lines)
+        and page.tops[last + 1] - page.tops[last] <= TABLE_GAP
+        and not _is_header(page.lines[last + 1])
+    ):
+        last += 1
+
+    anchors = [
+        (word.top + word.bottom) / 2
+        for line in page.lines[first : last + 1]
+        for word in line
+        if _column_of(columns, word) is key and spec.pattern.fullmatch(word.text)
+    ]
+    if not anchors:
+        return [], first
+    pitch = DEFAULT_ROW_PITCH
+    if len(anchors) > 1:
+        pitch = median(b - a for a, b in zip(anchors, anchors[1:]))
+    if continued and anchors[0] - pitch / 2 > page.tops[first]:
+        # Rows carried over from the previous page start at the very top.
+        return [], first
+
+    cells = [{} for _ in anchors]
+    # Everything between the header and the first key word is the first
+    # row's; the last row stops half a pitch below its key word.
+    words = page.crop(
+        columns[0].x0 - pitch,
+        page.tops[first],
+        columns[-1].x1 + pitch,
+        anchors[-1] + pitch / 2,
+    )
+    for word in words:
+        middle = (word.top + word.bottom) / 2
+        row = min(range(len(anchors)), key=lambda n: abs(anchors[n] - middle))
+        cells[row].setdefault(_column_of(columns, word).name, []).append(word)
+    rows = [{name: _join(found) for name, found in row.items()} for row in cells]
+    return rows, last + 1
+
+
+def read_tables(pages):
+    # pages: PageWords in page order, typically only those likely to hold a
+    # table plus the page after each. {table name: [row dicts]}, rows keyed
+    # by column header text.
+    tables = {name: [] for name in TABLES}
+    previous = {}
+    for page in pages:
+        for name, spec in TABLES.items():
+            rows = tables[name]
+            carried = previous.get(name)
+            start = 0
+            if carried and carried[0] == page.number - 1:
+                found, start = _read_rows(page, carried[1], spec, 0, continued=True)
+                rows.extend(found)
+                if found and start >= len(page.lines) - 1:
+                    previous[name] = (page.number, carried[1])
+            while True:
+                anchor = page.find_line(spec.header, start)
+                if anchor is None:
+                    break
+                first, last = _header_lines(page, anchor)
+                columns = _columns(page.lines[first : last + 1])
+                if not any(column.name == spec.key for column in columns):
+                    start = anchor + 1
+                    continue
+                found, start = _read_rows(page, columns, spec, last + 1)
+                rows.extend(found)
+                if found and start >= len(page.lines) - 1:
+                    previous[name] = (page.number, columns)
+                start = max(start, anchor + 1)
+    return tables
+
+
+def cell(row, prefix):
+    # The value in the first column whose header starts with prefix.
+    return next((value for name, value in row.items() if name.startswith(prefix)), "")
+
+
+def has_table_header(text):
+    return any(all(word in text for word in spec.header) for spec in TABLES.values())
+
+
+def table_pages(page_texts):
+    # 0-based indexes of the pages whose text has every header word of some
+    # table, plus the page after each for rows carried over.
+    headers = [i for i, text in enumerate(page_texts) if has_table_header(text)]
+    return with_next_pages(headers, len(page_texts))
+
+
+def with_next_pages(indexes, count):
+    pages = set()
+    for index in indexes:
+        pages.update((index, index + 1))
+    return sorted(page for page in pages if page < count)
+
+
+def layout_values(tables):
+    # Raw values for the spec fields these tables hold, in the shape TSrules
+    # gives them from the text: reader rows for "table" fields, match groups
+    # for "each" fields.
+    values = {}
+    widths = [cell(row, "Width") for row in tables.get("shell_courses", ())]
+    if widths:
+        values[SHELL_WIDTH_FIELD] = widths
+    thicknesses = [
+        (cell(row, "Shell"), cell(row, "t-Actual"))
+        for row in tables.get("shell_thickness", ())
+    ]
+    if thicknesses:
+        values[SHELL_THICKNESS_FIELD] = thicknesses
+    return values
+
+
+def schedule_blind_flags(tables):
+    # {("ROOF" or "SHELL", label): "Yes"/"No"} from the nozzle schedule, so
+    # roof and shell nozzles numbered alike keep their own flags.
+    flags = {}
+    for row in tables.get("nozzle_schedule", ()):
+        description = cell(row, "DESCRIPTION")
+        location = "ROOF" if "ROOF" in description else "SHELL"
+        label = cell(row, "LABEL")
+        flags[(location, label)] = "Yes" if "BLIND" in cell(row, "REMARKS") else "No"
+    return flags
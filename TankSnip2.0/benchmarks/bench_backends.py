@@ -0,0 +1,92 @@
+# bench_backends.py
+#
+# Text extraction throughput per backend over the OTTO Checks reports, and
+# how far each backend's specs agree with pdfplumber's (the reference). Specs
+# are read as the pipeline reads them, with the word tables supplying the
+# shell widths and thicknesses. The "probe" column is the check "auto" makes
+# before trusting a fast backend: every spec on the first pages the same as
+# pdfplumber's.
+#
+#   python benchmarks/bench_backends.py
+#   python benchmarks/bench_backends.py report.pdf -n 5
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSpdf import (  # noqa: E402
+    BACKENDS,
+    REFERENCE,
+    open_backend,
+    probe_matches,
+    read_page_tables,
+    select_backend,
+)
+from TSutils import extract_specs  # noqa: E402
+from TSwords import table_pages  # noqa: E402
+
+OTTO_CHECKS = Path(__file__).resolve().parents[2] / "OTTO Checks"
+
+
+def read_text(data, backend):
+    with open_backend(data, backend) as doc:
+        return [doc.page_text(index) for index in range(len(doc))]
+
+
+def best_of(data, backend, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pages = read_text(data, backend)
+        best = min(best, time.perf_counter() - start)
+    return best, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text extraction backends")
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf"))
+    totals = {name: [0, 0.0] for name in BACKENDS}
+    print(
+        f"{'file':<34}{'backend':<12}{'pages':>6}{'ms':>10}{'pages/s':>9}"
+        f"{'probe':>9}{'specs = ref':>13}"
+    )
+    for path in pdfs:
+        data = path.read_bytes()
+        reference = None
+        for name in sorted(BACKENDS, key=lambda n: n != REFERENCE):
+            seconds, pages = best_of(data, name, args.repeat)
+            text = "\n".join(pages)
+            if name == REFERENCE:
+                tables = read_page_tables(data, table_pages(pages))
+            specs = extract_specs(text, tables=tables)
+            if name == REFERENCE:
+                reference = specs
+                probe = "--"
+            else:
+                probe = "ok" if probe_matches(data, name) else "differs"
+            same = sum(specs.get(field) == value for field, value in reference.items())
+            totals[name][0] += len(pages)
+            totals[name][1] += seconds
+            print(
+                f"{path.name[:33]:<34}{name:<12}{len(pages):>6}"
+                f"{seconds * 1000:>10.1f}{len(pages) / seconds:>9.1f}"
+                f"{probe:>9}"
+                f"{f'{same}/{len(reference)}':>13}"
+            )
+        print(f"{'':<34}auto picks {select_backend(data)}")
+
+    print()
+    for name, (pages, seconds) in totals.items():
+        if seconds:
+            print(f"{name:<12}{pages / seconds:>9.1f} pages/s over {pages} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# bench_estimate.py
+#
+# Times the Estimate Sheet export: compiling the template's cell map (what a
+# process does once), then batches of random tanks written as one workbook
+# with a sheet per tank and as a folder of workbooks per quote (two tanks to
+# a quote), with the peak memory of each. Then it reopens the sheets and
+# checks that each steel item's MTRL $ adds up to estimate_steel() (where it
+# prices the whole component) and the LABOR HRS column to estimate_labor(),
+# exiting 1 on a mismatch.
+#
+#   python benchmarks/bench_estimate.py
+#   python benchmarks/bench_estimate.py --sizes 10 100 1000
+
+import argparse
+import gc
+import math
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openpyxl import load_workbook  # noqa: E402
+
+from TSestimate import (  # noqa: E402
+    ITEM_ROWS,
+    LABOR_COLUMN,
+    LABOR_ROWS,
+    STEEL_ITEMS,
+    EstimateBook,
+    estimate_values,
+    export_estimates,
+    load_template,
+    tank_name,
+)
+from TSlabor import estimate_labor  # noqa: E402
+from TSmodel import Manway, Nozzle, TankResult  # noqa: E402
+from TSsteel import estimate_steel  # noqa: E402
+
+MATERIALS = ("A36", "A240-304", "A240-316", "A516-70")
+THICKNESSES = (0.1875, 0.25, 0.3125, 0.375, 0.5)
+NOZZLE_SIZES = (1, 2, 3, 4, 6, 8)
+COST_COLUMN = 5
+ITEMS = {
+    **{label: name for name, label in STEEL_ITEMS.items()},
+    "CONE TOP": "roof",
+    "FLAT TOP": "roof",
+}
+# Each cell is rounded to the cent.
+TOLERANCE = 0.5
+
+
+def random_tank(rng, quote):
+    courses = rng.randint(2, 8)
+    chairs = rng.choice((0, 4, 8))
+    return TankResult(
+        quotation_no=f"Q{quote}",
+        outside_diameter_ft=rng.uniform(4, 16),
+        shell_height_ft=courses * 8.0,
+        shell_material=rng.choice(MATERIALS),
+        shell_course_thickness_in=sorted(
+            (rng.choice(THICKNESSES) for _ in range(courses)), reverse=True
+        ),
+        shell_widths_in=[96.0] * courses,
+        roof_type=rng.choice(("Self Supported Conical Roof", "Flat Roof")),
+        roof_thickness_in=rng.choice(THICKNESSES),
+        bottom_thickness_in=rng.choice(THICKNESSES),
+        rim_angle_size="L3x3x1/4",
+        anchor_chair_quantity=chairs,
+        top_plate_thickness_in=0.5,
+        top_plate_size_in=[8.0, 8.0],
+        vertical_plate_quantity=2 * chairs,
+        vertical_plate_size_in=[8.0, 12.0],
+        vertical_plate_thickness_in=0.5,
+        nozzles=[
+            Nozzle(
+                qty=rng.randint(1, 4),
+                size_in=rng.choice(NOZZLE_SIZES),
+                schedule=rng.choice(("40", "80")),
+                type="RFSO",
+                with_blind=rng.randint(0, 1),
+                repad_required=rng.random() < 0.3,
+                repad_od_in=9.0,
+                repad_thickness_in=0.1875,
+            )
+            for _ in range(rng.randint(0, 10))
+        ],
+        manways=[
+            Manway(
+                qty=1,
+                size_in=rng.choice((20, 24, 30)),
+                neck_thickness_in=0.25,
+                type=None,
+                repad_required=True,
+                repad_od_in=None,
+                repad_thickness_in=None,
+            )
+        ],
+    )
+
+
+def measure(function, *args):
+    # (seconds, peak MB); memory is traced on a second run so that tracing
+    # does not slow the timed one.
+    gc.collect()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def one_workbook(tanks, path):
+    book = EstimateBook()
+    for tank, values in zip(tanks, estimate_values(tanks)):
+        book.add(tank_name(tank), values)
+    book.save(path)
+
+
+def column_total(sheet, rows, column):
+    return sum(
+        value
+        for row in rows
+        if isinstance(value := sheet.cell(row, column).value, (int, float))
+    )
+
+
+def item_costs(sheet):
+    # {component: MTRL $}; continuation rows (blank item) belong to the item
+    # above them.
+    costs = {}
+    item = None
+    for row in ITEM_ROWS:
+        label = sheet.cell(row, 1).value
+        if label:
+            item = ITEMS.get(label)
+        cost = sheet.cell(row, COST_COLUMN).value
+        if item is not None and isinstance(cost, (int, float)):
+            costs[item] = costs.get(item, 0.0) + cost
+    return costs
+
+
+def check(tanks, path):
+    # (sheet, what, sheet total, ours) per tank and steel item.
+    steel = estimate_steel(tanks)
+    hours = estimate_labor(tanks)
+    workbook = load_workbook(path)
+    lines = []
+    for index, sheet in enumerate(workbook.worksheets):
+        # A component with any line that cannot be priced is NaN in the
+        # rollup; the sheet still prices its other lines.
+        for name, total in item_costs(sheet).items():
+            ours = float(steel.cost[name][index])
+            if not math.isnan(ours):
+                lines.append((sheet.title, f"{name} $", total, ours))
+        rows = [*ITEM_ROWS, *LABOR_ROWS.values()]
+        lines.append(
+            (
+                sheet.title,
+                "LABOR HRS",
+                column_total(sheet, rows, LABOR_COLUMN),
+                float(hours["total"][index]),
+            )
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Estimate Sheet export")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[10, 100, 300])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    load_template()
+    print(f"compile template       {(time.perf_counter() - start) * 1000:>9.1f} ms")
+
+    rng = random.Random(args.seed)
+    failed = 0
+    with tempfile.TemporaryDirectory() as folder:
+        print(
+            f"\n{'tanks':>6}{'values ms':>11}{'workbook ms':>13}{'peak MB':>9}"
+            f"{'per quote ms':>14}{'peak MB':>9}{'ms/tank':>9}"
+        )
+        for size in args.sizes:
+            tanks = [random_tank(rng, 9000 + number // 2) for number in range(size)]
+            values, _ = measure(estimate_values, tanks)
+            path = Path(folder) / f"{size}.xlsx"
+            book, book_peak = measure(one_workbook, tanks, path)
+            quotes, quotes_peak = measure(
+                export_estimates, tanks, Path(folder) / str(size)
+            )
+            print(
+                f"{size:>6}{values * 1000:>11.1f}{book * 1000:>13.1f}"
+                f"{book_peak:>9.1f}{quotes * 1000:>14.1f}{quotes_peak:>9.1f}"
+                f"{book * 1000 / size:>9.1f}"
+            )
+            # Checked on the smallest batch, so the check stays quick.
+            if size == min(args.sizes):
+                lines = check(tanks, path)
+
+    print(f"\n{'sheet':<12}{'column':<16}{'sheet':>10}{'ours':>10}")
+    for title, what, total, ours in lines:
+        ok = abs(total - ours) <= TOLERANCE
+        failed += not ok
+        print(
+            f"{title:<12}{what:<16}{total:>10.2f}{ours:>10.2f}"
+            f"  {'ok' if ok else 'DIFF'}"
+        )
+    print(f"\n{failed} mismatches")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+# bench_extract_specs.py
+#
+# Compares the compiled extract_specs in TSutils against the original
+# sequential re.search implementation (kept below as legacy_extract_specs).
+# Fields that differ are listed: the legacy version searches the whole report,
+# the current one reads scoped fields from their own section only.
+#
+# The compiled time includes the section index, a sweep over the whole text.
+# The pipeline builds that index once per report (its "sections" stage) and
+# hands it to extract_specs, so the rules alone are timed too. The synthetic
+# report has every field on its first page, where the legacy searches stop
+# early: there the index costs about what the legacy version saves. The
+# compiled rules pull ahead on real reports, whose fields are spread out.
+#
+#   python benchmarks/bench_extract_specs.py                 # synthetic report
+#   python benchmarks/bench_extract_specs.py report.pdf      # real calc report
+#   python benchmarks/bench_extract_specs.py report.txt -n 50
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSsections import index_sections  # noqa: E402
+from TSutils import extract_specs  # noqa: E402
+from synthetic_report import synthetic_text  # noqa: E402
+
+
+def legacy_extract_specs(text):
+    specs = {}
+
+    ordered_fields = [
+        ("Quotation No", r"Tag ID\s*[:=]?\s*([\w-]+)"),
+        ("Project ID", r"Project\s*=\s*([^\n]+)"),
+        ("Design Standard", r"Design Basis\s*[:=]?\s*([^\n]+)"),
+        ("Annexes Used", r"Annexes Used\s*[:=]?\s*([^\n]+)"),
+        ("Internal Pressure", r"Design Internal Pressure\s*[:=]?\s*([^\n]+)"),
+        ("External Pressure", r"Design External Pressure\s*[:=]?\s*([^\n]+)"),
+        ("Tank Diameter", r"D of Tank\s*=\s*([\d.]+)"),
+        ("Outside Diameter", r"OD of Tank\s*[:=]?\s*([\d.]+)"),
+        ("Inside Diameter", r"ID of Tank\s*[:=]?\s*([\d.]+)"),
+        ("Shell Height", r"Shell Height\s*=\s*([\d.]+)"),
+        ("Standard Gravity (SG)", r"S\.G of Contents\s*[:=]?\s*([\d.]+)"),
+        ("Liquid Level", r"Max Design Liq\. Level\s*[:=]?\s*([\d.]+)"),
+        ("Design Temperature", r"Design Temperature\s*[:=]?\s*([^\n]+)"),
+        ("MDMT", r"\bMDMT\s*[:=]?\s*([^\n]+)"),
+        ("Roof Live Load", r"Roof Live Load\s*[:=]?\s*([^\n]+)"),
+        ("Wind Speed", r"Design Wind Speed.*?=\s*([\d.]+\s*mph)"),
+    ]
+
+    for field, pattern in ordered_fields:
+        match = re.search(pattern, text, re.IGNORECASE)
+        specs[field] = match.group(1).strip() if match else "Not found"
+
+    shell_matches = re.findall(
+        r"Shell\s*\((\d+)\)\s*[A-Z0-9\-]+\s*:\s*([\d.]+)\s*in", text
+    )
+    for course_num, thickness in shell_matches:
+        specs[f"Shell Course {course_num} Thickness"] = f"{thickness} in"
+
+    match_ss = re.search(r"Ss\s*\(g\)\s*=\s*([\d.]+)", text)
+    match_s1 = re.search(r"S1\s*\(g\)\s*=\s*([\d.]+)", text)
+    specs["Seismic Design"] = (
+        f"{match_ss.group(1)}, {match_s1.group(1)}"
+        if match_ss and match_s1
+        else "Not found"
+    )
+
+    shell_widths = []
+    capture = False
+    for line in text.splitlines():
+        if "Shell Width" in line:
+            capture = True
+            continue
+        if capture:
+            if "Shell Weight" in line or "Weight CA" in line:
+                break
+            line = line.strip()
+            if re.match(r"^\d+\s+\d+", line):
+                try:
+                    width = int(re.findall(r"^\d+\s+(\d+)", line)[0])
+                    if 30 <= width <= 120:
+                        shell_widths.append(str(width))
+                except:
+                    continue
+
+    specs["Shell - Size"] = ", ".join(shell_widths) if shell_widths else "Not found"
+
+    shell_course_numbers = re.findall(r"Shell\s*\((\d+)\)", text)
+    specs["Shell - Quantity"] = (
+        str(max(map(int, shell_course_numbers)))
+        if shell_course_numbers
+        else "Not found"
+    )
+
+    match = re.search(r"Roof\s*Type\s*[:=]\s*(.+)", text, re.IGNORECASE)
+    specs["Roof Type"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(r"Plates Material\s*=\s*(.+)", text)
+    specs["Roof Material"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(
+        r"Roof.*?\bt\.actual\s*=\s*([\d.]+)\s*in", text, re.IGNORECASE | re.DOTALL
+    )
+    specs["Roof Thickness"] = match.group(1) + " in" if match else "Not found"
+
+    match = re.search(r"Bottom Material\s*[:=]?\s*(.+)", text)
+    specs["Bottom Material"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(
+        r"Bottom.*?\bt\.actual\s*=\s*([\d.]+)\s*in", text, re.IGNORECASE | re.DOTALL
+    )
+    specs["Bottom Thickness"] = match.group(1) + " in" if match else "Not found"
+
+    match = re.search(
+        r"Top Member.*?Material\s*=\s*([^\n]+)", text, re.IGNORECASE | re.DOTALL
+    )
+    specs["Rim Angle Material"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(
+        r"Top Member.*?Size\s*=\s*([^\n]+)", text, re.IGNORECASE | re.DOTALL
+    )
+    specs["Rim Angle Size"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(
+        r"Anchors.*?Quantity\s*=\s*(\d+)", text, re.IGNORECASE | re.DOTALL
+    )
+    specs["Anchors Quantity"] = match.group(1) if match else "Not found"
+
+    match = re.search(r"Size\s*=\s*([\d.]+\s*in)", text, re.IGNORECASE)
+    specs["Anchors Size"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(r"Material\s*=\s*([A-Z0-9\-]+)", text, re.IGNORECASE)
+    specs["Anchors Material"] = match.group(1).strip() if match else "Not found"
+
+    match = re.search(r"c\s*=\s*([\d.]+)\s*in", text)
+    specs["Top Plate Thickness (in)"] = match.group(1) if match else "Not found"
+
+    a = re.search(r"a\s*=\s*([\d.]+)\s*in", text)
+    b = re.search(r"b\s*=\s*([\d.]+)\s*in", text)
+    specs["Top Plate Size"] = f"{a.group(1)}, {b.group(1)}" if a and b else "Not found"
+
+    specs["Anchor Chair Quantity"] = specs.get("Anchors Quantity", "Not found")
+
+    try:
+        quantity = int(specs["Anchors Quantity"])
+        specs["Vertical Plate Quantity"] = str(quantity * 2)
+    except:
+        specs["Vertical Plate Quantity"] = "Not found"
+
+    h = re.search(r"h\s*=\s*([\d.]+)\s*in", text)
+    specs["Vertical Plate Size"] = (
+        f"{b.group(1)}, {h.group(1)}" if b and h else "Not found"
+    )
+
+    match = re.search(r"j\s*=\s*([\d.]+)\s*in", text)
+    specs["Vertical Plate Thickness"] = match.group(1) if match else "Not found"
+
+    return specs
+
+
+def load_text(path):
+    if path.suffix.lower() == ".pdf":
+        import pdfplumber
+
+        with pdfplumber.open(path) as pdf:
+            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_specs")
+    parser.add_argument("source", nargs="?", help="calc report .pdf or .txt")
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=80, help="synthetic page count")
+    args = parser.parse_args()
+
+    if args.source:
+        text = load_text(Path(args.source))
+        label = args.source
+    else:
+        text = synthetic_text(pages=args.pages)
+        label = f"synthetic ({args.pages} pages)"
+
+    old, new = legacy_extract_specs(text), extract_specs(text)
+    changed = [field for field in old if old[field] != new.get(field)]
+
+    sections = index_sections(text)
+    legacy = best_of(legacy_extract_specs, text, args.repeat)
+    compiled = best_of(extract_specs, text, args.repeat)
+    index = best_of(index_sections, text, args.repeat)
+    rules = best_of(lambda text: extract_specs(text, sections), text, args.repeat)
+    print(f"{label}: {len(text):,} chars")
+    print(f"  legacy   {legacy * 1000:8.3f} ms")
+    print(f"  compiled {compiled * 1000:8.3f} ms  ({legacy / compiled:.1f}x)")
+    print(f"    index  {index * 1000:8.3f} ms")
+    print(f"    rules  {rules * 1000:8.3f} ms  ({legacy / rules:.1f}x)")
+    for field in changed:
+        print(f"  {field}: {old[field]!r} -> {new.get(field)!r}")
+
+
+if __name__ == "__main__":
+    main()
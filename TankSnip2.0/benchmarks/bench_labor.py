@@ -0,0 +1,102 @@
+# bench_labor.py
+#
+# Times the labor-hours engine: compiling the estimating workbooks (what
+# --build does once), loading the compiled labor_tables.json (what the app
+# does once), then estimate_labor() over batches of random tanks in one call
+# and one tank per call.
+#
+#   python benchmarks/bench_labor.py
+#   python benchmarks/bench_labor.py --sizes 100 10000 100000
+
+import argparse
+import gc
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSlabor import LaborTables, compile_tables, estimate_labor  # noqa: E402
+from TSmodel import Manway, Nozzle, TankResult  # noqa: E402
+
+MATERIALS = ("A36", "A240-304", "A240-316", "A516-70")
+THICKNESSES = (0.1875, 0.25, 0.3125, 0.375, 0.5, 0.625, 0.75)
+NOZZLE_SIZES = (1, 2, 3, 4, 6, 8, 10, 12, 16, 24)
+
+
+def random_tank(rng):
+    courses = rng.randint(2, 8)
+    return TankResult(
+        tank_diameter_ft=rng.uniform(2, 16),
+        shell_height_ft=rng.uniform(6, 40),
+        shell_material=rng.choice(MATERIALS),
+        shell_course_thickness_in=sorted(
+            (rng.choice(THICKNESSES) for _ in range(courses)), reverse=True
+        ),
+        roof_type=rng.choice(("Self Supported Conical Roof", "Flat Roof")),
+        anchor_chair_quantity=rng.choice((0, 4, 8)),
+        nozzles=[
+            Nozzle(
+                qty=rng.randint(1, 4),
+                size_in=rng.choice(NOZZLE_SIZES),
+                schedule=None,
+                type="RFSO",
+                with_blind=rng.randint(0, 1),
+                repad_required=rng.random() < 0.3,
+                repad_od_in=None,
+                repad_thickness_in=None,
+            )
+            for _ in range(rng.randint(0, 10))
+        ],
+        manways=[
+            Manway(
+                qty=1,
+                size_in=rng.choice((20, 24, 30, 36)),
+                neck_thickness_in=None,
+                type=None,
+                repad_required=rng.random() < 0.5,
+                repad_od_in=None,
+                repad_thickness_in=None,
+            )
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the labor-hours engine")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1, 100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    compile_tables()
+    print(f"compile workbooks      {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    start = time.perf_counter()
+    tables = LaborTables.load()
+    print(f"load labor_tables.json {(time.perf_counter() - start) * 1000:>9.2f} ms")
+
+    rng = random.Random(args.seed)
+    print(f"\n{'tanks':>8}{'batch ms':>11}{'per tank ms':>13}{'one by one ms':>15}")
+    for size in args.sizes:
+        tanks = [random_tank(rng) for _ in range(size)]
+        # Collect the tanks' garbage now rather than inside the timing.
+        gc.collect()
+        start = time.perf_counter()
+        hours = estimate_labor(tanks, tables)
+        batch = time.perf_counter() - start
+        # Capped so the largest sizes do not take minutes.
+        sample = tanks[:1000]
+        start = time.perf_counter()
+        for tank in sample:
+            estimate_labor([tank], tables)
+        single = (time.perf_counter() - start) / len(sample) * size
+        assert len(hours["total"]) == size
+        print(
+            f"{size:>8}{batch * 1000:>11.2f}{batch * 1000 / size:>13.4f}"
+            f"{single * 1000:>15.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
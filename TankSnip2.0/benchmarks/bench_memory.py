@@ -0,0 +1,61 @@
+# bench_memory.py
+#
+# Peak Python heap of the full-text path (all pages joined, then the three
+# extractors) against the page-streaming parser, on synthetic reports of
+# growing length. The streaming column should stay flat.
+#
+#   python benchmarks/bench_memory.py
+#   python benchmarks/bench_memory.py --pages 100,500,2000
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSstream import parse_pages  # noqa: E402
+from TSutils import extract_manways, extract_nozzles, extract_specs  # noqa: E402
+from synthetic_report import iter_synthetic_pages  # noqa: E402
+
+
+def full_text_path(pages):
+    text = "\n".join(list(pages))
+    return {
+        "specs": extract_specs(text),
+        "nozzles": extract_nozzles(text),
+        "manways": extract_manways(text),
+    }
+
+
+def measure(func, page_count):
+    pages = iter_synthetic_pages(pages=page_count, nozzles=40)
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(pages)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser peak memory")
+    parser.add_argument("--pages", default="50,100,250,500")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'full-text peak':>15} {'streaming peak':>15} {'same':>5}")
+    for page_count in (int(n) for n in args.pages.split(",")):
+        full, full_peak, full_time = measure(full_text_path, page_count)
+        stream, stream_peak, stream_time = measure(parse_pages, page_count)
+        print(
+            f"{page_count:>6} {full_peak / 1024:>12,.0f} KB "
+            f"{stream_peak / 1024:>12,.0f} KB "
+            f"{'yes' if full == stream else 'NO':>5}"
+            f"   ({full_time * 1000:.0f} ms / {stream_time * 1000:.0f} ms)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# bench_nozzles.py
+#
+# Scaling of the nozzle tables with the nozzle count. The original
+# extract_nozzles (kept below) split every line, upper-cased and re-joined
+# each nozzle's lines to look for "W/ BLIND", printed a line per nozzle and
+# cut blocks with a DOTALL lookahead regex; the current one finds headings,
+# schedule labels and blind flags and each block's values in a single
+# tokenizer sweep (TSutils.NozzleScanner). Time per nozzle should stay flat as
+# the count grows, and both tables must match.
+#
+#   python benchmarks/bench_nozzles.py
+#   python benchmarks/bench_nozzles.py --nozzles 100,1000,5000 -n 5
+
+import argparse
+import contextlib
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSutils import extract_nozzles, group_nozzles  # noqa: E402
+from synthetic_report import synthetic_text  # noqa: E402
+
+
+def legacy_blind_flags(text):
+    lines = text.splitlines()
+    blind_map = {}
+    current_block = []
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        current_block.append(stripped)
+
+        nozzle_label_match = re.match(r"^(\d{4})\s+NOZZLE$", stripped.upper())
+        if nozzle_label_match:
+            nozzle_id = f"Nozzle-{nozzle_label_match.group(1)}"
+            has_blind = "W/ BLIND" in " ".join(current_block).upper()
+            print(f"[BLIND DETECT] {nozzle_id}: {'Yes' if has_blind else 'No'}")
+            blind_map[nozzle_id] = "Yes" if has_blind else "No"
+            current_block = []
+
+    return blind_map
+
+
+def legacy_extract_nozzles(text):
+    blind_flags = legacy_blind_flags(text)
+    nozzle_blocks = re.findall(
+        r"(Roof|Shell) Nozzle: (Nozzle-(\d+))\s+(.*?)"
+        r"(?=(Roof|Shell) Nozzle:|Roof Manway:|$)",
+        text,
+        re.DOTALL,
+    )
+
+    entries = []
+    for _, nozzle_id, _, block, *_ in nozzle_blocks:
+        size_match = re.search(
+            r"NOZZLE Description\s*:\s*(\d+) in SCH (\d+)[\S]* TYPE (\w+)", block
+        )
+        if not size_match:
+            continue
+        has_repad_text = "Reinforcement Pad is required" in block
+        t_rpr_match = re.search(r"t_rpr\s*=\s*([\d.]+)\s*in", block)
+        t_rpr_val = float(t_rpr_match.group(1)) if t_rpr_match else 0
+        repad_required = has_repad_text and t_rpr_val > 0
+        repad_od = ""
+        if repad_required:
+            repad_od_match = re.search(
+                r"Repad Size \(OD\) Must be = (\d+\.?\d*) in", block
+            )
+            repad_od = repad_od_match.group(1) if repad_od_match else ""
+        entries.append(
+            (nozzle_id, size_match.groups(), repad_required, repad_od, t_rpr_val)
+        )
+    return group_nozzles(entries, blind_flags)
+
+
+def best_of(func, text, repeat):
+    best = float("inf")
+    # The legacy version prints one line per nozzle.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(text)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_nozzles")
+    parser.add_argument("--nozzles", default="100,200,400,800,1600")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("-n", "--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'nozzles':>8}{'chars':>11}{'legacy ms':>11}{'us/noz':>8}"
+        f"{'current ms':>12}{'us/noz':>8}{'speedup':>9}"
+    )
+    for count in (int(n) for n in args.nozzles.split(",")):
+        text = synthetic_text(pages=args.pages, nozzles=count)
+        with contextlib.redirect_stdout(io.StringIO()):
+            if legacy_extract_nozzles(text) != extract_nozzles(text):
+                sys.exit(f"nozzle tables differ at {count} nozzles")
+
+        legacy = best_of(legacy_extract_nozzles, text, args.repeat)
+        current = best_of(extract_nozzles, text, args.repeat)
+        print(
+            f"{count:>8}{len(text):>11,}{legacy * 1000:>11.2f}"
+            f"{legacy / count * 1e6:>8.1f}{current * 1000:>12.2f}"
+            f"{current / count * 1e6:>8.1f}{legacy / current:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
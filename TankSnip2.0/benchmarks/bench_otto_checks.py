@@ -0,0 +1,375 @@
+# bench_otto_checks.py
+#
+# Speed and accuracy suite over the real calc reports in "OTTO Checks". Each
+# file goes through TSpipeline.process_pdf, the path the app and batch run,
+# inside TSdiag.capture, so the stages timed (p50/p95 over --repeat runs) are
+# the ones TSdiag records there plus the CSV export; peak RSS is per file. The
+# extracted fields are diffed against the golden CSVs next to the PDFs, and
+# the whole run is written as JSON so two runs can be compared.
+#
+#   python benchmarks/bench_otto_checks.py -o before.json
+#   python benchmarks/bench_otto_checks.py -o after.json --compare before.json
+#   python benchmarks/bench_otto_checks.py --backend pdfplumber
+#
+# Goldens are matched to PDFs by quotation number. Two layouts are read:
+# Field,Value exports of the app (Q9003.csv) and the estimator's sheets
+# ("... (ESTIMATE).csv"), from which the fields a calc report also carries
+# are derived: tank size, plate thicknesses, rim angle, anchor chair plates,
+# nozzle and blind flange counts per size and the manway neck.
+
+import argparse
+import csv
+import json
+import platform
+import re
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import TSdiag  # noqa: E402
+from TSpdf import AUTO, BACKEND_CHOICES  # noqa: E402
+from TSpipeline import process_pdf  # noqa: E402
+from TSutils import create_combined_csv  # noqa: E402
+
+OTTO_CHECKS = Path(__file__).resolve().parents[2] / "OTTO Checks"
+
+QUOTE_RE = re.compile(r"Q(\d{4,})")
+NUMBER_RE = re.compile(r"-?\d+/\d+|-?\d*\.?\d+")
+SIZE_RE = re.compile(r'([\d.]+)"\s*(?:OD|ID)\s*X\s*([\d.]+)"', re.I)
+PLATE_RE = re.compile(r'(?:\((\d+)\)\s*)?([\d/.]+)"\s*X\s*([\d.]+)"\s*X\s*([\d.]+)"')
+FLANGE_RE = re.compile(r'([\d.]+)"\s*150#')
+MANWAY_RE = re.compile(r'([\d.]+)"\s*MW NECK')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def _reset_peak_rss():
+    # Linux lets a process reset its own high-water mark, so each file's peak
+    # is its own; elsewhere the peak is process-wide.
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageTimer:
+    # Collects TSdiag's stage times over the runs of one file, in the order
+    # the stages first ran, with the whole capture as "total".
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, diagnostics):
+        for stage, seconds in diagnostics.stages.items():
+            self.samples.setdefault(stage, []).append(seconds)
+        self.samples.setdefault("total", []).append(diagnostics.seconds)
+
+    def summary(self):
+        return {
+            stage: {
+                "runs": len(samples),
+                "p50_ms": percentile(samples, 50) * 1000,
+                "p95_ms": percentile(samples, 95) * 1000,
+                "total_ms": sum(samples) * 1000,
+            }
+            for stage, samples in self.samples.items()
+        }
+
+
+def run_pipeline(data, backend, timer):
+    # No cache, so every run extracts and parses the file from scratch.
+    with TSdiag.capture(log=False) as diagnostics:
+        result = process_pdf(data, backend=backend)
+        with TSdiag.stage("export"):
+            specs_df = pd.DataFrame(result["specs"].items(), columns=["Field", "Value"])
+            nozzle_df = pd.DataFrame(result["nozzles"])
+            create_combined_csv(specs_df, nozzle_df, pd.DataFrame(result["manways"]))
+    timer.add(diagnostics)
+    return result, diagnostics
+
+
+def _numbers(value):
+    numbers = []
+    for token in NUMBER_RE.findall(str(value)):
+        if "/" in token:
+            top, bottom = token.split("/")
+            numbers.append(float(top) / float(bottom))
+        else:
+            numbers.append(float(token))
+    return numbers
+
+
+def values_match(expected, actual):
+    # Numbers are compared as numbers so "3/16" matches "0.1875 in" and
+    # "10" matches "10.0"; anything without numbers is compared as text.
+    if actual is None:
+        return False
+    expected_numbers = _numbers(expected)
+    if expected_numbers:
+        actual_numbers = _numbers(actual)
+        return len(expected_numbers) == len(actual_numbers) and all(
+            abs(e - a) <= 1e-3 * max(1.0, abs(e))
+            for e, a in zip(expected_numbers, actual_numbers)
+        )
+    return str(expected).strip().casefold() == str(actual).strip().casefold()
+
+
+def _read_rows(path):
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        return [[cell.strip() for cell in row] for row in csv.reader(handle)]
+
+
+def _thickness(description):
+    match = PLATE_RE.search(description)
+    return match.group(2) if match else None
+
+
+def _add_count(expected, field, qty):
+    expected[field] = str(int(expected.get(field, "0")) + qty)
+
+
+def estimate_fields(rows):
+    expected = {}
+    item = None
+    chairs = 0
+    for row in rows:
+        row = row + [""] * (3 - len(row))
+        label, qty, description = row[0], row[1], row[2]
+
+        if label == "QUOTATION NO":
+            expected["Quotation No"] = f"Q{qty}"
+        elif label == "DESCRIPTION:" and len(row) > 4:
+            size = SIZE_RE.search(row[4])
+            if size:
+                expected["Tank Diameter"] = f"{float(size.group(1)) / 12:g}"
+                expected["Shell Height"] = f"{float(size.group(2)) / 12:g}"
+
+        # Continuation rows (blank item) belong to the item above them.
+        item = label.upper() or item
+        count = int(qty) if qty.isdigit() else 0
+        plate = PLATE_RE.search(description)
+
+        if label == "CONE TOP" and plate:
+            expected["Roof Thickness"] = plate.group(2)
+        elif label == "BOTTOM" and plate:
+            expected["Bottom Thickness"] = plate.group(2)
+        elif label == "RIM ANGLE" and plate:
+            thickness, leg_a, leg_b = plate.group(2, 3, 4)
+            expected["Rim Angle Size"] = f"L{leg_a}x{leg_b}x{thickness}"
+        elif item == "ANCHOR CHAIRS" and plate:
+            if label:
+                expected["Anchor Chair Quantity"] = str(count)
+                expected["Top Plate Thickness (in)"] = plate.group(2)
+                expected["Top Plate Size"] = f"{plate.group(3)}, {plate.group(4)}"
+                chairs = count
+            else:
+                per_chair = int(plate.group(1) or 1)
+                expected["Vertical Plate Quantity"] = str(per_chair * chairs)
+                expected["Vertical Plate Thickness"] = plate.group(2)
+                expected["Vertical Plate Size"] = f"{plate.group(3)}, {plate.group(4)}"
+        elif label == "FLANGE":
+            size = FLANGE_RE.search(description)
+            if size:
+                _add_count(expected, f'Nozzles {size.group(1)}"', count)
+        elif label == "BLIND FLANGE":
+            size = FLANGE_RE.search(description)
+            if size:
+                _add_count(expected, f'Blind Flanges {size.group(1)}"', count)
+        elif MANWAY_RE.search(label):
+            expected["Manway Size"] = MANWAY_RE.search(label).group(1)
+            expected["Manway Neck Thickness"] = _thickness(description)
+    return expected
+
+
+def load_golden(path):
+    rows = _read_rows(path)
+    if rows and rows[0][:2] == ["Field", "Value"]:
+        return {row[0]: row[1] for row in rows[1:] if len(row) >= 2}
+    return estimate_fields(rows)
+
+
+def actual_fields(result):
+    fields = dict(result["specs"])
+    for row in result["nozzles"]:
+        size = row["Size"]
+        _add_count(fields, f"Nozzles {size}", row["QTY"])
+        _add_count(fields, f"Blind Flanges {size}", row["With Blind"])
+    if result["manways"]:
+        fields["Manway Size"] = result["manways"][0]["Size"]
+        fields["Manway Neck Thickness"] = result["manways"][0]["Neck Thickness (in)"]
+    return fields
+
+
+def diff_fields(expected, actual):
+    fields = []
+    for field, value in expected.items():
+        got = actual.get(field)
+        if got is None and field.startswith(("Nozzles ", "Blind Flanges ")):
+            got = "0"
+        fields.append(
+            {
+                "field": field,
+                "expected": value,
+                "actual": got,
+                "match": values_match(value, got),
+            }
+        )
+    matched = sum(entry["match"] for entry in fields)
+    return {"compared": len(fields), "matched": matched, "fields": fields}
+
+
+def find_goldens(directory):
+    goldens = {}
+    for path in sorted(directory.glob("*.csv")):
+        match = QUOTE_RE.match(path.name)
+        if match:
+            goldens.setdefault(match.group(1), []).append(path)
+    return goldens
+
+
+def run_suite(pdfs, goldens, repeat, backend):
+    files = {}
+    for path in pdfs:
+        data = path.read_bytes()
+        timer = StageTimer()
+        _reset_peak_rss()
+        for _ in range(repeat):
+            result, diagnostics = run_pipeline(data, backend, timer)
+
+        entry = {
+            "pages": len(result["pages"]),
+            "bytes": len(data),
+            "peak_rss_mb": round(_peak_rss_mb() or 0.0, 1),
+            "counts": diagnostics.counts,
+            "stages": timer.summary(),
+        }
+        quote = QUOTE_RE.match(path.name)
+        golden_paths = goldens.get(quote.group(1), []) if quote else []
+        if golden_paths:
+            actual = actual_fields(result)
+            entry["accuracy"] = {
+                golden.name: diff_fields(load_golden(golden), actual)
+                for golden in golden_paths
+            }
+        files[path.name] = entry
+        print(f"{path.name}: {entry['pages']} pages", file=sys.stderr)
+
+    return {
+        "generated": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "backend": backend,
+        "repeat": repeat,
+        "files": files,
+    }
+
+
+def print_report(report):
+    for name, entry in report["files"].items():
+        print(f"\n{name} ({entry['pages']} pages, peak RSS {entry['peak_rss_mb']} MB)")
+        print(f"  {'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+        for stage, stats in entry["stages"].items():
+            print(
+                f"  {stage:<16}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                f"{stats['total_ms'] / stats['runs']:>10.2f}"
+            )
+        for golden, accuracy in entry.get("accuracy", {}).items():
+            print(f"  {golden}: {accuracy['matched']}/{accuracy['compared']} fields")
+            for field in accuracy["fields"]:
+                if not field["match"]:
+                    print(
+                        f"    {field['field']}: expected {field['expected']!r}, "
+                        f"got {field['actual']!r}"
+                    )
+
+
+def compare_reports(baseline, current, threshold):
+    # Returns the regressions: stages whose p50 grew by more than threshold
+    # (a fraction) and golden fields that matched before and no longer do.
+    regressions = []
+    for name, entry in current["files"].items():
+        before = baseline["files"].get(name)
+        if before is None:
+            continue
+
+        for stage, stats in entry["stages"].items():
+            old = before["stages"].get(stage)
+            if not old or old["p50_ms"] <= 0:
+                continue
+            change = stats["p50_ms"] / old["p50_ms"] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{name} {stage}: p50 {old['p50_ms']:.2f} -> "
+                    f"{stats['p50_ms']:.2f} ms (+{change:.0%})"
+                )
+
+        for golden, accuracy in entry.get("accuracy", {}).items():
+            old = before.get("accuracy", {}).get(golden)
+            if not old:
+                continue
+            was_matching = {f["field"] for f in old["fields"] if f["match"]}
+            for field in accuracy["fields"]:
+                if field["field"] in was_matching and not field["match"]:
+                    regressions.append(
+                        f"{name} {field['field']}: now {field['actual']!r}, "
+                        f"expected {field['expected']!r}"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--goldens", type=Path, default=OTTO_CHECKS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--backend", choices=BACKEND_CHOICES, default=AUTO)
+    parser.add_argument("-o", "--out", type=Path, help="write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON report")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="allowed p50 slowdown (0.2 = 20%%)"
+    )
+    args = parser.parse_args(argv)
+
+    pdfs = args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf"))
+    report = run_suite(pdfs, find_goldens(args.goldens), args.repeat, args.backend)
+    print_report(report)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare_reports(baseline, report, args.threshold)
+        print(f"\n{len(regressions)} regressions against {args.compare.name}")
+        for line in regressions:
+            print(f"  {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
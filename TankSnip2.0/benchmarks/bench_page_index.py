@@ -0,0 +1,69 @@
+# bench_page_index.py
+#
+# Layout extraction of every page (pdfplumber) against the "selective"
+# backend, which indexes keywords from the fast backend's text and runs
+# pdfplumber only on the pages the extractors read. Reports pages skipped,
+# wall time saved and whether specs, nozzles and manways still match.
+#
+#   python benchmarks/bench_page_index.py
+#   python benchmarks/bench_page_index.py report.pdf -n 5
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import TSdiag  # noqa: E402
+from TSpdf import REFERENCE, SELECTIVE, extract_pages, pages_to_text  # noqa: E402
+from TSpipeline import parse_text  # noqa: E402
+
+OTTO_CHECKS = Path(__file__).resolve().parents[2] / "OTTO Checks"
+
+
+def best_of(data, backend, repeat):
+    best, pages, skipped = float("inf"), None, 0
+    for _ in range(repeat):
+        with TSdiag.capture(log=False) as diagnostics:
+            start = time.perf_counter()
+            pages = extract_pages(data, workers=1, backend=backend)
+            best = min(best, time.perf_counter() - start)
+        skipped = diagnostics.counts.get("pages.skipped", 0)
+    return best, pages, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the keyword page index")
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf"))
+    full_total = selective_total = 0.0
+    print(
+        f"{'file':<34}{'pages':>6}{'skipped':>9}{'full ms':>10}"
+        f"{'selective ms':>14}{'saved':>8}{'same':>6}"
+    )
+    for path in pdfs:
+        data = path.read_bytes()
+        full, full_pages, _ = best_of(data, REFERENCE, args.repeat)
+        selective, pages, skipped = best_of(data, SELECTIVE, args.repeat)
+        same = parse_text(pages_to_text(full_pages)) == parse_text(pages_to_text(pages))
+        full_total += full
+        selective_total += selective
+        print(
+            f"{path.name[:33]:<34}{len(pages):>6}{skipped:>9}{full * 1000:>10.1f}"
+            f"{selective * 1000:>14.1f}{1 - selective / full:>8.0%}"
+            f"{'yes' if same else 'NO':>6}"
+        )
+
+    if full_total:
+        print(
+            f"\ntotal {full_total:.2f}s -> {selective_total:.2f}s "
+            f"({1 - selective_total / full_total:.0%} saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# bench_pdf_pages.py
+#
+# Times per-page text extraction at different worker counts so the scaling of
+# TSpdf.extract_pages can be checked on a given machine.
+#
+#   python benchmarks/bench_pdf_pages.py                       # OTTO Checks PDFs
+#   python benchmarks/bench_pdf_pages.py report.pdf --workers 1,4,16
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSpdf import default_workers, extract_pages  # noqa: E402
+
+OTTO_CHECKS = Path(__file__).resolve().parents[2] / "OTTO Checks"
+
+
+def worker_counts(spec):
+    if spec:
+        return [int(n) for n in spec.split(",")]
+    counts, n = [], 1
+    while n < default_workers():
+        counts.append(n)
+        n *= 2
+    return counts + [default_workers()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF page extraction")
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--workers", help="comma separated worker counts")
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf"))
+    for path in pdfs:
+        data = path.read_bytes()
+        print(path.name)
+        baseline = None
+        for workers in worker_counts(args.workers):
+            # First call starts the pool; only warm runs are timed.
+            extract_pages(data, workers=workers, min_parallel_pages=0)
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                pages = extract_pages(data, workers=workers, min_parallel_pages=0)
+                wall = time.perf_counter() - start
+                best = wall if best is None else min(best, wall)
+            baseline = baseline or best
+            page_seconds = [page.seconds for page in pages]
+            print(
+                f"  workers={workers:<3} pages={len(pages):<4} "
+                f"wall={best * 1000:8.1f} ms  "
+                f"wall/page={best / len(pages) * 1000:7.2f} ms  "
+                f"slowest page={max(page_seconds) * 1000:7.2f} ms  "
+                f"speedup={baseline / best:4.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench_regex_guard.py
+#
+# Feeds the full parser (sections, spec rules, nozzles, manways) large and
+# adversarial texts and reports the worst-case latency, to show the guarded
+# matching in TSrules keeps it bounded. Spec matching stops at the document
+# budget (characters handed to the regex engine); anything above that is the
+# linear passes (sections, tables, nozzles) over a very large text. Fields
+# that ran out of budget read "Timed out".
+#
+#   python benchmarks/bench_regex_guard.py
+#   python benchmarks/bench_regex_guard.py --fuzz 50 --size 2000000
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import TSdiag  # noqa: E402
+from synthetic_report import synthetic_text  # noqa: E402
+from TSpipeline import parse_text  # noqa: E402
+from TSrules import DOCUMENT_CHARS, SPEC_RULES, TIMEOUT  # noqa: E402
+from TSstream import parse_pages  # noqa: E402
+
+# Anchors and value shapes the rules look for, mixed at random by the fuzzer.
+FUZZ_TOKENS = [
+    *(
+        rule.matcher.rule[0].decode("latin-1")
+        for rule in SPEC_RULES.rules
+        if rule.kind == "first" and rule.matcher.rule
+    ),
+    *("Shell (", ")", "Roof", "Type", "Material", "Size", "=", ":", " = "),
+    *("1.", "0.25", "in", "ft", "mph", "A36", "Nozzle-0001", "W/", "BLIND"),
+    *(" ", "  ", "\t", "\n", "\n\n"),
+]
+
+
+def adversarial_cases(size):
+    report = synthetic_text(pages=40, nozzles=40)
+    repeat = max(1, size // len(report))
+    yield "report", report
+    yield "report x large", "\n".join([report] * repeat)
+    # A missing "=" turns "Design Wind Speed.*?=" into a scan to the end of
+    # the line from every occurrence of the anchor.
+    yield "anchor flood", "Design Wind Speed " * (size // 18)
+    yield "one line", report.replace("\n", " ") * repeat
+    yield "number run", "Anchor Chair Design\nc = " + "1." * (size // 2)
+    yield "shell flood", ("Shell (1) " + "A36-" * 50) * (size // 210)
+    yield "whitespace", "Tag ID" + " " * size
+
+
+def fuzz_cases(count, size, seed):
+    rng = random.Random(seed)
+    for n in range(count):
+        tokens = rng.choices(FUZZ_TOKENS, k=size // 6)
+        yield f"fuzz {n}", "".join(tokens)
+
+
+def run(name, text):
+    with TSdiag.capture(log=False) as diagnostics:
+        start = time.perf_counter()
+        results = parse_text(text)
+        full = time.perf_counter() - start
+    start = time.perf_counter()
+    parse_pages(text[i : i + 20000] for i in range(0, len(text), 20000))
+    stream = time.perf_counter() - start
+    timeouts = sum(value == TIMEOUT for value in results["specs"].values())
+    specs = diagnostics.stages.get("extract_specs", 0.0)
+    return full, stream, specs, timeouts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the guarded regex layer")
+    parser.add_argument("--size", type=int, default=4_000_000, help="chars per case")
+    parser.add_argument("--fuzz", type=int, default=10, help="random documents")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<16}{'chars':>10}{'parse ms':>10}{'stream ms':>11}"
+        f"{'specs ms':>10}{'timeouts':>10}"
+    )
+    worst_specs = worst = 0.0
+    cases = [
+        *adversarial_cases(args.size),
+        *fuzz_cases(args.fuzz, args.size, args.seed),
+    ]
+    for name, text in cases:
+        full, stream, specs, timeouts = run(name, text)
+        worst = max(worst, full, stream)
+        worst_specs = max(worst_specs, specs)
+        print(
+            f"{name:<16}{len(text):>10}{full * 1000:>10.1f}{stream * 1000:>11.1f}"
+            f"{specs * 1000:>10.1f}{timeouts:>10}"
+        )
+
+    print(
+        f"\nworst spec matching {worst_specs:.2f}s "
+        f"(document budget {DOCUMENT_CHARS:,} chars), worst parse {worst:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# bench_service.py
+#
+# Load test for TSserver.py: several client threads, each on its own
+# keep-alive connection, post the OTTO Checks reports for a fixed time and
+# the run reports requests/s, files/s and latency percentiles. 503s (the
+# service pushing back) are counted and retried after Retry-After.
+#
+#   python benchmarks/bench_service.py --spawn --workers 4 -c 8
+#   python benchmarks/bench_service.py --url http://127.0.0.1:8650 --batch 4
+#
+# --spawn starts the service itself (without the result cache or store, so
+# every request is a real extraction) and also times its start-up.
+
+import argparse
+import base64
+import http.client
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+OTTO_CHECKS = ROOT.parent / "OTTO Checks"
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def spawn(port, workers, backend):
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "TSserver.py"),
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--backend",
+            backend,
+            "--no-cache",
+            "--no-store",
+            "--quiet",
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    # The service prints one line once its workers are up.
+    print(process.stdout.readline().strip())
+    print(f"start-up {time.perf_counter() - start:.2f}s")
+    return process
+
+
+class Client(threading.Thread):
+    def __init__(self, url, requests, deadline):
+        super().__init__(daemon=True)
+        self.url = url
+        self.requests = requests
+        self.deadline = deadline
+        self.latencies = []
+        self.files = 0
+        self.busy = 0
+        self.errors = 0
+
+    def run(self):
+        connection = http.client.HTTPConnection(self.url.hostname, self.url.port)
+        n = 0
+        while time.perf_counter() < self.deadline:
+            path, body, files = self.requests[n % len(self.requests)]
+            start = time.perf_counter()
+            connection.request("POST", path, body)
+            response = connection.getresponse()
+            payload = response.read()
+            if response.status == 503:
+                self.busy += 1
+                time.sleep(float(response.getheader("Retry-After", "1")))
+                continue
+            self.latencies.append(time.perf_counter() - start)
+            if response.status != 200:
+                self.errors += 1
+            else:
+                results = json.loads(payload).get("results")
+                self.errors += sum("error" in r for r in results or ())
+                self.files += files
+            n += 1
+        connection.close()
+
+
+def build_requests(pdfs, batch, backend):
+    query = f"backend={backend}"
+    if batch <= 1:
+        return [(f"/extract?{query}&name={p.name}", p.read_bytes(), 1) for p in pdfs]
+    encoded = [
+        {"name": p.name, "pdf": base64.b64encode(p.read_bytes()).decode("ascii")}
+        for p in pdfs
+    ]
+    requests = []
+    for first in range(0, len(encoded), batch):
+        files = (encoded * batch)[first : first + batch]
+        body = json.dumps({"files": files}).encode("utf-8")
+        requests.append((f"/extract/batch?{query}", body, len(files)))
+    return requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the extraction service")
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("--url", default="http://127.0.0.1:8650")
+    parser.add_argument("--spawn", action="store_true", help="start TSserver.py")
+    parser.add_argument("--workers", type=int, default=4, help="with --spawn")
+    parser.add_argument("--backend", default="pdfium")
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("-d", "--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--batch", type=int, default=1, help="files per request")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    server = spawn(url.port, args.workers, args.backend) if args.spawn else None
+    try:
+        requests = build_requests(
+            args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf")), args.batch, args.backend
+        )
+        start = time.perf_counter()
+        clients = [
+            Client(url, requests[n:] + requests[:n], start + args.duration)
+            for n in range(args.concurrency)
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies = [seconds for client in clients for seconds in client.latencies]
+    if not latencies:
+        print("no requests completed")
+        return
+    files = sum(client.files for client in clients)
+    print(
+        f"{len(latencies)} requests ({files} files) in {elapsed:.1f}s with "
+        f"{args.concurrency} clients, {args.batch} file(s) per request"
+    )
+    print(f"  {len(latencies) / elapsed:.2f} requests/s, {files / elapsed:.2f} files/s")
+    print(
+        "  latency ms: "
+        + ", ".join(
+            f"p{round(fraction * 100)} {percentile(latencies, fraction) * 1000:.0f}"
+            for fraction in (0.5, 0.9, 0.99)
+        )
+        + f", max {max(latencies) * 1000:.0f}"
+    )
+    print(
+        f"  503 busy {sum(c.busy for c in clients)}, "
+        f"errors {sum(c.errors for c in clients)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+# bench_steel.py
+#
+# Times the steel weight and cost rollup (compiling the workbooks, loading
+# steel_tables.json, estimate_steel() over batches of random tanks), then
+# checks it against the Estimate Sheet V 2.0 numbers and exits 1 on a
+# mismatch:
+#
+# - every plate line formula in the Estimate Sheet workbooks,
+#   =qty*width*length*lbs/144*price, against plate_weight() at that price;
+# - the OTTO Checks estimates ("... (ESTIMATE).csv", exported from the
+#   Estimate Sheet): the shell, cone top, bottom, rim angle and anchor chair
+#   lines, weighed with the sheet's own LBS/SQ. FT. table, against
+#   estimate_steel() on the quote's calc report. Only the weights are
+#   checked: the sheets were priced at the day's $/lb, which nothing in the
+#   repo records, so their dollars, the $/lb they imply and the Pricing.xlsx
+#   cost are printed for reference only.
+#
+#   python benchmarks/bench_steel.py
+#   python benchmarks/bench_steel.py --sizes 100 10000 100000
+
+import argparse
+import csv
+import gc
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSlabor import STAINLESS_RE, load_workbook  # noqa: E402
+from TSmodel import TankResult  # noqa: E402
+from TSpipeline import process_pdf  # noqa: E402
+from TSsteel import (  # noqa: E402
+    ANGLE_STICK_FT,
+    ROOT,
+    SteelTables,
+    compile_tables,
+    estimate_steel,
+    plate_weight,
+    thickness,
+)
+
+OTTO_CHECKS = ROOT / "OTTO Checks"
+WORKBOOKS = (
+    ROOT / "Estimate Sheet V 2.0 - Kelly.xlsx",
+    OTTO_CHECKS / "Estimate Sheet V 2.0 - Chris.xlsx",
+)
+
+MATERIALS = ("A36", "A240-304", "A240-316", "A516-70")
+THICKNESSES = (0.1875, 0.25, 0.3125, 0.375, 0.5)
+ANGLES = ("L2x2x3/16", "L2x2x1/4", "L3x3x1/4", "L3x3x3/8")
+
+# =B24*10*36*11.16/144*2.09; the qty cell is left out on some lines.
+FORMULA_RE = re.compile(
+    r"=(?:(\$?[A-Z]+\$?\d+)\*)?([\d.]+)\*([\d.]+)\*([\d.]+)/144\*([\d.]+)$"
+)
+QUOTE_RE = re.compile(r"Q(\d{4,})")
+# '(2) 1/2" X 8" X 12"', '3/8" X 3" X 3" x 38'   MF: (2) 20' ANGLE'
+PLATE_RE = re.compile(
+    r'(?:\((\d+)\)\s*)?([\d/-]+)"\s*X\s*([\d.]+)"\s*X\s*([\d.]+)"', re.IGNORECASE
+)
+STICKS_RE = re.compile(r"MF:\s*\((\d+)\)\s*20' ANGLE")
+ITEMS = {
+    "SHELL": "shell",
+    "CONE TOP": "roof",
+    "FLAT TOP": "roof",
+    "BOTTOM": "bottom",
+    "RIM ANGLE": "rim_angle",
+    "ANCHOR CHAIRS": "anchor_chairs",
+}
+TOLERANCE = 0.005
+
+
+def random_tank(rng):
+    courses = rng.randint(2, 8)
+    material = rng.choice(MATERIALS)
+    chairs = rng.choice((0, 4, 8))
+    return TankResult(
+        outside_diameter_ft=rng.uniform(4, 20),
+        shell_height_ft=courses * 8.0,
+        shell_material=material,
+        shell_course_thickness_in=sorted(
+            (rng.choice(THICKNESSES) for _ in range(courses)), reverse=True
+        ),
+        shell_widths_in=[rng.choice((48.0, 60.0, 96.0))] * courses,
+        roof_thickness_in=rng.choice(THICKNESSES),
+        bottom_thickness_in=rng.choice(THICKNESSES),
+        rim_angle_size=rng.choice(ANGLES),
+        anchor_chair_quantity=chairs,
+        top_plate_thickness_in=0.5,
+        top_plate_size_in=[8.0, 8.0],
+        vertical_plate_quantity=2 * chairs,
+        vertical_plate_size_in=[8.0, 12.0],
+        vertical_plate_thickness_in=0.5,
+    )
+
+
+def check_formulas(tables):
+    # Plate line formulas in the workbooks, recomputed from the description
+    # (thickness) and MOC beside them: (description, sheet value, ours).
+    lines = []
+    for path in WORKBOOKS:
+        formulas = load_workbook(path, formulas=True)
+        values = load_workbook(path, formulas=False)
+        for sheet in formulas:
+            for row in sheet.iter_rows():
+                for cell in row:
+                    found = FORMULA_RE.match(str(cell.value))
+                    if not found:
+                        continue
+                    qty_cell, *numbers = found.groups()
+                    width, length, _, price = map(float, numbers)
+                    qty = sheet[qty_cell.replace("$", "")].value if qty_cell else 1
+                    description = sheet.cell(cell.row, cell.column - 2).value
+                    material = sheet.cell(cell.row, cell.column - 1).value
+                    plate = PLATE_RE.search(str(description))
+                    weight = plate_weight(
+                        qty,
+                        width,
+                        length,
+                        thickness(plate.group(2) + '"'),
+                        material,
+                        tables,
+                    )
+                    sheet_value = values[sheet.title][cell.coordinate].value
+                    lines.append(
+                        (
+                            f"{path.stem[-5:]}!{sheet.title}!{cell.coordinate}",
+                            sheet_value,
+                            weight * price,
+                        )
+                    )
+    return lines
+
+
+def sheet_lb_per_sqft(rows):
+    # {thickness: (SS, CST) lbs/sq ft} from the estimate's weight table.
+    table = {}
+    for row in rows:
+        plate, *weights = (row + [""] * 17)[14:17]
+        if thickness(plate) is not None and all(
+            re.fullmatch(r"[\d.]+", weight) for weight in weights
+        ):
+            table[thickness(plate)] = tuple(map(float, weights))
+    return table
+
+
+def estimate_lines(path):
+    # {component: [sheet lb, sheet $]} from one estimate CSV, weighed with its
+    # own lbs/sq ft table.
+    with open(path, newline="", encoding="utf-8-sig", errors="replace") as handle:
+        rows = [[cell.strip() for cell in row] for row in csv.reader(handle)]
+    lb_per_sqft = sheet_lb_per_sqft(rows)
+    totals = {}
+    item = chairs = None
+    for row in rows:
+        label, qty, description, material, dollars = (row + [""] * 5)[:5]
+        # Continuation rows (blank item) belong to the item above them.
+        if label:
+            item = ITEMS.get(label.upper())
+        plate = PLATE_RE.search(description)
+        if item is None or plate is None or not dollars:
+            continue
+        count = int(qty) if qty.isdigit() else 1
+        per, size, width, length = plate.groups()
+        kind = 0 if STAINLESS_RE.search(material) else 1
+        if item == "anchor_chairs":
+            # "(1) top plate" on the chair row, "(2) verticals" per chair below.
+            chairs = count if label else chairs
+            count = int(per or 1) * chairs
+        if item == "rim_angle":
+            # Equal leg angle weighs what plate of its cross section does.
+            sticks = int(STICKS_RE.search(description).group(1))
+            angle_in, leg_in = thickness(size + '"'), float(width)
+            section_in2 = (2 * leg_in - angle_in) * angle_in
+            weight = (
+                sticks * ANGLE_STICK_FT * section_in2 * lb_per_sqft[1.0][kind] / 12
+            )
+        else:
+            area_in2 = count * float(width) * float(length)
+            weight = area_in2 * lb_per_sqft[thickness(size + '"')][kind] / 144
+        line = totals.setdefault(item, [0.0, 0.0])
+        line[0] += weight
+        line[1] += float(dollars.replace(",", ""))
+    return totals
+
+
+def check_estimates(tables):
+    # (quote, component, sheet lb, our lb, sheet $/lb, sheet $, our $ at
+    # Pricing.xlsx's $/lb).
+    pdfs = {
+        QUOTE_RE.match(path.name).group(1): path
+        for path in OTTO_CHECKS.glob("Q*.pdf")
+    }
+    lines = []
+    for path in sorted(OTTO_CHECKS.glob("Q*(ESTIMATE).csv")):
+        quote = QUOTE_RE.match(path.name).group(1)
+        result = TankResult.from_report(process_pdf(pdfs[quote].read_bytes()))
+        steel = estimate_steel([result], tables)
+        for component, (pounds, dollars) in estimate_lines(path).items():
+            lines.append(
+                (
+                    f"Q{quote}",
+                    component,
+                    pounds,
+                    float(steel.weight_lb[component][0]),
+                    dollars / pounds,
+                    dollars,
+                    float(steel.cost[component][0]),
+                )
+            )
+    return lines
+
+
+def close(expected, actual):
+    return abs(expected - actual) <= TOLERANCE * max(1.0, abs(expected))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the steel rollup")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1, 100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    compile_tables()
+    print(f"compile workbooks      {(time.perf_counter() - start) * 1000:>9.1f} ms")
+    start = time.perf_counter()
+    tables = SteelTables.load()
+    print(f"load steel_tables.json {(time.perf_counter() - start) * 1000:>9.2f} ms")
+
+    rng = random.Random(args.seed)
+    print(f"\n{'tanks':>8}{'batch ms':>11}{'per tank ms':>13}{'one by one ms':>15}")
+    for size in args.sizes:
+        tanks = [random_tank(rng) for _ in range(size)]
+        # Collect the tanks' garbage now rather than inside the timing.
+        gc.collect()
+        start = time.perf_counter()
+        steel = estimate_steel(tanks, tables)
+        batch = time.perf_counter() - start
+        # Capped so the largest sizes do not take minutes.
+        sample = tanks[:1000]
+        start = time.perf_counter()
+        for tank in sample:
+            estimate_steel([tank], tables)
+        single = (time.perf_counter() - start) / len(sample) * size
+        assert len(steel.cost["total"]) == size
+        print(
+            f"{size:>8}{batch * 1000:>11.2f}{batch * 1000 / size:>13.4f}"
+            f"{single * 1000:>15.1f}"
+        )
+
+    failed = 0
+    print(f"\n{'plate line formula':<42}{'sheet $':>10}{'ours $':>10}")
+    for where, expected, actual in check_formulas(tables):
+        ok = close(expected, actual)
+        failed += not ok
+        print(f"{where:<42}{expected:>10.2f}{actual:>10.2f}  {'ok' if ok else 'DIFF'}")
+
+    print(
+        f"\n{'estimate':<10}{'component':<15}{'sheet lb':>10}{'ours lb':>10}"
+        f"{'sheet $/lb':>11}{'sheet $':>9}{'Pricing $':>11}"
+    )
+    for quote, component, pounds, ours, rate, dollars, priced in check_estimates(
+        tables
+    ):
+        # Weights only; the dollars are for reference.
+        ok = close(pounds, ours)
+        failed += not ok
+        print(
+            f"{quote:<10}{component:<15}{pounds:>10.1f}{ours:>10.1f}"
+            f"{rate:>11.3f}{dollars:>9.0f}{priced:>11.0f}  {'ok' if ok else 'DIFF'}"
+        )
+    print(f"\n{failed} mismatches")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# bench_word_tables.py
+#
+# Shell course and nozzle schedule tables over the OTTO Checks reports, read
+# two ways: the text path (pdfplumber's extract_text on the pages holding a
+# table, then the spec rules' line regexes) and the word path (positioned
+# words from each backend, read by column in TSwords). Prints the time for
+# each and whether the word path gives every backend the same tables.
+#
+#   python benchmarks/bench_word_tables.py
+#   python benchmarks/bench_word_tables.py report.pdf -n 5
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from TSpdf import BACKENDS, REFERENCE, open_backend  # noqa: E402
+from TSutils import extract_specs  # noqa: E402
+from TSwords import (  # noqa: E402
+    SHELL_WIDTH_FIELD,
+    PageWords,
+    layout_values,
+    read_tables,
+    table_pages,
+)
+
+OTTO_CHECKS = Path(__file__).resolve().parents[2] / "OTTO Checks"
+
+
+def text_path(data, indexes):
+    with open_backend(data, REFERENCE) as doc:
+        text = "\n".join(doc.page_text(index) for index in indexes)
+    return extract_specs(text)[SHELL_WIDTH_FIELD]
+
+
+def word_path(data, indexes, backend):
+    with open_backend(data, backend) as doc:
+        pages = [PageWords(index + 1, doc.page_words(index)) for index in indexes]
+    return read_tables(pages)
+
+
+def best_of(repeat, function, *args):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark word-position tables")
+    parser.add_argument("pdfs", nargs="*", type=Path)
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(OTTO_CHECKS.glob("Q*.pdf"))
+    print(
+        f"{'file':<34}{'pages':>6}{'text ms':>9}"
+        + "".join(f"{name + ' ms':>15}" for name in BACKENDS)
+        + f"{'rows':>6}{'same':>6}  widths"
+    )
+    for path in pdfs:
+        data = path.read_bytes()
+        with open_backend(data, next(iter(BACKENDS))) as doc:
+            indexes = table_pages([doc.page_text(i) for i in range(len(doc))])
+        text_seconds, text_widths = best_of(args.repeat, text_path, data, indexes)
+        timings, tables = {}, {}
+        for name in BACKENDS:
+            timings[name], tables[name] = best_of(
+                args.repeat, word_path, data, indexes, name
+            )
+        reference = tables[REFERENCE]
+        same = all(found == reference for found in tables.values())
+        widths = ", ".join(layout_values(reference).get(SHELL_WIDTH_FIELD, ()))
+        print(
+            f"{path.name[:33]:<34}{len(indexes):>6}{text_seconds * 1000:>9.1f}"
+            + "".join(f"{timings[name] * 1000:>15.1f}" for name in BACKENDS)
+            + f"{sum(map(len, reference.values())):>6}{'yes' if same else 'no':>6}"
+            f"  {widths} (text: {text_widths})"
+        )
+
+
+if __name__ == "__main__":
+    main()
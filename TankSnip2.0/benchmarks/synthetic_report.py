@@ -0,0 +1,157 @@
+# synthetic_report.py
+#
+# Builds calc-report text shaped like the AMETANK API-650 output so the
+# benchmarks can run without the OTTO Checks PDFs or pdfplumber.
+
+import random
+
+HEADER_PAGE = """Project Design Data and Summary
+Project Data
+Job : 2025-06-19-00-40
+Designer : Melior
+Project = Synthetic Benchmark Tank
+Tag ID : Q{quote}
+Design Basis : API-650 13th Edition Errata 1, 2021
+Annexes Used : E, F, J, M, S
+Design Parameters
+Design Internal Pressure = 0.1084 psi or 3 inh2o
+Design External Pressure = -0.0361 psi or -1 inh2o
+D of Tank = {diameter} ft
+OD of Tank = {diameter}.0313 ft
+ID of Tank = {diameter} ft
+Shell Height = {height} ft
+S.G of Contents = 1.1
+Max Design Liq. Level = {height} ft
+Design Temperature = 375 ºF
+MDMT (Minimum Design Metal Temperature) = -20 ºF
+Roof Live Load = 20 psf
+Design Wind Speed, V = Vg = 105 mph
+Ss (g) = 0.24
+S1 (g) = 0.093"""
+
+SHELL_PAGE_HEAD = """Summary Results
+Shell
+Shell # Shell Width (in) Material CA (in) JE"""
+
+SHELL_PAGE_TAIL = """Shell # Shell Weight (lbf) Weight CA (lbf) t-Actual (in)
+Total Weight of Shell = 7,378.2999 lbf"""
+
+SUMMARY_PAGE = """Roof
+Type = Self Supported Conical Roof
+Plates Material = A240-316
+t.required = 0.1875 in
+t.actual = 0.1875 in
+Bottom
+Type : Flat Bottom Non Annular
+Bottom Material = A240-316
+t.required = 0.1875 in
+t.actual = 0.25 in
+Top Member
+Type = Detail B
+Size = L2x2x1/4
+Material = A240-316
+Anchors
+Quantity = {anchors}
+Size = 1 in
+Material = A36
+Nameplate Information
+Roof A240-316 : 0.1875 in
+{nameplate}
+Bottom A240-316 : 0.25 in
+Roof Design Details
+Roof Type = Cone"""
+
+ANCHOR_CHAIR_PAGE = """Anchor Chair Design
+a = 6 in
+b = 8 in
+c = 0.375 in
+h = 12 in
+j = 0.5 in"""
+
+FILLER_LINES = [
+    "Description Variable Equation Value Unit",
+    "Slope Angle Theta ARCTAN(slope) 9.46232 deg",
+    "Surface Area A (pi * (Rh^2)) / COS(Theta) 11.7633e3 in^2",
+    "Plates Nominal Weight Wr-pl (A * d * t) + Wr-pl-add 639.628 lb",
+    "B = Maximum Gravity Load Combination Based on Balanced Snow Load (psf)",
+    "Mw = Wind Moment = 12,345.67 ft-lbf",
+    "Av (g) = 0.0896",
+    "Q = 0.6667",
+]
+
+NOZZLE_SIZES = [("2", "80"), ("3", "40"), ("4", "40"), ("6", "40"), ("8", "40")]
+
+
+def nozzle_block(number, rng):
+    size, sch = rng.choice(NOZZLE_SIZES)
+    location = "Roof" if number % 3 == 0 else "Shell"
+    lines = [
+        f"{location} Nozzle: Nozzle-{number:04d}",
+        f"NOZZLE Description : {size} in SCH {sch}S TYPE RFSO",
+        "Nozzle Neck Material Properties",
+        f"D = Nozzle Nominal Diameter (NPS) = {size} in",
+    ]
+    if rng.random() < 0.3:
+        lines += [
+            "Reinforcement Pad is required",
+            "t_rpr = 0.1875 in",
+            f"Repad Size (OD) Must be = {int(size) * 2 + 2} in",
+        ]
+    else:
+        lines.append("t_rpr = 0 in")
+    # The schedule row: description with the location, remarks, label.
+    lines.append(f'{size}" {location.upper()}')
+    if rng.random() < 0.25:
+        lines.append(f"{size}\" FLANGE W/ BLIND")
+    lines.append(f"{number:04d} NOZZLE")
+    return lines
+
+
+def manway_block():
+    return [
+        "Roof Manway: Manway-1",
+        "MANWAY Description : 24 in ROOF MANWAY",
+        "Neck Thickness 0.25 in",
+        "Reinforcement Pad is required",
+        "t_rpr = 0.25 in",
+        "Repad Size (OD) Must be = 46 in",
+    ]
+
+
+def iter_synthetic_pages(pages=40, nozzles=12, courses=6, seed=0):
+    # Pages are generated lazily so memory benchmarks measure the parser,
+    # not the test data.
+    rng = random.Random(seed)
+    widths = [60] * (courses - 1) + [48]
+    shell_rows = [f"{n} {w} A240-316 0 0.7000" for n, w in enumerate(widths, 1)]
+    nameplate = "\n".join(
+        f"Shell ({n}) A240-316 : 0.1875 in" for n in range(1, courses + 1)
+    )
+
+    head = [
+        HEADER_PAGE.format(quote=9000 + seed, diameter=10, height=courses * 5),
+        "\n".join([SHELL_PAGE_HEAD, *shell_rows, SHELL_PAGE_TAIL]),
+        SUMMARY_PAGE.format(anchors=4, nameplate=nameplate),
+        ANCHOR_CHAIR_PAGE,
+    ]
+    yield from head
+
+    for page in range(max(pages - len(head) - 1, 0)):
+        lines = [rng.choice(FILLER_LINES) for _ in range(60)]
+        if page == 0:
+            lines.insert(0, "Shell Design")
+        yield "\n".join(lines)
+
+    nozzle_lines = ["Appurtenances Design"]
+    for number in range(1, nozzles + 1):
+        nozzle_lines += nozzle_block(number, rng)
+    nozzle_lines += manway_block()
+    yield "\n".join(nozzle_lines)
+
+
+def synthetic_pages(pages=40, nozzles=12, courses=6, seed=0):
+    return list(iter_synthetic_pages(pages, nozzles, courses, seed))
+
+
+def synthetic_text(pages=40, nozzles=12, courses=6, seed=0):
+    return "\n".join(synthetic_pages(pages, nozzles, courses, seed))